@@ -0,0 +1,139 @@
+"""Shared fixtures and synthetic data generators for the benchmark suite.
+
+Run with pytest-benchmark, saving a baseline once and comparing later runs
+against it::
+
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:10%
+"""
+import json
+import random
+import string
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+
+def _random_text(rng: random.Random, n: int) -> str:
+    return "".join(rng.choices(string.ascii_letters + " ", k=n))
+
+
+def make_records(n: int, seed: int = 0) -> list:
+    """Return n JSON-serializable records shaped like our result rows."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "patient_id": f"P-{rng.randrange(10_000):05d}",
+            "label": rng.choice(["tumor", "normal", "stroma"]),
+            "score": rng.random(),
+            "text": _random_text(rng, 200),
+            "tags": [rng.randrange(100) for _ in range(8)],
+        }
+        for i in range(n)
+    ]
+
+
+def make_jsonl(path: Path, n: int) -> Path:
+    """Write n synthetic records as JSON Lines."""
+    with open(path, "w") as f:
+        for record in make_records(n):
+            f.write(json.dumps(record) + "\n")
+    return path
+
+
+def make_dataframe(n: int):
+    """Return a synthetic DataFrame with n rows."""
+    import pandas as pd
+
+    df = pd.DataFrame(make_records(n)).drop(columns="tags")
+    df["label"] = df["label"].astype("category")
+    return df
+
+
+def make_images(directory: Path, n: int, size: int = 512, icc: bool = False) -> list:
+    """Write n random RGB PNGs, optionally sharing one embedded ICC profile."""
+    import numpy as np
+    from PIL import Image
+    from PIL import ImageCms
+
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(0)
+    icc_bytes = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+    paths = []
+    # smooth gradients plus noise, so PNG compression behaves like real images
+    base = np.linspace(0, 255, size, dtype=np.float32)
+    for i in range(n):
+        noise = rng.normal(0, 12, (size, size, 3)).astype(np.float32)
+        img = (base[None, :, None] + noise + 40 * i) % 256
+        path = directory / f"{i:06d}.png"
+        kwargs = {"icc_profile": icc_bytes} if icc else {}
+        Image.fromarray(img.astype(np.uint8), "RGB").save(path, **kwargs)
+        paths.append(path)
+    return paths
+
+
+def record_peak_memory(benchmark, fn: Callable, *args, **kwargs) -> None:
+    """Run fn once under tracemalloc and attach its peak to the benchmark.
+
+    tracemalloc sees Python and NumPy allocations; memory allocated by Arrow
+    or OpenCV outside the Python allocators is not included.
+    """
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["peak_mib"] = round(peak / 2**20, 2)
+
+
+def record_throughput(benchmark, n_items: int, unit: str = "items") -> None:
+    """Attach items/sec, computed from the median round time.
+
+    Nothing is recorded under ``--benchmark-disable``, where no timings are kept.
+    """
+    if benchmark.stats is None:
+        return
+    median = benchmark.stats.stats.median
+    benchmark.extra_info[f"{unit}_per_sec"] = round(n_items / median, 1)
+
+
+@pytest.fixture(scope="session")
+def bench_dir(tmp_path_factory) -> Path:
+    return tmp_path_factory.mktemp("bench")
+
+
+@pytest.fixture(scope="session")
+def jsonl_file(bench_dir) -> Path:
+    return make_jsonl(bench_dir / "records.jsonl", 50_000)
+
+
+@pytest.fixture(scope="session")
+def records() -> list:
+    return make_records(50_000)
+
+
+@pytest.fixture(scope="session")
+def images(bench_dir) -> list:
+    return make_images(bench_dir / "images", 32)
+
+
+@pytest.fixture(scope="session")
+def icc_images(bench_dir) -> list:
+    return make_images(bench_dir / "icc_images", 32, icc=True)
+
+
+@pytest.fixture(scope="session")
+def stub_llm_server():
+    with StubLLMServer() as server:
+        yield server
@@ -0,0 +1,84 @@
+"""Local OpenAI-compatible chat completion server for LLM benchmarks and tests.
+
+The server answers every ``/v1/chat/completions`` request with a fixed reply
+after an optional delay, so client-side overhead can be measured without a
+real model or network access.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):  # noqa: N802
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests.append(request)
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        reply = self.server.reply
+        if callable(reply):
+            reply = reply(request)
+        body = json.dumps(
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": reply},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        ).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubLLMServer:
+    """Threaded stub server bound to a free localhost port.
+
+    Args:
+        reply: The assistant reply, or a callable mapping the request body to it.
+        delay (float): Seconds to sleep before each reply. Defaults to 0.
+
+    Examples:
+        >>> with StubLLMServer(reply="ok") as server:
+        ...     llm = QueryLLM("vllm", "stub", host_vllm_manually=True,
+        ...                    inference_server_url=server.url)
+    """
+
+    def __init__(self, reply="<think>hmm</think>stub answer", delay: float = 0.0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.reply = reply
+        self.httpd.delay = delay
+        self.httpd.requests = []
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def requests(self) -> list:
+        return self.httpd.requests
+
+    def __enter__(self) -> "StubLLMServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
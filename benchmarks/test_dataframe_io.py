@@ -0,0 +1,67 @@
+"""Benchmarks for fileio.dataframe readers and key index lookups."""
+import pytest
+
+from conftest import make_dataframe
+from conftest import record_peak_memory
+from conftest import record_throughput
+from fileio.dataframe.key_index import build_key_index
+from fileio.dataframe.readers import df_loader
+from fileio.dataframe.writers import save_df_to_file
+
+N_ROWS = 200_000
+
+
+@pytest.fixture(scope="module")
+def df_files(bench_dir):
+    df = make_dataframe(N_ROWS)
+    paths = {}
+    for suffix in [".csv", ".csv.gz", ".csv.zst", ".parquet", ".feather"]:
+        if suffix.endswith(".zst"):
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                continue
+        paths[suffix] = bench_dir / f"table{suffix}"
+        save_df_to_file(df, paths[suffix])
+    return paths
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".csv.gz", ".csv.zst", ".parquet", ".feather"])
+def test_df_loader(benchmark, df_files, suffix):
+    if suffix not in df_files:
+        pytest.skip(f"{suffix} unavailable")
+    benchmark.group = "df_loader"
+    filepath = df_files[suffix]
+
+    df = benchmark(df_loader, filepath)
+    assert len(df) == N_ROWS
+    benchmark.extra_info["bytes_read"] = filepath.stat().st_size
+    record_throughput(benchmark, N_ROWS, "rows")
+    record_peak_memory(benchmark, df_loader, filepath)
+
+
+@pytest.fixture(scope="module")
+def key_index(bench_dir, df_files):
+    df = df_loader(df_files[".parquet"])
+    return build_key_index(df, "id", bench_dir / "table.indexed.parquet", row_group_size=8192)
+
+
+def _load_and_filter(filepath, keys):
+    df = df_loader(filepath)
+    return df[df["id"].isin(keys)]
+
+
+@pytest.mark.parametrize("n_keys", [1, 100, 2000])
+@pytest.mark.parametrize("method", ["df_loader", "key_index"])
+def test_key_lookup(benchmark, df_files, key_index, method, n_keys):
+    benchmark.group = f"lookup {n_keys} keys"
+    # a contiguous batch, as when joining results produced in key order
+    keys = list(range(N_ROWS // 2, N_ROWS // 2 + n_keys))
+    if method == "key_index":
+        fn, args = key_index.lookup, (keys,)
+    else:
+        fn, args = _load_and_filter, (df_files[".parquet"], keys)
+
+    rows = benchmark(fn, *args)
+    assert len(rows) == n_keys
+    record_peak_memory(benchmark, fn, *args)
@@ -0,0 +1,90 @@
+"""Benchmarks for fileio.image readers and writers."""
+import cv2
+import numpy as np
+import pytest
+
+from conftest import record_peak_memory
+from conftest import record_throughput
+from fileio.image.batching import BatchPreprocessor
+from fileio.image.readers import cv2_loader
+from fileio.image.readers import pil_loader
+from fileio.image.writers import ParallelImageWriter
+from processing.image.color_icc import _TRANSFORM_CACHE
+
+
+def _load_all(loader, paths, **kwargs):
+    for path in paths:
+        loader(path, **kwargs)
+
+
+@pytest.mark.parametrize("loader", [cv2_loader, pil_loader], ids=["cv2", "pil"])
+def test_image_loader(benchmark, loader, images):
+    benchmark.group = "image loader"
+    benchmark(_load_all, loader, images)
+    record_throughput(benchmark, len(images), "images")
+    record_peak_memory(benchmark, _load_all, loader, images)
+
+
+@pytest.mark.parametrize("loader", [cv2_loader, pil_loader], ids=["cv2", "pil"])
+def test_image_loader_shared_icc(benchmark, loader, icc_images):
+    """A batch sharing one embedded profile should build a single transform."""
+    benchmark.group = "image loader + ICC"
+    _TRANSFORM_CACHE.clear()
+    benchmark(_load_all, loader, icc_images, apply_icc=True)
+    assert _TRANSFORM_CACHE.cache_info()["misses"] == 1
+    record_throughput(benchmark, len(icc_images), "images")
+
+
+@pytest.mark.parametrize("compression", range(10))
+def test_parallel_png_writer(benchmark, compression, images, tmp_path):
+    benchmark.group = "ParallelImageWriter"
+    arrays = [cv2_loader(path, cv2.IMREAD_COLOR) for path in images]
+
+    def write_all():
+        with ParallelImageWriter(compression=compression) as writer:
+            for i, image in enumerate(arrays):
+                writer.submit(str(tmp_path / f"{i:06d}.png"), image, {"index": i})
+
+    benchmark(write_all)
+    record_throughput(benchmark, len(arrays), "images")
+    benchmark.extra_info["bytes_written"] = sum(
+        p.stat().st_size for p in tmp_path.glob("*.png")
+    )
+
+
+BATCH_SIZE = 16
+BATCH_HW = (224, 224)
+
+
+def _naive_batches(paths):
+    """The per-project loop BatchPreprocessor replaces: every step allocates."""
+    mean, std = np.array([0.485, 0.456, 0.406]), np.array([0.229, 0.224, 0.225])
+    for start in range(0, len(paths), BATCH_SIZE):
+        batch = []
+        for path in paths[start:start + BATCH_SIZE]:
+            img = cv2_loader(path, cv2.IMREAD_COLOR)
+            img = cv2.resize(img, BATCH_HW[::-1], interpolation=cv2.INTER_AREA)
+            img = img.astype(np.float32) / 255.0
+            img = (img - mean) / std
+            batch.append(img.transpose(2, 0, 1).astype(np.float32))
+        yield np.stack(batch)
+
+
+def _preallocated_batches(paths):
+    preprocessor = BatchPreprocessor(BATCH_HW, batch_size=BATCH_SIZE, channels_first=True,
+                                     mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225))
+    yield from (batch for batch, _ in preprocessor.iter_batches(paths))
+
+
+def _consume(batches, paths):
+    for batch in batches(paths):
+        batch.sum()
+
+
+@pytest.mark.parametrize("batches", [_naive_batches, _preallocated_batches],
+                         ids=["naive", "preallocated"])
+def test_batch_preprocessing(benchmark, batches, images):
+    benchmark.group = "batch preprocessing"
+    benchmark(_consume, batches, images)
+    record_throughput(benchmark, len(images), "images")
+    record_peak_memory(benchmark, _consume, batches, images)
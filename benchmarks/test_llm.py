@@ -0,0 +1,48 @@
+"""Benchmarks for QueryLLM client overhead against a local stub server."""
+import time
+
+import numpy as np
+import pytest
+
+from conftest import record_throughput
+
+# QueryLLM needs requests and the langchain clients
+QueryLLM = pytest.importorskip("llms.queryllm").QueryLLM
+
+N_QUERIES = 50
+
+
+@pytest.fixture(scope="module")
+def llm(stub_llm_server):
+    return QueryLLM(
+        provider="vllm",
+        model="stub",
+        parameters={"temperature": 0, "max_retries": 0},
+        host_vllm_manually=True,
+        inference_server_url=stub_llm_server.url,
+    )
+
+
+def test_simple_query_latency(benchmark, llm):
+    benchmark.group = "QueryLLM"
+    latencies = []
+
+    def run():
+        for i in range(N_QUERIES):
+            start = time.perf_counter()
+            llm.simple_query(f"question {i}", system_prompt="Answer the question")
+            latencies.append(time.perf_counter() - start)
+
+    benchmark.pedantic(run, rounds=5, iterations=1)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    benchmark.extra_info.update(
+        {"p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2)}
+    )
+    record_throughput(benchmark, N_QUERIES, "queries")
+
+
+def test_strip_thinking_tokens(benchmark):
+    benchmark.group = "QueryLLM"
+    texts = [f"<think>{'reasoning ' * 50}</think> answer {i}" for i in range(10_000)]
+    benchmark(lambda: [QueryLLM.strip_thinking_tokens(t) for t in texts])
+    record_throughput(benchmark, len(texts), "responses")
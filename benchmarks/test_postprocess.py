@@ -0,0 +1,45 @@
+"""Benchmarks for bulk post-processing of LLM responses."""
+import pytest
+
+from conftest import record_throughput
+
+pytest.importorskip("pyarrow")
+
+from llms.postprocess import normalize_labels  # noqa: E402
+from llms.postprocess import parse_json_blocks  # noqa: E402
+from llms.postprocess import strip_thinking_tokens  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def bulk_responses():
+    labels = ["Positive", "negative.", " NEUTRAL ", "pos"]
+    return [
+        f"<think>{'reasoning ' * 20}</think>"
+        f'```json\n{{"id": {i}, "label": "{labels[i % 4]}"}}\n```'
+        for i in range(1_000_000)
+    ]
+
+
+def test_bulk_strip_thinking_tokens(benchmark, bulk_responses):
+    benchmark.group = "bulk postprocess"
+    benchmark.pedantic(strip_thinking_tokens, args=(bulk_responses,), rounds=3)
+    record_throughput(benchmark, len(bulk_responses), "responses")
+
+
+def test_bulk_parse_json_blocks(benchmark, bulk_responses):
+    benchmark.group = "bulk postprocess"
+    benchmark.pedantic(parse_json_blocks, args=(bulk_responses,), rounds=3)
+    record_throughput(benchmark, len(bulk_responses), "responses")
+
+
+def test_bulk_normalize_labels(benchmark, bulk_responses):
+    benchmark.group = "bulk postprocess"
+    answers = [r.rsplit('"label": "', 1)[1].split('"')[0] for r in bulk_responses]
+    labels = benchmark.pedantic(
+        normalize_labels,
+        args=(answers, ["positive", "negative", "neutral"]),
+        kwargs={"aliases": {"pos": "positive"}},
+        rounds=3,
+    )
+    assert labels.null_count == 0
+    record_throughput(benchmark, len(answers), "responses")
@@ -0,0 +1,132 @@
+"""Benchmarks for fileio.text readers and writers."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import ujson
+
+from conftest import make_records
+from conftest import record_peak_memory
+from conftest import record_throughput
+from fileio.text import open_file
+from fileio.text.readers import json_loader
+from fileio.text.writers import json_writer
+from fileio.text.writers import jsonl_writer
+
+N_RECORDS = 50_000
+# small by default; raise it (e.g. to 2048) to see json_loader's peak RSS blow up
+LARGE_JSON_MB = int(os.environ.get("BENCH_LARGE_JSON_MB", "64"))
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+
+def legacy_json_writer(data: dict, filepath) -> None:
+    """json_writer before single-pass serialization: dumps twice, then stats."""
+    ujson.dumps(data)
+    with open(filepath, "w") as f:
+        ujson.dump(data, f)
+    if filepath.stat().st_size == 0:
+        raise ValueError(filepath)
+
+
+def test_json_loader_jsonl(benchmark, jsonl_file):
+    benchmark.group = "json_loader"
+    result = benchmark(json_loader, jsonl_file)
+    assert len(result) == N_RECORDS
+    record_throughput(benchmark, N_RECORDS, "records")
+    record_peak_memory(benchmark, json_loader, jsonl_file)
+
+
+@pytest.mark.parametrize("writer", [legacy_json_writer, json_writer], ids=["legacy", "single_pass"])
+def test_json_writer(benchmark, writer, records, tmp_path):
+    benchmark.group = "json_writer"
+    data = {"results": records}
+    filepath = tmp_path / "out.json"
+    benchmark(writer, data, filepath)
+    record_throughput(benchmark, N_RECORDS, "records")
+    record_peak_memory(benchmark, writer, data, filepath)
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".jsonl.gz", ".jsonl.zst"])
+def test_jsonl_compressed_write(benchmark, suffix, records, tmp_path):
+    if suffix.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    benchmark.group = "jsonl_writer compressed"
+    filepath = tmp_path / f"out{suffix}"
+    benchmark(jsonl_writer, records, filepath)
+    benchmark.extra_info["bytes_written"] = filepath.stat().st_size
+    record_throughput(benchmark, N_RECORDS, "records")
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".jsonl.gz", ".jsonl.zst"])
+def test_jsonl_compressed_read(benchmark, suffix, records, tmp_path):
+    if suffix.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    benchmark.group = "json_loader compressed"
+    filepath = tmp_path / f"in{suffix}"
+    jsonl_writer(records, filepath)
+
+    result = benchmark(json_loader, filepath)
+    assert len(result) == N_RECORDS
+    benchmark.extra_info["bytes_read"] = filepath.stat().st_size
+    record_throughput(benchmark, N_RECORDS, "records")
+
+
+def test_open_file_roundtrip_bytes(tmp_path):
+    """Sanity check that compression actually shrinks the benchmark data."""
+    filepath = tmp_path / "sample.jsonl.gz"
+    with open_file(filepath, "wt") as f:
+        f.write("{}\n" * 10_000)
+    assert filepath.stat().st_size < 10_000
+
+
+@pytest.fixture(scope="module")
+def large_json_array(tmp_path_factory):
+    """A top-level JSON array of about LARGE_JSON_MB MiB, written in chunks."""
+    filepath = tmp_path_factory.mktemp("large") / "array.json"
+    chunk = ",".join(ujson.dumps(r) for r in make_records(10_000))
+    repeats = max(1, LARGE_JSON_MB * 2**20 // len(chunk))
+    with open(filepath, "w") as f:
+        f.write("[")
+        f.write(chunk)
+        for _ in range(repeats - 1):
+            f.write(",")
+            f.write(chunk)
+        f.write("]")
+    return filepath, 10_000 * repeats
+
+
+def _peak_rss_mib(statement: str, filepath: Path) -> float:
+    """Run statement in a fresh interpreter and return its peak RSS (ru_maxrss)."""
+    code = (
+        "import resource, sys\n"
+        f"sys.path.insert(0, {str(SRC_DIR)!r})\n"
+        f"filepath = {str(filepath)!r}\n"
+        f"{statement}\n"
+        "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return float("nan")  # typically killed by the OOM killer
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "from fileio.text.readers import json_loader\nn = len(json_loader(filepath))",
+        "from fileio.text.readers import json_stream_loader\n"
+        "n = sum(1 for _ in json_stream_loader(filepath))",
+        "from fileio.text.readers import json_stream_loader\n"
+        "n = sum(1 for _ in json_stream_loader(filepath, use_ijson=False))",
+    ],
+    ids=["json_loader", "stream", "stream_pure_python"],
+)
+def test_large_json_array_peak_rss(benchmark, statement, large_json_array):
+    benchmark.group = f"{LARGE_JSON_MB} MiB JSON array"
+    filepath, n_records = large_json_array
+    peak = benchmark.pedantic(_peak_rss_mib, args=(statement, filepath), rounds=1, iterations=1)
+    benchmark.extra_info["peak_rss_mib"] = peak
+    benchmark.extra_info["file_mib"] = round(filepath.stat().st_size / 2**20, 1)
+    record_throughput(benchmark, n_records, "records")
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""Content-addressed cache for pure functions of an input file.
+
+``file_cache`` memoises functions such as "CSV to DataFrame" or "image to
+resized array" on disk. The key combines the function, its parameters and a
+fingerprint of the input file: either its (size, mtime) or a hash of its
+content. Results are stored in a binary format matching their type (Feather
+for DataFrames and Arrow tables, ``.npy`` for arrays, pickle otherwise),
+written atomically so that concurrent processes can share one cache
+directory, and evicted least-recently-used first once the disk budget is
+exceeded.
+"""
+import fcntl
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import uuid
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Optional
+from typing import Union
+
+from loguru import logger
+
+from profiling.hooks import count
+from profiling.hooks import span
+
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("BASE_REPO_CACHE_DIR", Path.home() / ".cache" / "base_repo")
+)
+
+# suffixes written by _save, in lookup order
+_FORMATS = (".feather", ".arrow", ".npy", ".pkl")
+
+_MISSING = object()
+
+
+class UnhashableArgument(TypeError):
+    """Raised when an argument has no stable digest, so it cannot be part of a key."""
+
+
+def _hash_value(digest: "hashlib._Hash", value: Any) -> None:
+    """Feed a stable, type-tagged encoding of value into digest.
+
+    Arrays are hashed by dtype, shape and raw bytes (a repr would elide the
+    middle of large arrays), containers recursively, and other objects by
+    their pickle bytes.
+    """
+    digest.update(type(value).__qualname__.encode("utf-8") + b"\0")
+
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        digest.update(repr(value).encode("utf-8"))
+    elif isinstance(value, Path):
+        digest.update(str(value).encode("utf-8"))
+    elif isinstance(value, (list, tuple)):
+        digest.update(str(len(value)).encode("utf-8"))
+        for item in value:
+            _hash_value(digest, item)
+    elif isinstance(value, dict):
+        items = sorted((_digest_of(k), v) for k, v in value.items())
+        for key_digest, item in items:
+            digest.update(key_digest)
+            _hash_value(digest, item)
+    elif isinstance(value, (set, frozenset)):
+        for item_digest in sorted(_digest_of(item) for item in value):
+            digest.update(item_digest)
+    elif type(value).__module__ == "numpy" and type(value).__name__ == "ndarray":
+        if value.dtype.hasobject:
+            raise UnhashableArgument("object arrays have no stable digest")
+        import numpy as np
+
+        digest.update(f"{value.dtype.str}{value.shape}".encode("utf-8"))
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        try:
+            digest.update(pickle.dumps(value, protocol=4))
+        except Exception as e:
+            raise UnhashableArgument(f"{type(value).__name__} cannot be pickled: {e}") from e
+
+
+def _digest_of(value: Any) -> bytes:
+    digest = hashlib.blake2b(digest_size=20)
+    _hash_value(digest, value)
+    return digest.digest()
+
+
+def file_fingerprint(filepath: Union[str, Path], mode: str = "stat") -> str:
+    """Fingerprint an input file.
+
+    Args:
+        filepath (Union[str, Path]): The input file.
+        mode (str): "stat" for the resolved path, size and mtime (cheap) or
+            "content" for a hash of the file bytes (robust to touch/copy).
+            Defaults to "stat".
+
+    Returns:
+        str: The fingerprint.
+    """
+    filepath = Path(filepath).resolve()
+    if mode == "stat":
+        st = filepath.stat()
+        return f"{filepath}:{st.st_size}:{st.st_mtime_ns}"
+    if mode == "content":
+        digest = hashlib.blake2b(digest_size=20)
+        with open(filepath, "rb") as f:
+            for block in iter(functools.partial(f.read, 1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    raise ValueError(f"Invalid fingerprint mode: {mode}")
+
+
+def _save(result: Any, tmp_base: str) -> str:
+    """Serialize a result next to tmp_base and return the written path."""
+    module = type(result).__module__.split(".")[0]
+
+    if module == "pandas" and type(result).__name__ == "DataFrame":
+        from pyarrow import feather
+
+        path = tmp_base + ".feather"
+        feather.write_feather(result, path)
+    elif module == "pyarrow" and type(result).__name__ == "Table":
+        from pyarrow import feather
+
+        path = tmp_base + ".arrow"
+        feather.write_feather(result, path)
+    elif module == "numpy" and type(result).__name__ == "ndarray" and not result.dtype.hasobject:
+        import numpy as np
+
+        path = tmp_base + ".npy"
+        np.save(path, result, allow_pickle=False)
+    else:
+        path = tmp_base + ".pkl"
+        with open(path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return path
+
+
+def _load(path: Path, mmap: bool = False) -> Any:
+    """Load a result written by ``_save``."""
+    if path.suffix == ".feather":
+        from pyarrow import feather
+
+        return feather.read_feather(path.as_posix(), memory_map=mmap)
+    if path.suffix == ".arrow":
+        from pyarrow import feather
+
+        return feather.read_table(path.as_posix(), memory_map=mmap)
+    if path.suffix == ".npy":
+        import numpy as np
+
+        return np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class ResultCache:
+    """On-disk, size-bounded LRU cache of function results.
+
+    Args:
+        cache_dir (Union[str, Path]): The cache directory. Defaults to
+            $BASE_REPO_CACHE_DIR or ~/.cache/base_repo.
+        max_bytes (Optional[int]): Disk budget in bytes, None for unbounded.
+            Defaults to 10 GiB.
+
+    Examples:
+        >>> cache = ResultCache("cache", max_bytes=2**30)
+        >>> cache.put("key", df)
+        >>> cache.get("key")
+    """
+
+    LOCK_FILE = ".lock"
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+        max_bytes: Optional[int] = 10 * 2**30,
+    ):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # running size estimate; None until the first write scans the directory
+        self._total_bytes: Optional[int] = None
+
+    def _find(self, key: str) -> Optional[Path]:
+        shard = self.cache_dir / key[:2]
+        for suffix in _FORMATS:
+            path = shard / (key + suffix)
+            if path.is_file():
+                return path
+        return None
+
+    def get(self, key: str, default: Any = None, mmap: bool = False) -> Any:
+        """Return the cached result for key, or default on a miss."""
+        path = self._find(key)
+        if path is None:
+            count("fileio.cache.miss")
+            return default
+
+        try:
+            with span("fileio.cache.load") as s:
+                s.add_bytes(path.stat().st_size)
+                result = _load(path, mmap=mmap)
+        except FileNotFoundError:
+            # evicted by another process between lookup and load
+            return default
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return default
+
+        count("fileio.cache.hit")
+        # touch for LRU, atime is unreliable on noatime mounts
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return result
+
+    def put(self, key: str, result: Any) -> Path:
+        """Store a result atomically and enforce the disk budget."""
+        shard = self.cache_dir / key[:2]
+        shard.mkdir(exist_ok=True)
+
+        tmp_base = str(shard / f".{key}.{uuid.uuid4().hex}")
+        try:
+            tmp_path = _save(result, tmp_base)
+            path = shard / (key + Path(tmp_path).suffix)
+            os.replace(tmp_path, path)
+        except BaseException:
+            for suffix in _FORMATS:
+                Path(tmp_base + suffix).unlink(missing_ok=True)
+            raise
+
+        if self.max_bytes is not None:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += path.stat().st_size
+            # the directory is only rescanned once the estimate exceeds the budget
+            if self._total_bytes > self.max_bytes:
+                self.evict()
+        return path
+
+    def _scan_size(self) -> int:
+        total = 0
+        for shard in os.scandir(self.cache_dir):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if not entry.name.startswith("."):
+                        try:
+                            total += entry.stat().st_size
+                        except FileNotFoundError:
+                            pass
+        return total
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Delete least-recently-used entries until the cache fits the budget.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with open(self.cache_dir / self.LOCK_FILE, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = []
+            for shard in os.scandir(self.cache_dir):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            freed = 0
+            for _, size, path in sorted(entries):
+                if total - freed <= max_bytes:
+                    break
+                Path(path).unlink(missing_ok=True)
+                freed += size
+            self._total_bytes = total - freed
+
+        if freed:
+            logger.info(f"Evicted {freed} bytes from {self.cache_dir}")
+        return freed
+
+    def clear(self) -> None:
+        """Delete every entry."""
+        self.evict(max_bytes=0)
+
+
+def file_cache(
+    func: Optional[Callable] = None,
+    *,
+    path_arg: Union[int, str] = 0,
+    fingerprint: str = "stat",
+    cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+    max_bytes: Optional[int] = 10 * 2**30,
+    version: str = "",
+    mmap: bool = False,
+) -> Callable:
+    """Cache a pure function of an input file on disk.
+
+    The key hashes the function's qualified name, ``version``, the input
+    file's fingerprint and a blake2b digest of the remaining bound arguments
+    (arrays by dtype, shape and bytes, other objects by their pickle). Calls
+    with an argument that has no stable digest are not cached.
+
+    Args:
+        func (Optional[Callable]): The function to cache.
+        path_arg (Union[int, str]): Position or name of the input file argument. Defaults to 0.
+        fingerprint (str): "stat" (size, mtime) or "content" (file hash). Defaults to "stat".
+        cache_dir (Union[str, Path]): The cache directory.
+        max_bytes (Optional[int]): Disk budget in bytes. Defaults to 10 GiB.
+        version (str): Bump to invalidate results when the function changes.
+        mmap (bool): Whether to memory-map array and Arrow results on load. Defaults to False.
+
+    Returns:
+        Callable: The wrapped function. ``wrapped.cache`` is its ResultCache and
+        ``wrapped.uncached`` the original function.
+
+    Examples:
+        >>> @file_cache(fingerprint="content", max_bytes=2**30)
+        ... def load_resized(path, size=(224, 224)):
+        ...     return cv2.resize(cv2_loader(path), size)
+    """
+    if func is None:
+        return functools.partial(
+            file_cache,
+            path_arg=path_arg,
+            fingerprint=fingerprint,
+            cache_dir=cache_dir,
+            max_bytes=max_bytes,
+            version=version,
+            mmap=mmap,
+        )
+
+    cache = ResultCache(cache_dir, max_bytes=max_bytes)
+    signature = inspect.signature(func)
+    param_names = list(signature.parameters)
+    path_name = param_names[path_arg] if isinstance(path_arg, int) else path_arg
+    qualname = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        filepath = params.pop(path_name)
+
+        digest = hashlib.blake2b(digest_size=32)
+        for part in (qualname, version, file_fingerprint(filepath, fingerprint)):
+            digest.update(part.encode("utf-8") + b"\0")
+        try:
+            _hash_value(digest, params)
+        except UnhashableArgument as e:
+            logger.warning(f"Not caching {qualname}: {e}")
+            count("fileio.cache.unhashable")
+            return func(*args, **kwargs)
+        key = digest.hexdigest()
+
+        result = cache.get(key, default=_MISSING, mmap=mmap)
+        if result is not _MISSING:
+            return result
+
+        result = func(*args, **kwargs)
+        try:
+            cache.put(key, result)
+        except Exception as e:
+            # a result that cannot be stored is returned uncached
+            logger.warning(f"Not caching {qualname}: {type(e).__name__}: {e}")
+            count("fileio.cache.put_error")
+        return result
+
+    wrapper.cache = cache
+    wrapper.uncached = func
+    return wrapper
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Sorted Parquet tables with a key index for point lookups.
+
+``build_key_index`` sorts a table by a key column and writes it as Parquet with
+fixed-size row groups. Because the rows are sorted, every row group covers a
+disjoint key range, and the first and last key of each row group are stored as
+a compact index in the Parquet key-value metadata. ``KeyIndex.lookup`` binary
+searches that index and reads only the row groups that can hold the requested
+keys, so looking up a few thousand keys costs a few row-group reads instead of
+a full ``df_loader`` of the table.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from loguru import logger
+
+from fileio.dataframe.readers import df_loader
+
+INDEX_METADATA_KEY = b"base_repo.key_index"
+
+
+def build_key_index(
+    source: Union[pd.DataFrame, str, Path],
+    key: str,
+    output_file: Union[str, Path],
+    row_group_size: int = 65_536,
+    compression: str = "zstd",
+) -> "KeyIndex":
+    """Write a table sorted by key, with a key-to-row-group index.
+
+    The whole source table is loaded into memory to be sorted. A categorical
+    key column is written with the type of its categories, since Arrow cannot
+    sort dictionary-encoded columns.
+
+    Args:
+        source (Union[pd.DataFrame, str, Path]): The table, or a file readable by ``df_loader``.
+        key (str): The key column; it must not contain nulls.
+        output_file (Union[str, Path]): The Parquet file to write.
+        row_group_size (int): Rows per row group. Smaller groups make lookups
+            read less data at the cost of a larger footer. Defaults to 65_536.
+        compression (str): Parquet compression codec. Defaults to "zstd".
+
+    Returns:
+        KeyIndex: The index opened on the written file.
+
+    Raises:
+        ValueError: If the key column is missing or contains nulls.
+
+    Examples:
+        >>> build_key_index("metadata.csv", key="image_id", output_file="metadata.parquet")
+        >>> KeyIndex("metadata.parquet").lookup(["img-001", "img-042"])
+    """
+    df = source if isinstance(source, pd.DataFrame) else df_loader(source)
+    if key not in df.columns:
+        raise ValueError(f"Key column not found: {key}")
+    if df[key].isna().any():
+        raise ValueError(f"Key column contains nulls: {key}")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    key_field = table.schema.field(key)
+    if pa.types.is_dictionary(key_field.type):
+        value_type = key_field.type.value_type
+        table = table.set_column(
+            table.schema.get_field_index(key),
+            key_field.with_type(value_type),
+            table.column(key).cast(value_type),
+        )
+    table = table.sort_by(key)
+    keys = table.column(key)
+
+    # row groups are consecutive slices of row_group_size sorted rows
+    starts = list(range(0, table.num_rows, row_group_size))
+    index = {
+        "key": key,
+        "mins": [keys[start].as_py() for start in starts],
+        "maxs": [keys[min(start + row_group_size, table.num_rows) - 1].as_py() for start in starts],
+    }
+    metadata = dict(table.schema.metadata or {})
+    metadata[INDEX_METADATA_KEY] = json.dumps(index, default=str).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp_file, row_group_size=row_group_size, compression=compression)
+    os.replace(tmp_file, output_file)
+
+    logger.info(f"Wrote {table.num_rows} rows in {len(starts)} row groups to {output_file}")
+    return KeyIndex(output_file)
+
+
+class KeyIndex:
+    """Point and batch lookups on a Parquet file written by ``build_key_index``.
+
+    The Parquet footer and the key index are read once; each lookup then reads
+    only the row groups whose key range contains a requested key.
+
+    Args:
+        index_file (Union[str, Path]): The Parquet file.
+
+    Raises:
+        ValueError: If the file was not written by ``build_key_index``.
+    """
+
+    def __init__(self, index_file: Union[str, Path]):
+        self.index_file = Path(index_file)
+        self.parquet = pq.ParquetFile(self.index_file, memory_map=True)
+
+        metadata = self.parquet.schema_arrow.metadata or {}
+        if INDEX_METADATA_KEY not in metadata:
+            raise ValueError(f"No key index in {self.index_file}, write it with build_key_index")
+
+        index = json.loads(metadata[INDEX_METADATA_KEY])
+        self.key = index["key"]
+        key_type = self.parquet.schema_arrow.field(self.key).type
+        self._key_type = key_type
+        self._mins = pa.array(index["mins"]).cast(key_type).to_numpy(zero_copy_only=False)
+        self._maxs = pa.array(index["maxs"]).cast(key_type).to_numpy(zero_copy_only=False)
+
+        if len(self._mins) != self.parquet.num_row_groups:
+            raise ValueError(
+                f"Key index of {self.index_file} does not match its {self.parquet.num_row_groups} row groups"
+            )
+
+    @property
+    def num_row_groups(self) -> int:
+        return self.parquet.num_row_groups
+
+    def row_groups(self, keys: Iterable) -> List[int]:
+        """Return the row groups that may contain any of the keys, in file order."""
+        keys = pa.array(list(keys)).cast(self._key_type).to_numpy(zero_copy_only=False)
+        if not len(keys) or not len(self._mins):
+            return []
+
+        # a key can span several row groups when it is repeated
+        first = np.searchsorted(self._maxs, keys, side="left")
+        last = np.searchsorted(self._mins, keys, side="right") - 1
+        groups = set()
+        for lo, hi in zip(first, last):
+            groups.update(range(lo, hi + 1))
+        return sorted(groups)
+
+    def lookup(self, keys: Iterable, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Return the rows whose key is in keys, sorted by key.
+
+        The cost grows with the number of distinct row groups touched, not with
+        the table size, so batches of nearby keys are the cheapest.
+
+        Args:
+            keys (Iterable): The keys to look up. Missing keys are ignored.
+            columns (Optional[List[str]]): Columns to read. Defaults to all columns.
+
+        Returns:
+            pd.DataFrame: The matching rows.
+
+        Examples:
+            >>> index = KeyIndex("metadata.parquet")
+            >>> index.lookup(df_results["image_id"].unique(), columns=["image_id", "path"])
+        """
+        keys = pa.array(list(keys)).cast(self._key_type)
+        if columns is not None and self.key not in columns:
+            columns = [self.key] + list(columns)
+
+        groups = self.row_groups(keys)
+        if not groups:
+            return self.parquet.schema_arrow.empty_table().select(
+                columns or self.parquet.schema_arrow.names
+            ).to_pandas()
+
+        table = self.parquet.read_row_groups(groups, columns=columns)
+        table = table.filter(pc.is_in(table.column(self.key), value_set=keys))
+        return table.to_pandas()
+
+    def get(self, key, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Return the rows of a single key, or None if it is not in the table."""
+        rows = self.lookup([key], columns)
+        return rows if len(rows) else None
@@ -1,22 +1,31 @@
 #!/usr/bin/env python3
 """readers.py in src/base_repo/fileio/dataframe."""
+from __future__ import annotations
+
 import os
 from pathlib import Path
+from typing import TYPE_CHECKING
 from typing import Union
 
-import pandas as pd
 from loguru import logger
-from pyarrow import feather
 
+from fileio.text import data_suffix
 from fileio.text import is_empty_file
+from fileio.text import open_file
 from fileio.text import valid_file_ext
+from profiling.hooks import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
+@traced(bytes_in="filepath")
 def df_loader(filepath: Union[str, Path, os.PathLike]) -> pd.DataFrame:
     """Load CSV file and return its contents as a DataFrame.
 
     Args:
-        filepath (Union[str, Path]): The path to the CSV file.
+        filepath (Union[str, Path]): The path to the CSV, Parquet, or Feather
+        file. CSV files may be compressed with gzip (.gz) or zstd (.zst).
 
     Returns:
         pd.DataFrame: The contents of the CSV, Parquet, or Feather file as a DataFrame.
@@ -32,7 +41,10 @@ def df_loader(filepath: Union[str, Path, os.PathLike]) -> pd.DataFrame:
         0  value
     """
     filepath = Path(filepath)
-    if not valid_file_ext(filepath, {".csv", ".parquet", ".feather"}):
+    # parquet and feather are compressed internally, only csv takes .gz/.zst
+    if not valid_file_ext(filepath, {".csv", ".parquet", ".feather"}) and not (
+        valid_file_ext(filepath, ".csv", allow_compressed=True)
+    ):
         logger.error(f"Invalid file type: {filepath.suffix}")
         raise ValueError(f"Invalid file type: {filepath.suffix}")
 
@@ -40,11 +52,16 @@ def df_loader(filepath: Union[str, Path, os.PathLike]) -> pd.DataFrame:
         logger.error(f"File is empty: {filepath}")
         raise ValueError(f"File is empty: {filepath}")
 
-    if filepath.suffix == ".csv":
-        return pd.read_csv(filepath)
+    import pandas as pd
+
+    if data_suffix(filepath) == ".csv":
+        with open_file(filepath, "rb") as f:
+            return pd.read_csv(f)
     elif filepath.suffix == ".parquet":
         return pd.read_parquet(filepath)
     elif filepath.suffix == ".feather":
+        from pyarrow import feather
+
         return feather.read_feather(filepath.as_posix())
     else:
         logger.error(f"Unsupported file format: {filepath.suffix}")
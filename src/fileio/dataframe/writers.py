@@ -1,14 +1,22 @@
 #!/usr/bin/env python3
 """writer.py in src/base_repo/fileio/dataframe."""
+from __future__ import annotations
 
 from pathlib import Path
+from typing import TYPE_CHECKING
 from typing import Union
 
-import pandas as pd
 from loguru import logger
-from pyarrow import feather
 
+from fileio.text import data_suffix
+from fileio.text import open_file
+from profiling.hooks import traced
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@traced(bytes_out="output_file")
 def save_df_to_file(df: pd.DataFrame, output_file: Union[Path, str]) -> None:
     """
     Save a pandas DataFrame to a file in CSV, Parquet, or Feather format.
@@ -20,6 +28,7 @@ def save_df_to_file(df: pd.DataFrame, output_file: Union[Path, str]) -> None:
     output_file : Union[Path, str]
         The file path where the DataFrame will be saved. The file extension must be
         one of `.csv`, `.parquet`, or `.feather` to determine the file format.
+        CSV output is compressed when the path ends in `.csv.gz` or `.csv.zst`.
 
     Raises
     ------
@@ -37,11 +46,14 @@ def save_df_to_file(df: pd.DataFrame, output_file: Union[Path, str]) -> None:
 
     output_file = Path(output_file)
     
-    if output_file.suffix == ".csv":
-        df.to_csv(output_file, index=False)
+    if data_suffix(output_file) == ".csv":
+        with open_file(output_file, "wt") as f:
+            df.to_csv(f, index=False)
     elif output_file.suffix == ".parquet":
         df.to_parquet(output_file)
     elif output_file.suffix == ".feather":
+        from pyarrow import feather
+
         feather.write_feather(df, output_file.as_posix())
     else:
         logger.error(f"Unsupported file format: {output_file.suffix}")
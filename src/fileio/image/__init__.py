@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""__init__.py in src/base_repo/fileio/image.
+
+OpenCV and PIL are imported on first use through ``import_cv2`` and
+``import_pil``, so importing a reader or writer module stays cheap for code
+paths that never decode an image.
+"""
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def import_cv2():
+    """Import OpenCV once and enable its optimized code paths."""
+    import cv2
+
+    cv2.setUseOptimized(True)
+    return cv2
+
+
+@functools.lru_cache(maxsize=None)
+def import_pil():
+    """Import PIL once, apply the repository settings and return PIL.Image."""
+    import PIL.Image
+    import PIL.ImageFile
+    import PIL.PngImagePlugin
+
+    PIL.ImageFile.LOAD_TRUNCATED_IMAGES = False
+    PIL.PngImagePlugin.MAX_TEXT_CHUNK = 2048 * 2048
+    return PIL.Image
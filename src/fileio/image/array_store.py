@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""Memory-mapped store of decoded images.
+
+Images are decoded once with ``cv2_loader`` and their raw pixels appended to a
+single flat file, each array aligned to a page boundary. A JSON index maps the
+resolved source path to the array offset, shape, dtype and the source size and
+mtime. Reads are zero-copy slices of a read-only ``np.memmap``, so any number
+of processes can share the same store through the page cache.
+
+Entries are refreshed when the source file's size or mtime changes. Writers
+serialise on an ``fcntl`` lock file and publish the index with an atomic
+rename, so readers in other processes always see a consistent index.
+``compact()`` writes a new data file generation and publishes it with the
+index that describes it; a reader keeps using the generation its index points
+to and reloads the index when that data file is gone.
+"""
+import fcntl
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Union
+
+import cv2
+import numpy as np
+import ujson as json
+from loguru import logger
+
+from fileio.image.readers import cv2_loader
+from fileio.text import valid_file_ext
+from fileio.text import VALID_EXTENSIONS
+
+
+class ImageArrayStore:
+    """Decode-once, memory-mapped image store.
+
+    Args:
+        store_dir (Union[str, Path]): Directory holding the data and index files.
+        flag (int): The OpenCV read flag used to decode images.
+            Defaults to cv2.IMREAD_UNCHANGED.
+        apply_icc (bool): Whether to apply embedded ICC profiles on decode.
+            Defaults to False.
+        check_mtime (bool): Whether to compare the source size and mtime on each
+            read and re-decode stale entries. Defaults to True.
+
+    Examples:
+        >>> store = ImageArrayStore("cache/images")
+        >>> store.build("data/images")
+        >>> img = store["data/images/0001.png"]
+    """
+
+    INDEX_FILE = "index.json"
+    DATA_FILE = "images.{generation}.bin"
+    LOCK_FILE = ".lock"
+    ALIGNMENT = 4096
+
+    def __init__(
+        self,
+        store_dir: Union[str, Path],
+        flag: int = cv2.IMREAD_UNCHANGED,
+        apply_icc: bool = False,
+        check_mtime: bool = True,
+    ):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.flag = flag
+        self.apply_icc = apply_icc
+        self.check_mtime = check_mtime
+
+        self.index_path = self.store_dir / self.INDEX_FILE
+        self.lock_path = self.store_dir / self.LOCK_FILE
+
+        self._index: Dict[str, dict] = {}
+        self._index_stat: Optional[tuple] = None
+        self._generation = 0
+        self._data: Optional[np.memmap] = None
+        self._data_generation: Optional[int] = None
+        self._load_index()
+        self.data_path.touch(exist_ok=True)
+
+    @property
+    def data_path(self) -> Path:
+        """The data file of the generation described by the loaded index."""
+        return self.store_dir / self.DATA_FILE.format(generation=self._generation)
+
+    # ------------------------------------------------------------------ index
+    def _load_index(self) -> None:
+        """Reload the index if another writer has published a new one."""
+        try:
+            st = self.index_path.stat()
+        except FileNotFoundError:
+            return
+        # every publish is a rename, so the inode changes even if the mtime does not
+        if (st.st_ino, st.st_mtime_ns) == self._index_stat:
+            return
+
+        with open(self.index_path) as f:
+            index = json.load(f)
+        self._index = index["entries"]
+        self._generation = index["generation"]
+        self._index_stat = (st.st_ino, st.st_mtime_ns)
+
+    def _write_index(self) -> None:
+        """Atomically publish the in-memory index."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"generation": self._generation, "entries": self._index}, f)
+            os.replace(tmp_path, self.index_path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        st = self.index_path.stat()
+        self._index_stat = (st.st_ino, st.st_mtime_ns)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the store's exclusive writer lock."""
+        with open(self.lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._load_index()
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _key(filepath: Union[str, Path]) -> str:
+        return str(Path(filepath).resolve())
+
+    @staticmethod
+    def _source_stat(key: str) -> Optional[os.stat_result]:
+        try:
+            return os.stat(key)
+        except FileNotFoundError:
+            return None
+
+    def _is_fresh(self, key: str, entry: Optional[dict]) -> bool:
+        if entry is None:
+            return False
+        if not self.check_mtime:
+            return True
+        st = self._source_stat(key)
+        return (
+            st is not None
+            and st.st_size == entry["size"]
+            and st.st_mtime_ns == entry["mtime_ns"]
+        )
+
+    # ------------------------------------------------------------------ write
+    def _decode(self, key: str) -> tuple:
+        st = self._source_stat(key)
+        img = cv2_loader(key, flag=self.flag, apply_icc=self.apply_icc)
+        return key, st, np.ascontiguousarray(img)
+
+    def add(self, filepaths: Iterable[Union[str, Path]], num_workers: int = None) -> int:
+        """Decode and store the given images, skipping entries that are fresh.
+
+        Args:
+            filepaths (Iterable[Union[str, Path]]): The image files to store.
+            num_workers (int): Number of decoding threads. At most twice as many
+                images are decoded ahead of the writer. Defaults to os.cpu_count().
+
+        Returns:
+            int: The number of images decoded and written.
+
+        Raises:
+            Exception: The error of an image that fails to decode. The store is
+                left as it was before the call.
+        """
+        keys = list(dict.fromkeys(self._key(p) for p in filepaths))
+        num_workers = num_workers or os.cpu_count() or 1
+
+        with self._locked():
+            # another process may have stored some of them while we waited
+            keys = [k for k in keys if not self._is_fresh(k, self._index.get(k))]
+            if not keys:
+                return 0
+
+            written = 0
+            previous_index = dict(self._index)
+            with open(self.data_path, "r+b") as f, ThreadPoolExecutor(
+                max_workers=num_workers
+            ) as executor:
+                start = end = f.seek(0, os.SEEK_END)
+                # executor.map would submit every key at once and let decoded
+                # images pile up while the writer catches up
+                pending = iter(keys)
+                in_flight = deque(
+                    executor.submit(self._decode, key)
+                    for key in islice(pending, 2 * num_workers)
+                )
+                try:
+                    while in_flight:
+                        key, st, img = in_flight.popleft().result()
+                        next_key = next(pending, None)
+                        if next_key is not None:
+                            in_flight.append(executor.submit(self._decode, next_key))
+                        offset = -(-end // self.ALIGNMENT) * self.ALIGNMENT
+                        f.seek(offset)
+                        f.write(img.data)
+                        end = offset + img.nbytes
+
+                        self._index[key] = {
+                            "offset": offset,
+                            "shape": list(img.shape),
+                            "dtype": img.dtype.str,
+                            "size": st.st_size,
+                            "mtime_ns": st.st_mtime_ns,
+                        }
+                        written += 1
+                except BaseException:
+                    # nothing past the published index refers to the appended bytes
+                    f.truncate(start)
+                    self._index = previous_index
+                    for future in in_flight:
+                        future.cancel()
+                    raise
+
+            self._write_index()
+
+        logger.info(f"Stored {written} images in {self.store_dir}")
+        return written
+
+    def build(
+        self,
+        image_dir: Union[str, Path],
+        recursive: bool = True,
+        num_workers: int = None,
+    ) -> int:
+        """Store every image under a directory.
+
+        Args:
+            image_dir (Union[str, Path]): The directory to scan.
+            recursive (bool): Whether to descend into subdirectories.
+                Defaults to True.
+            num_workers (int): Number of decoding threads.
+
+        Returns:
+            int: The number of images decoded and written.
+        """
+        pattern = "**/*" if recursive else "*"
+        filepaths = [
+            p for p in Path(image_dir).glob(pattern)
+            if p.is_file() and valid_file_ext(p, VALID_EXTENSIONS)
+        ]
+        return self.add(filepaths, num_workers=num_workers)
+
+    def compact(self) -> None:
+        """Rewrite the data file without entries superseded by refreshes.
+
+        The entries are copied to the next data file generation, which is
+        published together with the index; the old data file is then removed.
+        Readers that still map it keep a valid view until they reload the index.
+        """
+        with self._locked():
+            old_path = self.data_path
+            new_path = self.store_dir / self.DATA_FILE.format(generation=self._generation + 1)
+            data = self._mmap(force=True)
+            index = {}
+            with open(new_path, "wb") as f:
+                end = 0
+                for key, entry in self._index.items():
+                    nbytes = int(np.prod(entry["shape"])) * np.dtype(entry["dtype"]).itemsize
+                    offset = -(-end // self.ALIGNMENT) * self.ALIGNMENT
+                    f.seek(offset)
+                    f.write(data[entry["offset"]:entry["offset"] + nbytes].data)
+                    index[key] = {**entry, "offset": offset}
+                    end = offset + nbytes
+
+            self._index = index
+            self._generation += 1
+            self._data = None
+            self._write_index()
+            old_path.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------- read
+    def _mmap(self, force: bool = False) -> np.memmap:
+        """Return the data file mapping, remapping it if the file has grown.
+
+        Raises:
+            FileNotFoundError: If another process compacted the store since the
+                index was loaded.
+        """
+        st = self.data_path.stat()
+        stale = (
+            self._data is None
+            or self._data_generation != self._generation
+            or self._data.size < st.st_size
+        )
+        if force or stale:
+            self._data = (
+                np.memmap(self.data_path, dtype=np.uint8, mode="r")
+                if st.st_size else np.empty(0, dtype=np.uint8)
+            )
+            self._data_generation = self._generation
+        return self._data
+
+    def get(self, filepath: Union[str, Path]) -> np.ndarray:
+        """Return the decoded image as a read-only, zero-copy view.
+
+        Missing or stale entries are decoded and stored first.
+
+        Args:
+            filepath (Union[str, Path]): The source image path.
+
+        Returns:
+            np.ndarray: The image as stored by ``cv2_loader``.
+        """
+        key = self._key(filepath)
+        entry = self._index.get(key)
+        if entry is None:
+            self._load_index()
+            entry = self._index.get(key)
+
+        if not self._is_fresh(key, entry):
+            self.add([key])
+            entry = self._index[key]
+
+        try:
+            data = self._mmap()
+        except FileNotFoundError:
+            # compacted by another process, the new index points to the new data file
+            self._load_index()
+            entry = self._index[key]
+            data = self._mmap()
+
+        dtype = np.dtype(entry["dtype"])
+        nbytes = int(np.prod(entry["shape"])) * dtype.itemsize
+        offset = entry["offset"]
+        return data[offset:offset + nbytes].view(dtype).reshape(entry["shape"])
+
+    def __getitem__(self, filepath: Union[str, Path]) -> np.ndarray:
+        return self.get(filepath)
+
+    def __contains__(self, filepath: Union[str, Path]) -> bool:
+        self._load_index()
+        return self._key(filepath) in self._index
+
+    def __len__(self) -> int:
+        self._load_index()
+        return len(self._index)
+
+    def keys(self) -> list:
+        """Return the stored source paths."""
+        self._load_index()
+        return list(self._index)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Batch preprocessing of images into a preallocated float buffer.
+
+The usual loop after ``cv2_loader`` (resize, convert color, cast, normalize,
+``np.stack``) allocates a new array at every step. ``BatchPreprocessor``
+instead decodes each image, resizes it into a per-thread scratch buffer with
+``cv2.resize(..., dst=)`` and writes ``(x * scale - mean) / std`` straight into
+its slot of a reusable NHWC or NCHW float32 batch buffer with in-place NumPy
+ufuncs. The BGR to RGB conversion is a reversed-channel view folded into that
+same write, so it costs nothing.
+
+Batches are filled by a thread pool (OpenCV decoding and resizing release the
+GIL) while the previous batch is being consumed, using two alternating
+buffers.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from profiling.hooks import count
+from profiling.hooks import span
+
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD  = (0.229, 0.224, 0.225)
+
+
+class BatchPreprocessor:
+    """Decode, resize and normalize images into fixed-size float32 batches.
+
+    Each yielded batch is a view of one of two internal buffers. Asking for the
+    next batch immediately starts filling the buffer of the batch before it, so
+    copy a batch (or move it to the device) before requesting the next one if it
+    has to be kept.
+
+    Args:
+        size (tuple): Output (height, width).
+        batch_size (int): Number of images per batch. Defaults to 32.
+        channels_first (bool): Whether batches are NCHW instead of NHWC. Defaults to False.
+        to_rgb (bool): Whether to output RGB instead of OpenCV's BGR order. Defaults to True.
+        grayscale (bool): Whether to decode as a single channel. Defaults to False.
+        mean (Sequence[float]): Per-channel mean in [0, 1] units. Defaults to 0.
+        std (Sequence[float]): Per-channel standard deviation in [0, 1] units. Defaults to 1.
+        interpolation (int): cv2 interpolation flag. Defaults to cv2.INTER_AREA.
+        num_workers (int): Number of decoding threads. Defaults to os.cpu_count().
+        drop_last (bool): Whether to drop the last, incomplete batch. Defaults to False.
+        skip_errors (bool): Whether unreadable images are zero-filled and logged
+            instead of raising. Their path is reported as None. Defaults to False.
+
+    Examples:
+        >>> preprocessor = BatchPreprocessor((224, 224), batch_size=64, channels_first=True,
+        ...                                  mean=IMAGENET_MEAN, std=IMAGENET_STD)
+        >>> for batch, paths in preprocessor.iter_batches(image_files):
+        ...     logits = model(torch.from_numpy(batch))
+    """
+
+    def __init__(
+        self,
+        size: Tuple[int, int],
+        batch_size: int = 32,
+        channels_first: bool = False,
+        to_rgb: bool = True,
+        grayscale: bool = False,
+        mean: Optional[Sequence[float]] = None,
+        std: Optional[Sequence[float]] = None,
+        interpolation: int = cv2.INTER_AREA,
+        num_workers: Optional[int] = None,
+        drop_last: bool = False,
+        skip_errors: bool = False,
+    ):
+        self.height, self.width = size
+        self.batch_size = batch_size
+        self.channels_first = channels_first
+        self.to_rgb = to_rgb and not grayscale
+        self.grayscale = grayscale
+        self.interpolation = interpolation
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.drop_last = drop_last
+        self.skip_errors = skip_errors
+        self.channels = 1 if grayscale else 3
+
+        # (x / 255 - mean) / std == x * scale - offset
+        mean = np.broadcast_to(np.asarray(mean if mean is not None else 0.0, np.float32), (self.channels,))
+        std = np.broadcast_to(np.asarray(std if std is not None else 1.0, np.float32), (self.channels,))
+        self._scale = (1.0 / (255.0 * std)).astype(np.float32)
+        self._offset = (mean / std).astype(np.float32)
+        if channels_first:
+            self._scale = self._scale[:, None, None]
+            self._offset = self._offset[:, None, None]
+
+        shape = ((batch_size, self.channels, self.height, self.width) if channels_first
+                 else (batch_size, self.height, self.width, self.channels))
+        self._buffers = [np.empty(shape, np.float32) for _ in range(2)]
+        self._local = threading.local()
+
+    def _scratch(self) -> np.ndarray:
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            shape = (self.height, self.width) if self.grayscale else (self.height, self.width, 3)
+            scratch = self._local.scratch = np.empty(shape, np.uint8)
+        return scratch
+
+    def preprocess_into(self, image: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Resize and normalize one decoded uint8 image into ``out`` without temporaries.
+
+        Args:
+            image (np.ndarray): Decoded image, HxW (grayscale) or HxWx3 (BGR).
+            out (np.ndarray): Float32 slot of shape (H, W, C) or (C, H, W).
+
+        Returns:
+            np.ndarray: ``out``.
+        """
+        if image.shape[:2] != (self.height, self.width):
+            image = cv2.resize(image, (self.width, self.height), dst=self._scratch(),
+                               interpolation=self.interpolation)
+        if self.grayscale:
+            image = image[..., None]
+        elif self.to_rgb:
+            image = image[..., ::-1]
+        if self.channels_first:
+            image = image.transpose(2, 0, 1)
+
+        np.multiply(image, self._scale, out=out)
+        np.subtract(out, self._offset, out=out)
+        return out
+
+    def _load_into(self, filepath: Union[str, Path], out: np.ndarray) -> bool:
+        flag = cv2.IMREAD_GRAYSCALE if self.grayscale else cv2.IMREAD_COLOR
+        try:
+            image = cv2.imread(str(filepath), flag)
+            if image is None:
+                raise FileNotFoundError(f"Image file not found or unreadable: {filepath}")
+            self.preprocess_into(image, out)
+            return True
+        except Exception as e:
+            if not self.skip_errors:
+                raise
+            logger.warning(f"Skipping image {filepath}: {e}")
+            out.fill(0)
+            count("batching.errors")
+            return False
+
+    def _submit(self, executor: ThreadPoolExecutor, buffer: np.ndarray, paths: List) -> list:
+        return [executor.submit(self._load_into, path, buffer[i]) for i, path in enumerate(paths)]
+
+    def _collect(self, futures: list, paths: List) -> List[Optional[Union[str, Path]]]:
+        with span("batching.batch", images=len(paths)):
+            ok = [future.result() for future in futures]
+        return [path if valid else None for path, valid in zip(paths, ok)]
+
+    def iter_batches(
+        self,
+        filepaths: Sequence[Union[str, Path]],
+    ) -> Iterator[Tuple[np.ndarray, List[Optional[Union[str, Path]]]]]:
+        """Yield preprocessed batches of the given images, in order.
+
+        Args:
+            filepaths (Sequence): Image files to load.
+
+        Yields:
+            tuple: (batch, paths) where batch is a float32 array of batch_size images
+            (fewer for the last batch unless drop_last) and paths are the matching files.
+        """
+        filepaths = list(filepaths)
+        stop = len(filepaths)
+        if self.drop_last:
+            stop -= stop % self.batch_size
+        chunks = [filepaths[i:i + self.batch_size] for i in range(0, stop, self.batch_size)]
+        if not chunks:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            pending = self._submit(executor, self._buffers[0], chunks[0])
+            for k, chunk in enumerate(chunks):
+                paths = self._collect(pending, chunk)
+                # fill the other buffer while the caller consumes this one
+                if k + 1 < len(chunks):
+                    pending = self._submit(executor, self._buffers[(k + 1) % 2], chunks[k + 1])
+                yield self._buffers[k % 2][:len(chunk)], paths
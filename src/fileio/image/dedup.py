@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Exact and near-duplicate detection for image datasets.
+
+Each image gets a content hash of its bytes and 64-bit perceptual hashes
+(aHash, dHash, pHash) computed from a reduced-resolution grayscale decode;
+JPEGs are decoded directly at 1/8 scale by libjpeg. Perceptual hashes go into
+a BK-tree, so the neighbours of a hash within a Hamming radius are found
+without comparing against every image. Exact duplicates are grouped with a
+union-find; near duplicates join the cluster of a representative they are
+within the Hamming radius of, so clusters do not chain unrelated images
+together. ``dedup`` keeps one representative per cluster, e.g. before sending
+images through ``QueryLLM.encode_image``.
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+
+import cv2
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from fileio.dataframe.readers import df_loader
+from fileio.dataframe.writers import save_df_to_file
+from fileio.image.readers import cv2_loader
+
+
+HASH_NAMES = ("ahash", "dhash", "phash")
+
+
+def content_hash(filepath: Union[str, Path]) -> str:
+    """Return the blake2b digest of a file's bytes."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def ahash(gray: np.ndarray) -> int:
+    """Average hash: 8x8 thumbnail thresholded at its mean."""
+    small = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+    return _bits_to_int(small > small.mean())
+
+
+def dhash(gray: np.ndarray) -> int:
+    """Difference hash: sign of horizontal gradients of a 9x8 thumbnail."""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+
+def phash(gray: np.ndarray) -> int:
+    """Perceptual hash: low-frequency 8x8 DCT block thresholded at its median."""
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def image_hashes(filepath: Union[str, Path]) -> dict:
+    """Compute the content and perceptual hashes of one image.
+
+    Args:
+        filepath (Union[str, Path]): The path to the image file.
+
+    Returns:
+        dict: path, size, mtime_ns, sha and the perceptual hashes as ints.
+    """
+    st = os.stat(filepath)
+    gray = cv2_loader(filepath, flag=cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    return {
+        "path": str(filepath),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha": content_hash(filepath),
+        "ahash": ahash(gray),
+        "dhash": dhash(gray),
+        "phash": phash(gray),
+    }
+
+
+class BKTree:
+    """BK-tree over 64-bit hashes with Hamming distance.
+
+    Examples:
+        >>> tree = BKTree()
+        >>> tree.add(0b1011, "a.png")
+        >>> tree.search(0b1001, 1)
+        [(1, 'a.png')]
+    """
+
+    def __init__(self):
+        # node: [hash, items, {distance: child}]
+        self._root = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item) -> None:
+        """Insert an item under its hash."""
+        self._size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+
+        node = self._root
+        while True:
+            distance = (node[0] ^ value).bit_count()
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> list:
+        """Return (distance, item) pairs within radius of value."""
+        if self._root is None:
+            return []
+
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = (node[0] ^ value).bit_count()
+            if distance <= radius:
+                found.extend((distance, item) for item in node[1])
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+class DuplicateIndex:
+    """Hash index of an image collection with duplicate clustering.
+
+    Args:
+        hash_name (str): The perceptual hash used for near-duplicate search,
+            one of "ahash", "dhash" or "phash". Defaults to "phash".
+
+    Examples:
+        >>> index = DuplicateIndex()
+        >>> index.add(Path("data/images").glob("*.jpg"))
+        >>> report = index.report(max_distance=6)
+        >>> unique_paths = index.dedup(paths, max_distance=6)
+    """
+
+    def __init__(self, hash_name: str = "phash"):
+        if hash_name not in HASH_NAMES:
+            raise ValueError(f"Invalid hash: {hash_name}. Must be one of {HASH_NAMES}")
+        self.hash_name = hash_name
+        self.records: Dict[str, dict] = {}
+        self._tree: Optional[BKTree] = None
+
+    @staticmethod
+    def _key(filepath: Union[str, Path]) -> str:
+        return str(Path(filepath).resolve())
+
+    def add(self, filepaths: Iterable[Union[str, Path]], num_workers: int = None) -> int:
+        """Hash images in parallel, skipping unchanged files already indexed.
+
+        Paths are resolved, so a file reached through two paths is indexed once.
+        Indexed files that no longer exist are dropped from the index.
+
+        Returns:
+            int: The number of images hashed.
+        """
+        todo = []
+        for key in dict.fromkeys(self._key(p) for p in filepaths):
+            record = self.records.get(key)
+            if record is not None:
+                try:
+                    st = os.stat(key)
+                except FileNotFoundError:
+                    logger.warning(f"Dropping deleted image {key}")
+                    del self.records[key]
+                    continue
+                if (st.st_size, st.st_mtime_ns) == (record["size"], record["mtime_ns"]):
+                    continue
+            todo.append(key)
+
+        hashed = 0
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            for key, future in [(k, executor.submit(image_hashes, k)) for k in todo]:
+                try:
+                    self.records[key] = future.result()
+                    hashed += 1
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable image {key}: {e}")
+
+        self._tree = None
+        return hashed
+
+    def _build_tree(self) -> BKTree:
+        if self._tree is None:
+            self._tree = BKTree()
+            for path, record in self.records.items():
+                self._tree.add(record[self.hash_name], path)
+        return self._tree
+
+    def near(self, filepath: Union[str, Path], max_distance: int = 6) -> list:
+        """Return (distance, path) of indexed images near an image, indexed or not."""
+        record = self.records.get(self._key(filepath)) or image_hashes(filepath)
+        return sorted(self._build_tree().search(record[self.hash_name], max_distance))
+
+    def clusters(self, max_distance: int = 6) -> List[List[str]]:
+        """Group indexed images into clusters of exact or near duplicates.
+
+        Paths are visited in sorted order; a path not yet clustered becomes the
+        representative of a new cluster, which takes every unclustered image
+        within max_distance of it. Near-duplicate clusters are therefore not
+        transitive: every member is close to the representative, and an image
+        close only to another member is left for a later cluster.
+
+        Args:
+            max_distance (int): Maximum Hamming distance between perceptual
+                hashes of near duplicates; 0 keeps only identical hashes.
+                Defaults to 6.
+
+        Returns:
+            List[List[str]]: Clusters of two or more paths, each sorted.
+        """
+        parent = {path: path for path in self.records}
+
+        def find(path: str) -> str:
+            while parent[path] != path:
+                parent[path] = parent[parent[path]]
+                path = parent[path]
+            return path
+
+        def union(a: str, b: str) -> None:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        # exact duplicates are one image, whichever path is used
+        by_sha = {}
+        for path, record in self.records.items():
+            union(path, by_sha.setdefault(record["sha"], path))
+
+        # near duplicates: each exact-duplicate group joins at most one representative
+        tree = self._build_tree()
+        representative = {}
+        for path in sorted(self.records):
+            root = find(path)
+            if root in representative:
+                continue
+            representative[root] = root
+            for _, other in tree.search(self.records[path][self.hash_name], max_distance):
+                representative.setdefault(find(other), root)
+
+        groups = {}
+        for path in self.records:
+            groups.setdefault(representative[find(path)], []).append(path)
+        return sorted(sorted(g) for g in groups.values() if len(g) > 1)
+
+    def report(self, max_distance: int = 6) -> pd.DataFrame:
+        """Return one row per image with its hashes and duplicate cluster.
+
+        Images without duplicates have cluster_id -1; the first path of each
+        cluster is its representative.
+        """
+        cluster_of = {}
+        for cluster_id, cluster in enumerate(self.clusters(max_distance)):
+            for rank, path in enumerate(cluster):
+                cluster_of[path] = (cluster_id, rank == 0)
+
+        df = pd.DataFrame(list(self.records.values()))
+        if df.empty:
+            return df
+        df["cluster_id"] = [cluster_of.get(p, (-1, True))[0] for p in df["path"]]
+        df["is_representative"] = [cluster_of.get(p, (-1, True))[1] for p in df["path"]]
+        return df.sort_values(["cluster_id", "path"], ignore_index=True)
+
+    def dedup(
+        self, filepaths: Iterable[Union[str, Path]], max_distance: int = 6
+    ) -> List[str]:
+        """Filter paths down to one representative per duplicate cluster.
+
+        Paths not yet indexed are hashed first. Order of the input is kept, and
+        the kept paths are returned as given.
+        """
+        filepaths = [str(p) for p in filepaths]
+        keys = [self._key(p) for p in filepaths]
+        self.add(keys)
+
+        wanted = set(keys)
+        duplicates = set()
+        for cluster in self.clusters(max_distance):
+            members = [p for p in cluster if p in wanted]
+            duplicates.update(members[1:])
+
+        kept, seen = [], set()
+        for path, key in zip(filepaths, keys):
+            if key not in duplicates and key not in seen:
+                kept.append(path)
+                seen.add(key)
+        return kept
+
+    def save(self, filepath: Union[str, Path]) -> None:
+        """Save the hash records to a Parquet or Feather file."""
+        df = pd.DataFrame(list(self.records.values()))
+        for name in HASH_NAMES:
+            df[name] = df[name].astype(np.uint64)
+        save_df_to_file(df, filepath)
+
+    @classmethod
+    def load(cls, filepath: Union[str, Path], hash_name: str = "phash") -> "DuplicateIndex":
+        """Load hash records saved with ``save``."""
+        index = cls(hash_name)
+        for record in df_loader(filepath).to_dict(orient="records"):
+            for name in HASH_NAMES:
+                record[name] = int(record[name])
+            index.records[record["path"]] = record
+        return index
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Parquet index of the metadata encoded in image filenames.
+
+A directory tree is walked once with ``os.scandir`` and every filename is
+matched against the chosen conventions of ``REGEX_COMPILED``. The parsed
+fields, together with the file size and mtime, are written to a typed Parquet
+table. Refreshing the index only re-parses files whose size or mtime changed,
+and selections such as "all split-train HE images at 20x" become predicate
+pushdown reads of the index instead of a filesystem walk.
+"""
+import os
+from pathlib import Path
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+
+from fileio.image.filename_regex import get_filename_pattern
+from fileio.text import SLIDE_EXTENSIONS
+from fileio.text import VALID_EXTENSIONS
+
+
+# fields stored as integers, all other parsed fields are strings
+INT_FIELDS = {"index", "x_coord", "y_coord"}
+
+BASE_SCHEMA = [
+    pa.field("path", pa.string()),
+    pa.field("filename", pa.string()),
+    pa.field("convention", pa.string()),
+    pa.field("size", pa.int64()),
+    pa.field("mtime_ns", pa.int64()),
+]
+
+
+def _to_int(field: str, value) -> Optional[int]:
+    """Coerce a filter value of an integer field, e.g. "007" from a filename."""
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Field {field} is an integer, got {value!r}") from None
+
+
+def _scan(root: str, extensions: set) -> Iterator[os.DirEntry]:
+    """Yield image files under root, depth first, using os.scandir."""
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in extensions:
+                        yield entry
+        except PermissionError as e:
+            logger.warning(f"Skipping directory: {e}")
+
+
+class FilenameIndex:
+    """Incrementally refreshed index of filename metadata.
+
+    Args:
+        index_file (Union[str, Path]): The Parquet file holding the index.
+        conventions (Union[str, List[str]]): Keys of REGEX_COMPILED to match, in
+            priority order. The first matching convention wins.
+        ignore_case (bool): Whether to match case-insensitively. Defaults to False.
+
+    Examples:
+        >>> index = FilenameIndex("images.parquet", ["filename_1", "filename_2"])
+        >>> index.refresh("data/images")
+        >>> df = index.query(stain="HE", magnification="20x")
+    """
+
+    def __init__(
+        self,
+        index_file: Union[str, Path],
+        conventions: Union[str, List[str]] = "base_repo",
+        ignore_case: bool = False,
+    ):
+        self.index_file = Path(index_file)
+        self.conventions = [conventions] if isinstance(conventions, str) else list(conventions)
+        self.patterns = {
+            name: get_filename_pattern(name, ignore_case) for name in self.conventions
+        }
+
+        fields = []
+        for pattern in self.patterns.values():
+            fields += [f for f in pattern.groupindex if f not in fields]
+        self.fields = fields
+        self.schema = pa.schema(
+            BASE_SCHEMA
+            + [pa.field(f, pa.int64() if f in INT_FIELDS else pa.string()) for f in fields]
+        )
+
+    def parse(self, filename: str) -> Dict[str, Optional[str]]:
+        """Match a filename against the conventions and return its fields."""
+        for name, pattern in self.patterns.items():
+            match = pattern.search(filename)
+            if match is not None:
+                return {"convention": name, **match.groupdict()}
+        return {"convention": None}
+
+    def _load_rows(self) -> Dict[str, dict]:
+        """Load the existing index keyed by path, if it matches the schema."""
+        if not self.index_file.is_file():
+            return {}
+        table = pq.read_table(self.index_file)
+        if table.schema.remove_metadata() != self.schema:
+            logger.info(f"Conventions changed, rebuilding index: {self.index_file}")
+            return {}
+        return {row["path"]: row for row in table.to_pylist()}
+
+    def refresh(
+        self,
+        root: Union[str, Path],
+        extensions: Optional[List[str]] = None,
+    ) -> pa.Table:
+        """Walk a directory tree and update the index.
+
+        Files whose size and mtime are unchanged reuse their indexed row; new or
+        modified files are parsed; deleted files are dropped.
+
+        Args:
+            root (Union[str, Path]): The directory to index.
+            extensions (Optional[List[str]]): File extensions to include.
+                Defaults to VALID_EXTENSIONS and SLIDE_EXTENSIONS, so
+                whole-slide images such as .svs files are indexed too.
+
+        Returns:
+            pa.Table: The refreshed index.
+        """
+        extensions = {e.lower() for e in (extensions or VALID_EXTENSIONS + SLIDE_EXTENSIONS)}
+        old_rows = self._load_rows()
+        rows = []
+        parsed = 0
+
+        for entry in _scan(os.path.abspath(root), extensions):
+            st = entry.stat()
+            row = old_rows.get(entry.path)
+            if row is None or row["size"] != st.st_size or row["mtime_ns"] != st.st_mtime_ns:
+                row = {
+                    "path": entry.path,
+                    "filename": entry.name,
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    **self.parse(entry.name),
+                }
+                for field in INT_FIELDS.intersection(row):
+                    row[field] = int(row[field]) if row[field] is not None else None
+                parsed += 1
+            rows.append(row)
+
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".tmp")
+        pq.write_table(table, tmp_file)
+        os.replace(tmp_file, self.index_file)
+
+        logger.info(f"Indexed {len(rows)} files ({parsed} parsed) under {root}")
+        return table
+
+    def query(self, columns: Optional[List[str]] = None, **filters) -> pd.DataFrame:
+        """Select indexed files by field values.
+
+        Each filter is an equality test, or a membership test when given a list,
+        set or tuple. Filters are pushed down to the Parquet reader. Values of
+        integer fields, such as INT_FIELDS and size, may be given as strings, as
+        they appear in filenames.
+
+        Args:
+            columns (Optional[List[str]]): The columns to return. Defaults to all.
+            **filters: Field names and the values to select.
+
+        Returns:
+            pd.DataFrame: The matching rows.
+
+        Raises:
+            ValueError: If a field is not in the index, or a value of an integer
+                field is not a number.
+
+        Examples:
+            >>> index.query(split="train", stain="HE", magnification="20x")
+        """
+        unknown = set(filters) - set(self.schema.names)
+        if unknown:
+            raise ValueError(f"Unknown index fields: {sorted(unknown)}")
+
+        predicates = []
+        for k, v in filters.items():
+            is_int = pa.types.is_integer(self.schema.field(k).type)
+            if isinstance(v, (list, set, tuple)):
+                predicates.append((k, "in", [_to_int(k, x) if is_int else x for x in v]))
+            else:
+                predicates.append((k, "=", _to_int(k, v) if is_int else v))
+        table = pq.read_table(
+            self.index_file, columns=columns, filters=predicates or None
+        )
+        return table.to_pandas()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""filename_regex.py in src/base_repo/fileio/image.
+
+Filename conventions used to parse image metadata from file names.
+"""
+# flake8: noqa: B950
+import re
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+# regex patterns for filename parsing
+REGEX_PATTERNS = {
+    "base_repo": {
+        "fileparts": r"(?P<index>\d+)_(?P<uuid>[a-f0-9]{8})_(?P<patient_id>[a-zA-Z0-9\-]+)_split-(?P<split>[a-z]+)_(?P<label_name>[a-z0-9\-]+)\.(?P<ext>png|jpg|jpeg|gif|bmp|tiff|tif)",
+        "misc_info": r"",
+    },
+    "filename_1": {
+        "fileparts": r"(?P<prefix>(?P<id>[a-f0-9]{16})_part-(?P<block>[A-Z]\d{1,2}(-\d)?)_((?P<stain>HE|IPOX)-(?P<antibody>[A-Za-z0-9]+))_(?P<scan_id>\d{5,6}))(?P<suffix>_(?P<registration>fixed|moving)_x(?P<x_coord>\d+)_(x|y)(?P<y_coord>\d+))?\.(png|jpg|svs)",  # noqa E501
+        "misc_info": r"",
+    },
+    "filename_2": {
+        "fileparts": r"^(?P<prefix>(?P<id>[A-Z]{2,3}-\d{2}-\d{5,6})_(part-(?P<part>[A-Z]\d*))?)(_(?P<misc_info>[a-zA-Z0-9-]+(?:_[a-zA-Z0-9-]+)*))?_(?P<suffix>(?P<magnification>\d+x)_(?P<image_num>\d{3})?\.(?P<ext>jpg|png|svs)$)",  # noqa E501
+        "misc_info": r"",
+    },
+    "filename_3": {
+        "fileparts": r"^(?P<prefix>(?P<id>[a-f0-9]{16})_(part-(?P<part>[A-Z]\d*))?)(_(?P<misc_info>[a-zA-Z0-9-]+(?:_[a-zA-Z0-9-]+)*))?_(?P<suffix>(?P<magnification>\d+x)_(?P<image_num>\d{3})?\.(?P<ext>jpg|png|svs)$)",  # noqa E501
+        "misc_info": r"(?P<misc_info>[a-zA-Z0-9-]+(?:_[a-zA-Z0-9-]+)*)",
+    },
+    # "misc_info": r"(?P<stain>HE|EVG|ki67)|(?P<mitosis>mitosis|mitoses)|(?P<who_grade>who-\d|who\d(?:-\d)?)",
+    # "pending": r"pending|PEND",
+}
+
+# compile nested dictionary of regex patterns
+REGEX_COMPILED = {
+    key: {k: re.compile(v) for k, v in value.items()}
+    for key, value in REGEX_PATTERNS.items()
+}
+
+
+def get_filename_pattern(
+    filename_regex: Union[str, re.Pattern], ignore_case: bool = False
+) -> re.Pattern:
+    """Resolve a convention name or a pattern to a compiled regex.
+
+    Args:
+        filename_regex (Union[str, re.Pattern]): A key of REGEX_COMPILED, a regex string or a compiled pattern.
+        ignore_case (bool): Whether to match case-insensitively. Defaults to False.
+
+    Returns:
+        re.Pattern: The compiled "fileparts" pattern of the convention or the given pattern.
+    """
+    if isinstance(filename_regex, str) and filename_regex in REGEX_COMPILED:
+        pattern = REGEX_COMPILED[filename_regex]["fileparts"]
+    elif isinstance(filename_regex, re.Pattern):
+        pattern = filename_regex
+    else:
+        pattern = re.compile(filename_regex)
+
+    if ignore_case and not pattern.flags & re.IGNORECASE:
+        pattern = re.compile(pattern.pattern, pattern.flags | re.IGNORECASE)
+
+    return pattern
+
+
+def parse_filename(
+    filename: str,
+    filename_regex: Union[str, re.Pattern],
+    ignore_case: bool = False,
+) -> Optional[Dict[str, Optional[str]]]:
+    """Parse the fields of a filename with a convention or regex.
+
+    Named groups are returned by name, unnamed groups by their position.
+
+    Args:
+        filename (str): The file name to parse (not the full path).
+        filename_regex (Union[str, re.Pattern]): A key of REGEX_COMPILED, a regex string or a compiled pattern.
+        ignore_case (bool): Whether to match case-insensitively. Defaults to False.
+
+    Returns:
+        Optional[Dict[str, Optional[str]]]: The parsed fields, or None if the filename does not match.
+
+    Examples:
+        >>> parse_filename("7_0a1b2c3d_P-01_split-train_tumor.png", "base_repo")["split"]
+        'train'
+    """
+    match = get_filename_pattern(filename_regex, ignore_case).search(filename)
+    if match is None:
+        return None
+
+    fields = match.groupdict()
+    if not fields:
+        fields = {str(i): part for i, part in enumerate(match.groups())}
+
+    return fields
@@ -6,29 +6,40 @@ way. It ensures that images are loaded efficiently and supports different color
 spaces. It also includes error handling to manage exceptions gracefully.
 """
 from pathlib import Path
+from typing import Optional
 from typing import Union
 
-import cv2
 import numpy as np
-import PIL.ImageFile
 from loguru import logger
-from PIL.PngImagePlugin import PngInfo  # noqa: F401
 
+from fileio.image import import_cv2
+from fileio.image import import_pil
 from fileio.text import is_empty_file
-from processing.image.color_icc import build_apply_icc
+from profiling.hooks import traced
 
 
-# PIL settings
-PIL.ImageFile.LOAD_TRUNCATED_IMAGES = False
-PIL.PngImagePlugin.MAX_TEXT_CHUNK   = 2048 * 2048
+def __getattr__(name: str):
+    # PngInfo used to be re-exported from here, keep it importable without loading PIL eagerly
+    if name == "PngInfo":
+        import_pil()
+        from PIL.PngImagePlugin import PngInfo
 
+        return PngInfo
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-cv2.setUseOptimized(True)
 
+def _apply_icc(img: np.ndarray, icc_bytes: bytes, channel_order: str) -> None:
+    # the ICC module needs PIL, only load it when a profile is applied
+    import_pil()
+    from processing.image.color_icc import apply_icc_inplace
 
+    apply_icc_inplace(img, icc_bytes, channel_order)
+
+
+@traced(bytes_in="filepath")
 def cv2_loader(
     filepath: Union[str, Path],
-    flag: int = cv2.IMREAD_UNCHANGED,
+    flag: Optional[int] = None,
     apply_icc: bool = False,
 ) -> np.array:
     """Load an image from the specified path using OpenCV.
@@ -48,17 +59,31 @@ def cv2_loader(
     if is_empty_file(filepath):
         raise FileNotFoundError(f"Image file is empty: {filepath}")
 
+    cv2 = import_cv2()
+    if flag is None:
+        flag = cv2.IMREAD_UNCHANGED
+
     try:
         img = cv2.imread(str(filepath), flag)
         if img is None:
             raise FileNotFoundError(f"Image file not found at {filepath}.")
 
-        if flag == cv2.IMREAD_COLOR or (len(img.shape) == 3 and img.shape[2] == 3):
+        is_rgb = flag == cv2.IMREAD_COLOR or (len(img.shape) == 3 and img.shape[2] == 3)
+        if is_rgb:
             img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
         if apply_icc:
-            # read image with PIL
-            img = pil_loader(filepath, apply_icc=apply_icc)
+            # apply the cached ICC transform to the decoded buffer in place
+            import_pil()
+            from processing.image.color_icc import read_icc_profile
+
+            icc_bytes = read_icc_profile(filepath)
+            if icc_bytes is None:
+                logger.warning(f"No ICC profile found for image: {filepath}")
+            elif img.ndim == 3 and img.dtype == np.uint8:
+                _apply_icc(img, icc_bytes, "RGB" if is_rgb else "BGR")
+            else:
+                logger.warning(f"Skipping ICC profile for {img.dtype} image: {filepath}")
 
         return img
     except Exception as e:
@@ -66,11 +91,14 @@ def cv2_loader(
         raise e
 
 
+@traced(bytes_in="filepath")
 def pil_loader(filepath: Union[str, Path], apply_icc: bool = False) -> np.array:
     """Load an image from the specified path using PIL.
 
     Args:
         path (str): The path to the image file.
+        apply_icc (bool): Whether to convert the image from its embedded ICC
+        profile to sRGB. Defaults to False.
 
     Returns:
         np.ndarray: The loaded image as a NumPy array.
@@ -80,16 +108,21 @@ def pil_loader(filepath: Union[str, Path], apply_icc: bool = False) -> np.array:
         Exception: If there is an error during the loading process.
     """
     try:
-        img = PIL.Image.open(filepath)
-
-        if apply_icc and img.info.get("icc_profile"):
-            # read and apply ICC profile to image
-            icc_bytes = img.info.get("icc_profile")
-            img = build_apply_icc(icc_bytes, img=np.array(img))
-        elif apply_icc and img.info.get("icc_profile") is None:
+        img = import_pil().open(filepath)
+
+        icc_bytes = img.info.get("icc_profile")
+        img = np.array(img)
+
+        if apply_icc and icc_bytes:
+            # apply the cached ICC transform to the decoded buffer in place
+            if img.ndim == 3 and img.dtype == np.uint8:
+                _apply_icc(img, icc_bytes, "RGB")
+            else:
+                logger.warning(f"Skipping ICC profile for {img.dtype} image: {filepath}")
+        elif apply_icc:
             logger.warning(f"No ICC profile found for image: {filepath}")
 
-        return np.array(img)
+        return img
     except FileNotFoundError as e:
         logger.error(f"Image file not found at {filepath}.")
         raise e
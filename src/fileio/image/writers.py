@@ -1,50 +1,31 @@
 #!/usr/bin/env python3
 """writers.py in src/base_repo/fileio/image."""
 # flake8: noqa: B950
-import re
+from __future__ import annotations
+
+import os
+import queue
+import struct
+import threading
+import zlib
 from pathlib import Path
 from typing import Optional
+from typing import TYPE_CHECKING
 from typing import Union
 
-import cv2
+import numpy as np
 from loguru import logger
-from PIL.PngImagePlugin import PngInfo
-
-from base_repo.processing import timestamp
-
-
-cv2.setUseOptimized(True)
-
-re_fields = re.compile(r"<(.*?)>")
-re_groups = re.compile(r"\((.*?)\)")
-
-# regex patterns for filename parsing
-REGEX_COMPILED = {
-    "base_repo": {
-        "fileparts": r"(?P<index>\d+)_(?P<uuid>[a-f0-9]{8})_(?P<patient_id>[a-zA-Z0-9\-]+)_split-(?P<split>[a-z]+)_(?P<label_name>[a-z0-9\-]+)\.(?P<ext>png|jpg|jpeg|gif|bmp|tiff|tif)",
-        "misc_info": r"",
-    },
-    "filename_1": {
-        "fileparts": r"(?P<prefix>(?P<id>[a-f0-9]{16})_part-(?P<block>[A-Z]\d{1,2}(-\d)?)_((?P<stain>HE|IPOX)-(?P<antibody>[A-Za-z0-9]+))_(?P<scan_id>\d{5,6}))(?P<suffix>_(?P<registration>fixed|moving)_x(?P<x_coord>\d+)_(x|y)(?P<y_coord>\d+))?\.(png|jpg|svs)",  # noqa E501
-        "misc_info": r"",
-    },
-    "filename_2": {
-        "fileparts": r"^(?P<prefix>(?P<id>[A-Z]{2,3}-\d{2}-\d{5,6})_(part-(?P<part>[A-Z]\d*))?)(_(?P<misc_info>[a-zA-Z0-9-]+(?:_[a-zA-Z0-9-]+)*))?_(?P<suffix>(?P<magnification>\d+x)_(?P<image_num>\d{3})?\.(?P<ext>jpg|png|svs)$)",  # noqa E501
-        "misc_info": r"",
-    },
-    "filename_3": {
-        "fileparts": r"^(?P<prefix>(?P<id>[a-f0-9]{16})_(part-(?P<part>[A-Z]\d*))?)(_(?P<misc_info>[a-zA-Z0-9-]+(?:_[a-zA-Z0-9-]+)*))?_(?P<suffix>(?P<magnification>\d+x)_(?P<image_num>\d{3})?\.(?P<ext>jpg|png|svs)$)",  # noqa E501
-        "misc_info": r"(?P<misc_info>[a-zA-Z0-9-]+(?:_[a-zA-Z0-9-]+)*)",
-    },
-    # "misc_info": r"(?P<stain>HE|EVG|ki67)|(?P<mitosis>mitosis|mitoses)|(?P<who_grade>who-\d|who\d(?:-\d)?)",
-    # "pending": r"pending|PEND",
-}
-
-# compile nested dictionary of regex patterns
-REGEX_COMPILED = {
-    key: {k: re.compile(v) for k, v in value.items()}
-    for key, value in REGEX_COMPILED.items()
-}
+
+from fileio.image import import_cv2
+from fileio.image import import_pil
+from fileio.image.filename_regex import parse_filename
+from fileio.image.filename_regex import REGEX_COMPILED  # noqa: F401
+from fileio.text import atomic_write
+from processing import timestamp
+from profiling.hooks import traced
+
+if TYPE_CHECKING:
+    from PIL.PngImagePlugin import PngInfo
 
 
 def create_png_metadata(
@@ -58,9 +39,8 @@ def create_png_metadata(
     Args:
         image_file (Union[str, Path]): The path to the image file.
         data (dict): The data to be added to the PNG metadata.
-        filename_regex (Optional[str], optional): The regular expression pattern to parse the filename. Defaults to None.
+        filename_regex (Optional[str], optional): A convention name from REGEX_COMPILED or a regular expression pattern to parse the filename. Defaults to "base_repo".
         ignore_case (Optional[bool], optional): Whether to ignore case when matching the filename regex. Defaults to False.
-        compute_checksum (Optional[str], optional): Whether to compute the checksum. Defaults to "md5".
 
     Returns:
         PngInfo: The PNG metadata.
@@ -71,6 +51,9 @@ def create_png_metadata(
         >>> create_png_metadata(image_file,data)
         <PngInfo object at 0x...>
     """
+    import_pil()
+    from PIL.PngImagePlugin import PngInfo
+
     png_metadata = PngInfo()
 
     # add data to png metadata
@@ -92,27 +75,11 @@ def create_png_metadata(
         png_metadata.add_text(key, str(value))
 
     # parse filename using regex and add to png metadata
-    if filename_regex in REGEX_COMPILED:
-        filename_regex = REGEX_COMPILED[filename_regex]
-
-    if filename_regex and isinstance(filename_regex, (re.Pattern, str)):
-        # if regex has fields <> then use them to parse filename
-        if re_fields.search(filename_regex):
-            filename_parts = re.findall(
-                filename_regex, image_file, re.IGNORECASE if ignore_case else 0
-            )
-            for name, part in enumerate(filename_parts):
-                png_metadata.add_text(f"{name}", part)
-
-        elif re_groups.search(filename_regex):
-            filename_parts = re.findall(
-                filename_regex, image_file, re.IGNORECASE if ignore_case else 0
-            )
-            for name, part in enumerate(filename_parts):
-                if isinstance(part, tuple):
-                    logger.warning(f"Part: {part}")
-
-                png_metadata.add_text(f"{name}", part)
+    if filename_regex:
+        fields = parse_filename(Path(image_file).name, filename_regex, ignore_case)
+        for name, part in (fields or {}).items():
+            if part is not None:
+                png_metadata.add_text(name, part)
 
     # add updated time to png metadata
     png_metadata.add_text("Last_updated", str(timestamp()))
@@ -120,54 +87,261 @@ def create_png_metadata(
     return png_metadata
 
 
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """Serialize a single PNG chunk (length, type, data, CRC)."""
+    crc = zlib.crc32(data, zlib.crc32(chunk_type)) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+def embed_png_metadata(png_bytes: bytes, png_metadata: PngInfo) -> bytes:
+    """Insert the text chunks of a PngInfo into an encoded PNG.
+
+    OpenCV cannot write text chunks, so they are spliced in right after the
+    IHDR chunk of the buffer produced by ``cv2.imencode``.
+
+    Args:
+        png_bytes (bytes): The encoded PNG image.
+        png_metadata (PngInfo): The metadata to embed.
+
+    Returns:
+        bytes: The encoded PNG with the metadata chunks.
+    """
+    if png_metadata is None or not png_metadata.chunks:
+        return png_bytes
+
+    # 8 byte signature + IHDR (4 length + 4 type + 13 data + 4 crc)
+    ihdr_end = 8 + 4 + 4 + struct.unpack(">I", png_bytes[8:12])[0] + 4
+    chunks = b"".join(
+        _png_chunk(chunk_type, data) for chunk_type, data, *_ in png_metadata.chunks
+    )
+    return png_bytes[:ihdr_end] + chunks + png_bytes[ihdr_end:]
+
+
+def _to_bgr(image: np.ndarray, is_bgr: Optional[bool] = False) -> np.ndarray:
+    """Convert an RGB(A) image to OpenCV's BGR(A) channel order, alpha is preserved."""
+    if image.ndim != 3 or is_bgr:
+        return image
+
+    cv2 = import_cv2()
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_RGBA2BGRA)
+    elif image.shape[2] == 3:
+        return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    return image
+
+
+def encode_png(
+    image: np.ndarray,
+    png_metadata: Optional[PngInfo] = None,
+    is_bgr: Optional[bool] = False,
+    compression: int = 9,
+) -> bytes:
+    """Encode an image as PNG with at most one color conversion.
+
+    Args:
+        image (np.ndarray): The image to encode, grayscale, RGB(A) or BGR(A).
+        png_metadata (Optional[PngInfo], optional): Text metadata to embed. Defaults to None.
+        is_bgr (Optional[bool], optional): Whether the image is already in OpenCV channel order. Defaults to False.
+        compression (int, optional): zlib level from 0 (fastest) to 9 (smallest). Defaults to 9.
+
+    Returns:
+        bytes: The encoded PNG.
+
+    Raises:
+        ValueError: If the image is not CV_8U or CV_16U or the compression level is invalid.
+    """
+    if image.dtype not in (np.uint8, np.uint16):
+        raise ValueError(f"Invalid image type: {image.dtype}")
+
+    if not 0 <= compression <= 9:
+        raise ValueError(f"Invalid PNG compression level: {compression}")
+
+    cv2 = import_cv2()
+    success, buffer = cv2.imencode(
+        ".png", _to_bgr(image, is_bgr), [int(cv2.IMWRITE_PNG_COMPRESSION), compression]
+    )
+    if not success:
+        raise ValueError("Error encoding PNG image")
+
+    return embed_png_metadata(buffer.tobytes(), png_metadata)
+
+
+@traced(bytes_out="image_file")
 def cv_writer(
     image_file: Union[str, Path],
-    image: Union[str, Path],
+    image: np.ndarray,
     data: dict,
     filename_regex: Optional[str] = None,
     ignore_case: Optional[bool] = False,
     is_bgr: Optional[bool] = False,
+    compression: int = 9,
 ) -> None:
     """Write image to file with given data and optional filename parsing.
 
+    The format follows the suffix of image_file. Only PNG files can hold the
+    metadata; for other formats, such as JPEG or TIFF, it is dropped with a
+    warning. The file is written atomically.
+
     Args:
         image_file (Union[str, Path]): The path to the image file.
-        image (Union[str, Path]): The image to be written to the file.
+        image (np.ndarray): The image to be written to the file.
         data (dict): The data to be added to the PNG metadata.
         filename_regex (Optional[str], optional): The regular expression pattern to parse the filename. Defaults to None.
         ignore_case (Optional[bool], optional): Whether to ignore case when matching the filename regex. Defaults to False.
+        is_bgr (Optional[bool], optional): Whether the image is already in OpenCV channel order. Defaults to False.
+        compression (int, optional): PNG zlib level from 0 (fastest) to 9 (smallest). Defaults to 9.
 
     Returns:
         None
 
+    Raises:
+        ValueError: If OpenCV has no encoder for the suffix of image_file.
+
     Examples:
         >>> image_file = "image.png"
-        >>> image = "image.png"
+        >>> image = np.zeros((64, 64, 3), dtype=np.uint8)
         >>> data = {"key": "value"}
         >>> cv_writer(image_file, image, data)
     """
-    # create png metadata
-    png_metadata = create_png_metadata(image_file, data, filename_regex, ignore_case)
+    suffix = Path(image_file).suffix.lower()
+    if suffix == ".png":
+        png_metadata = create_png_metadata(image_file, data, filename_regex, ignore_case)
+        payload = encode_png(image, png_metadata, is_bgr=is_bgr, compression=compression)
+    else:
+        if data:
+            logger.warning(f"Metadata is only written to PNG files, dropped for {image_file}")
+        cv2 = import_cv2()
+        try:
+            success, buffer = cv2.imencode(suffix, _to_bgr(image, is_bgr))
+        except cv2.error as e:
+            raise ValueError(f"Cannot encode image as {suffix or 'no suffix'}: {image_file}") from e
+        if not success:
+            raise ValueError(f"Error encoding image: {image_file}")
+        payload = buffer.tobytes()
 
-    # check for alpha channel and convert to BGR
-    if image.shape[2] == 4:
-        conversion_flag = cv2.COLOR_BGRA2BGR if is_bgr else cv2.COLOR_BGRA2RGBA
-        image = cv2.cvtColor(image, conversion_flag)
-    elif image.shape[2] == 3:
-        image = image if is_bgr else cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    atomic_write(image_file, payload)
 
-    # check image is CV_8U or CV_16U
-    if image.dtype not in [cv2.CV_8U, cv2.CV_16U]:
-        raise ValueError(f"Invalid image type: {image.dtype}")
 
-    # convert to BGR if not already
-    if not is_bgr:
-        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+class ParallelImageWriter:
+    """Write PNG images from a bounded queue with a pool of encoder threads.
 
-    # write image to file with png metadata
-    cv2.imwrite(
-        image_file,
-        image,
-        [int(cv2.IMWRITE_PNG_COMPRESSION), 9],
-        png_metadata=png_metadata,
-    )
+    Producers hand images off with ``submit`` and return immediately while the
+    queue has room; once ``queue_size`` images are pending, ``submit`` blocks so
+    memory stays bounded. ``cv2.imencode`` releases the GIL, so the threads
+    encode in parallel.
+
+    Args:
+        num_workers (int): Number of encoder threads. Defaults to os.cpu_count().
+        queue_size (int): Maximum number of pending images. Defaults to 4 * num_workers.
+        compression (int): zlib level from 0 (fastest) to 9 (smallest). Defaults to 9.
+
+    Examples:
+        >>> with ParallelImageWriter(num_workers=8, compression=1) as writer:
+        ...     for image_file, image in images:
+        ...         writer.submit(image_file, image, {"key": "value"})
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        compression: int = 9,
+    ):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.compression = compression
+        self.written = 0
+        self.errors = []
+        self._closed = False
+
+        self._queue = queue.Queue(maxsize=queue_size or 4 * self.num_workers)
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, daemon=True)
+            for _ in range(self.num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                image_file, image, data, kwargs = item
+                cv_writer(image_file, image, data, **kwargs)
+                with self._lock:
+                    self.written += 1
+            except Exception as e:
+                logger.error(f"Failed to write image {item[0]}: {e}")
+                with self._lock:
+                    self.errors.append((item[0], e))
+            finally:
+                self._queue.task_done()
+
+    def submit(
+        self,
+        image_file: Union[str, Path],
+        image: np.ndarray,
+        data: dict,
+        filename_regex: Optional[str] = None,
+        ignore_case: Optional[bool] = False,
+        is_bgr: Optional[bool] = False,
+        compression: Optional[int] = None,
+    ) -> None:
+        """Queue an image for writing, see ``cv_writer`` for the arguments.
+
+        The image must not be modified by the caller after it is submitted.
+
+        Raises:
+            RuntimeError: If the writer is closed.
+        """
+        if self._closed:
+            raise RuntimeError("Cannot submit images to a closed ParallelImageWriter")
+        kwargs = {
+            "filename_regex": filename_regex,
+            "ignore_case": ignore_case,
+            "is_bgr": is_bgr,
+            "compression": self.compression if compression is None else compression,
+        }
+        self._queue.put((image_file, image, data, kwargs))
+
+    def join(self) -> None:
+        """Block until every submitted image has been written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write pending images and stop the encoder threads.
+
+        Closing twice is a no-op.
+
+        Raises:
+            RuntimeError: If any image failed to be written.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(self._STOP)
+        for thread in self._threads:
+            thread.join()
+
+        if self.errors:
+            raise RuntimeError(
+                f"Failed to write {len(self.errors)} images, first: {self.errors[0][0]}"
+            )
+
+    def __enter__(self) -> "ParallelImageWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # an exception is already propagating, do not replace it with a write failure
+        try:
+            self.close()
+        except RuntimeError as e:
+            logger.error(f"{e} while handling {exc_type.__name__}")
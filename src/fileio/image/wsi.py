@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""Streaming tiler for pyramidal whole-slide images (.svs, .tif).
+
+Gigapixel slides cannot be decoded into memory with ``cv2_loader``.
+``SlideReader`` opens the slide lazily with tifffile and reads only the TIFF
+tiles (or strips, for levels that are not tiled) covering a requested region,
+with ``os.pread`` so several threads can read and decode concurrently. The
+thumbnail is built band by band, so slides without a pyramid do not have to
+fit in memory either. ``tile_slide`` picks tiles at a pyramid level,
+drops background tiles using a tissue mask computed on the lowest-resolution
+level, and streams the remaining tiles to a ``ParallelImageWriter`` with their
+coordinates as PNG metadata. At most ``2 * num_workers`` tiles are being read
+and ``queue_size`` tiles are waiting to be written at any time, so memory does
+not grow with the slide size.
+
+Requires ``tifffile`` (and ``imagecodecs`` for JPEG/JPEG2000-compressed slides).
+"""
+import math
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from fileio.image.writers import ParallelImageWriter
+from profiling.hooks import count
+from profiling.hooks import span
+
+# largest strip decoded in one piece, and pixels per band when building a thumbnail
+MAX_STRIP_PIXELS = 1 << 26
+THUMBNAIL_BAND_PIXELS = 1 << 24
+
+
+def _import_tifffile():
+    try:
+        import tifffile
+    except ImportError as e:  # pragma: no cover
+        raise ImportError(
+            "Reading whole-slide images requires tifffile: pip install tifffile imagecodecs"
+        ) from e
+    return tifffile
+
+
+class SlideReader:
+    """Lazy region reader for a pyramidal TIFF/SVS slide.
+
+    Args:
+        filepath (Union[str, Path]): The slide file.
+
+    Examples:
+        >>> with SlideReader("slide.svs") as slide:
+        ...     print(slide.level_dimensions, slide.level_downsamples)
+        ...     region = slide.read_region(level=0, x=10000, y=20000, width=512, height=512)
+    """
+
+    def __init__(self, filepath: Union[str, Path]):
+        tifffile = _import_tifffile()
+        self.filepath = Path(filepath)
+        self._tif = tifffile.TiffFile(str(filepath))
+        self._fd = os.open(str(filepath), os.O_RDONLY)
+        self._pages = [level.keyframe for level in self._tif.series[0].levels]
+
+        base_width = self._pages[0].imagewidth
+        self.level_dimensions: List[Tuple[int, int]] = [
+            (page.imagewidth, page.imagelength) for page in self._pages
+        ]
+        self.level_downsamples: List[float] = [
+            base_width / width for width, _ in self.level_dimensions
+        ]
+
+    @property
+    def level_count(self) -> int:
+        return len(self._pages)
+
+    def _read_tile(self, page, index: int) -> Optional[np.ndarray]:
+        nbytes = page.databytecounts[index]
+        if not nbytes:
+            return None
+        data = os.pread(self._fd, nbytes, page.dataoffsets[index])
+        segment, _, _ = page.decode(data, index, jpegtables=page.jpegtables)
+        return None if segment is None else segment[0]
+
+    def _segment_size(self, page) -> Tuple[int, int]:
+        """Return the (width, height) of the tiles of a page, treating strips as full-width tiles."""
+        if page.is_tiled:
+            return page.tilewidth, page.tilelength
+        if page.planarconfig != 1:
+            raise ValueError(f"{self.filepath}: strips with separate sample planes are not supported")
+        rows = min(page.rowsperstrip or page.imagelength, page.imagelength)
+        if rows * page.imagewidth > MAX_STRIP_PIXELS:
+            raise ValueError(
+                f"{self.filepath}: a {page.imagewidth}x{rows} strip is too large to read in windows, "
+                "convert the slide to a tiled pyramidal TIFF"
+            )
+        return page.imagewidth, rows
+
+    def read_region(self, level: int, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """Read a region of a pyramid level, decoding only the TIFF tiles or strips it covers.
+
+        Args:
+            level (int): Pyramid level, 0 being the full resolution.
+            x (int): Left edge in level coordinates.
+            y (int): Top edge in level coordinates.
+            width (int): Region width; must fit inside the level.
+            height (int): Region height; must fit inside the level.
+
+        Returns:
+            np.ndarray: The region, HxWxS in the slide's sample order (RGB for SVS).
+
+        Raises:
+            ValueError: If the region is empty or does not fit inside the level.
+            ValueError: If the level is stored in strips too large to read in windows.
+        """
+        if not 0 <= level < self.level_count:
+            raise ValueError(f"Invalid level {level}, the slide has {self.level_count} levels")
+        level_w, level_h = self.level_dimensions[level]
+        if width <= 0 or height <= 0 or x < 0 or y < 0 or x + width > level_w or y + height > level_h:
+            raise ValueError(
+                f"Region x={x}, y={y}, {width}x{height} does not fit inside level {level} "
+                f"({level_w}x{level_h}) of {self.filepath}"
+            )
+        page = self._pages[level]
+        tile_w, tile_h = self._segment_size(page)
+        tiles_across = (page.imagewidth + tile_w - 1) // tile_w
+        out = np.zeros((height, width, page.samplesperpixel), page.dtype)
+
+        for ty in range(y // tile_h, (y + height - 1) // tile_h + 1):
+            for tx in range(x // tile_w, (x + width - 1) // tile_w + 1):
+                tile = self._read_tile(page, ty * tiles_across + tx)
+                if tile is None:
+                    continue
+                # overlap of the tile and the region, in level coordinates
+                x0, y0 = max(x, tx * tile_w), max(y, ty * tile_h)
+                x1 = min(x + width, tx * tile_w + tile.shape[1])
+                y1 = min(y + height, ty * tile_h + tile.shape[0])
+                out[y0 - y:y1 - y, x0 - x:x1 - x] = tile[
+                    y0 - ty * tile_h:y1 - ty * tile_h, x0 - tx * tile_w:x1 - tx * tile_w
+                ].reshape(y1 - y0, x1 - x0, -1)
+        return out
+
+    def thumbnail(self, max_size: int = 4096) -> Tuple[np.ndarray, float]:
+        """Return the lowest-resolution level, downsampled to fit max_size, and its downsample factor.
+
+        A level larger than max_size is read in bands of full-width rows, each shrunk by an
+        integer factor with area interpolation, so memory stays bounded for slides without a
+        pyramid.
+
+        Args:
+            max_size (int): Maximum thumbnail width and height. Defaults to 4096.
+
+        Returns:
+            tuple: (thumbnail, downsample) with downsample relative to level 0.
+        """
+        level = self.level_count - 1
+        width, height = self.level_dimensions[level]
+        factor = max(1, math.ceil(max(width, height) / max_size))
+        if factor == 1:
+            return self.read_region(level, 0, 0, width, height), self.level_downsamples[level]
+
+        page = self._pages[level]
+        out_w, out_h = width // factor, height // factor
+        out = np.empty((out_h, out_w, page.samplesperpixel), page.dtype)
+        band = factor * max(1, THUMBNAIL_BAND_PIXELS // (width * factor))
+        for by in range(0, out_h * factor, band):
+            rows = min(band, out_h * factor - by)
+            region = self.read_region(level, 0, by, out_w * factor, rows)
+            out[by // factor:(by + rows) // factor] = cv2.resize(
+                region, (out_w, rows // factor), interpolation=cv2.INTER_AREA
+            ).reshape(rows // factor, out_w, -1)
+        return out, self.level_downsamples[level] * factor
+
+    def close(self) -> None:
+        os.close(self._fd)
+        self._tif.close()
+
+    def __enter__(self) -> "SlideReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def tissue_mask(thumbnail: np.ndarray, min_saturation: Optional[int] = None) -> np.ndarray:
+    """Compute a binary tissue mask on a low-resolution RGB image.
+
+    Stained tissue is saturated while glass background is grey or white, so the
+    HSV saturation channel is thresholded with Otsu's method (or at
+    ``min_saturation``) and cleaned up with a morphological opening. A
+    single-channel image has no saturation; there tissue is what is darker
+    than the bright background, so the inverted intensity is thresholded.
+
+    Args:
+        thumbnail (np.ndarray): Low-resolution RGB(A) or grayscale uint8 image.
+        min_saturation (int): Fixed threshold in [0, 255], on saturation or on
+            the inverted intensity of grayscale images. Defaults to Otsu.
+
+    Returns:
+        np.ndarray: uint8 mask, 1 for tissue and 0 for background.
+    """
+    if thumbnail.ndim == 2 or thumbnail.shape[2] < 3:
+        gray = thumbnail if thumbnail.ndim == 2 else thumbnail[..., 0]
+        saturation = cv2.bitwise_not(np.ascontiguousarray(gray))
+    else:
+        rgb = np.ascontiguousarray(thumbnail[..., :3])
+        saturation = cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV)[..., 1]
+    if min_saturation is None:
+        _, mask = cv2.threshold(saturation, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    else:
+        _, mask = cv2.threshold(saturation, min_saturation, 1, cv2.THRESH_BINARY)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    return cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+
+
+def iter_tissue_tiles(
+    slide: SlideReader,
+    level: int = 0,
+    tile_size: int = 512,
+    stride: Optional[int] = None,
+    min_tissue: float = 0.25,
+    min_saturation: Optional[int] = None,
+) -> Iterator[Tuple[int, int, float]]:
+    """Yield the level-0 coordinates of full tiles that contain enough tissue.
+
+    Args:
+        slide (SlideReader): The opened slide.
+        level (int): Pyramid level the tiles are read at. Defaults to 0.
+        tile_size (int): Tile width and height in level pixels. Defaults to 512.
+        stride (int): Step between tiles in level pixels. Defaults to tile_size.
+        min_tissue (float): Minimum tissue fraction of a kept tile, 0 keeps all. Defaults to 0.25.
+        min_saturation (int): Fixed tissue threshold, see ``tissue_mask``. Defaults to Otsu.
+
+    Yields:
+        tuple: (x, y, tissue_fraction) with x and y in level-0 pixels.
+    """
+    stride = stride or tile_size
+    width, height = slide.level_dimensions[level]
+    downsample = slide.level_downsamples[level]
+
+    thumbnail, mask_downsample = slide.thumbnail()
+    # summed-area table: tissue fraction of any tile in O(1)
+    integral = cv2.integral(tissue_mask(thumbnail, min_saturation))
+    scale = downsample / mask_downsample
+    mask_h, mask_w = integral.shape[0] - 1, integral.shape[1] - 1
+
+    for y in range(0, height - tile_size + 1, stride):
+        for x in range(0, width - tile_size + 1, stride):
+            mx0, my0 = min(int(x * scale), mask_w - 1), min(int(y * scale), mask_h - 1)
+            mx1 = min(max(int((x + tile_size) * scale), mx0 + 1), mask_w)
+            my1 = min(max(int((y + tile_size) * scale), my0 + 1), mask_h)
+            tissue = (integral[my1, mx1] - integral[my0, mx1] - integral[my1, mx0] + integral[my0, mx0])
+            fraction = tissue / ((mx1 - mx0) * (my1 - my0))
+            if fraction >= min_tissue:
+                yield round(x * downsample), round(y * downsample), float(fraction)
+
+
+def tile_slide(
+    filepath: Union[str, Path],
+    output_dir: Union[str, Path],
+    level: int = 0,
+    tile_size: int = 512,
+    stride: Optional[int] = None,
+    min_tissue: float = 0.25,
+    min_saturation: Optional[int] = None,
+    num_workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    compression: int = 3,
+    name_template: str = "{stem}_x{x}_y{y}.png",
+    filename_regex: Optional[str] = None,
+) -> int:
+    """Extract the tissue tiles of a slide to PNG files.
+
+    Tiles are read in parallel and handed to a ``ParallelImageWriter``; each PNG
+    carries the slide name, level, downsample, level-0 ``x_coord``/``y_coord``,
+    tile size and tissue fraction as metadata.
+
+    Args:
+        filepath (Union[str, Path]): The slide file.
+        output_dir (Union[str, Path]): Directory the tiles are written to.
+        level (int): Pyramid level the tiles are read at. Defaults to 0.
+        tile_size (int): Tile width and height in level pixels. Defaults to 512.
+            A multiple of the slide's TIFF tile size avoids decoding tiles twice.
+        stride (int): Step between tiles in level pixels. Defaults to tile_size.
+        min_tissue (float): Minimum tissue fraction of a kept tile. Defaults to 0.25.
+        min_saturation (int): Fixed tissue threshold, see ``tissue_mask``. Defaults to Otsu.
+        num_workers (int): Number of reader threads; the writer uses as many. Defaults to os.cpu_count().
+        queue_size (int): Maximum number of tiles waiting to be written. Defaults to 4 * num_workers.
+        compression (int): PNG zlib level from 0 to 9. Defaults to 3.
+        name_template (str): Tile file name, formatted with stem, x, y and level.
+            Defaults to "{stem}_x{x}_y{y}.png".
+        filename_regex (Optional[str]): Convention used by ``cv_writer`` to parse tile
+            names into metadata. Defaults to None.
+
+    Returns:
+        int: The number of tiles written.
+
+    Examples:
+        >>> tile_slide("slide.svs", "tiles/", level=1, tile_size=256, num_workers=8)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    num_workers = num_workers or os.cpu_count() or 1
+    stem = Path(filepath).stem
+
+    with SlideReader(filepath) as slide, \
+            ParallelImageWriter(num_workers, queue_size, compression) as writer, \
+            ThreadPoolExecutor(max_workers=num_workers) as executor:
+        downsample = slide.level_downsamples[level]
+
+        def extract(x: int, y: int, fraction: float) -> None:
+            with span("wsi.read_tile", level=level):
+                tile = slide.read_region(
+                    level, round(x / downsample), round(y / downsample), tile_size, tile_size
+                )
+            data = {
+                "slide": Path(filepath).name,
+                "level": level,
+                "downsample": round(downsample, 4),
+                "x_coord": x,
+                "y_coord": y,
+                "tile_size": tile_size,
+                "tissue_fraction": round(fraction, 4),
+            }
+            image_file = output_dir / name_template.format(stem=stem, x=x, y=y, level=level)
+            # blocks while the writer queue is full, which throttles the readers
+            writer.submit(image_file, tile[..., :3], data, filename_regex=filename_regex)
+            count("wsi.tiles")
+
+        in_flight = deque()
+        tiles = iter_tissue_tiles(slide, level, tile_size, stride, min_tissue, min_saturation)
+        for x, y, fraction in tiles:
+            if len(in_flight) >= 2 * num_workers:
+                in_flight.popleft().result()
+            in_flight.append(executor.submit(extract, x, y, fraction))
+        for future in in_flight:
+            future.result()
+
+        writer.join()
+        written = writer.written
+
+    logger.info(f"Wrote {written} tiles of {Path(filepath).name} to {output_dir}")
+    return written
@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 """__init__.py in src/base_repo/fileio/text."""
 
+import gzip
+import io
+import os
 import re
+import uuid
 from pathlib import Path
 from typing import Dict
+from typing import IO
+from typing import Optional
 from typing import Union
 
 from loguru import logger
@@ -11,6 +17,12 @@ from loguru import logger
 
 VALID_EXTENSIONS = [".jpeg", ".jpg", ".png", ".gif", ".bmp", ".tiff", ".tif"]
 
+# whole-slide image formats, on top of the .tif/.tiff of VALID_EXTENSIONS
+SLIDE_EXTENSIONS = [".svs", ".ndpi", ".scn", ".mrxs"]
+
+# compression suffixes recognized on top of the data file extension
+COMPRESSION_CODECS = {".gz": "gzip", ".zst": "zstd"}
+
 
 def is_none_or_empty(data: Union[Dict, str, list]) -> bool:
     """Check if data is None or empty."""
@@ -40,12 +52,37 @@ def is_empty_file(file_path: Union[str, Path], strict: bool = False) -> bool:
     return file_path.stat().st_size == 0
 
 
+def compression_codec(file_path: Union[str, Path]) -> Optional[str]:
+    """Return the compression codec of a file from its suffix, if any."""
+    return COMPRESSION_CODECS.get(Path(file_path).suffix)
+
+
+def data_suffix(file_path: Union[str, Path]) -> str:
+    """Return the data extension of a file, ignoring a compression suffix.
+
+    Examples:
+        >>> data_suffix("results.jsonl.zst")
+        '.jsonl'
+    """
+    file_path = Path(file_path)
+    if file_path.suffix in COMPRESSION_CODECS:
+        return file_path.with_suffix("").suffix
+    return file_path.suffix
+
+
 def valid_file_ext(
-    file_path: Union[str, Path], file_type: Union[str, set, list]
+    file_path: Union[str, Path],
+    file_type: Union[str, set, list],
+    allow_compressed: bool = False,
 ) -> bool:
-    """Check if a file is of a specific type."""
+    """Check if a file is of a specific type.
+
+    With ``allow_compressed``, a trailing ``.gz`` or ``.zst`` is ignored, so
+    ``data.csv.zst`` is a valid ``.csv`` file.
+    """
     file_type = {file_type} if isinstance(file_type, str) else set(file_type)
-    return Path(file_path).suffix in file_type
+    suffix = data_suffix(file_path) if allow_compressed else Path(file_path).suffix
+    return suffix in file_type
 
 
 def is_valid_filename(v: str) -> bool:
@@ -64,3 +101,107 @@ def make_dir(file_path: Union[str, Path]) -> Path:
     file_path = Path(file_path)
     file_path.parent.mkdir(parents=True, exist_ok=True)
     return file_path if file_path.parent.is_dir() else None
+
+
+def atomic_write(file_path: Union[str, Path], payload: bytes) -> Path:
+    """Write bytes to a temporary file and rename it over file_path.
+
+    Readers never observe a partially written file, and an existing file is
+    left untouched if the write fails. The file gets the usual 0o666 & ~umask
+    permissions rather than the 0o600 of ``tempfile.mkstemp``.
+    """
+    file_path = make_dir(file_path)
+    tmp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex[:12]}.tmp")
+    # the kernel applies the umask to the mode, no need to read it
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    return file_path
+
+
+def _import_zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstandard is required to read and write .zst files: pip install zstandard"
+        ) from e
+    return zstandard
+
+
+def open_file(
+    file_path: Union[str, Path],
+    mode: str = "rt",
+    level: Optional[int] = None,
+    threads: int = -1,
+    encoding: str = "utf-8",
+) -> IO:
+    """Open a plain, gzip or zstd file based on its suffix.
+
+    Reads and writes are streamed, so compressed files are never fully held in
+    memory. zstd compression runs on ``threads`` worker threads (-1 uses one
+    per CPU); zstd decompression is single threaded by design of the format.
+
+    Args:
+        file_path (Union[str, Path]): The path to the file.
+        mode (str): "r", "w", "rt", "wt", "rb" or "wb". Defaults to "rt".
+        level (Optional[int]): The compression level. Defaults to the codec default.
+        threads (int): Number of zstd compression threads. Defaults to -1.
+        encoding (str): The text encoding in text mode. Defaults to "utf-8".
+
+    Returns:
+        IO: A file object, binary or text according to mode.
+
+    Examples:
+        >>> with open_file("results.jsonl.zst", "wt") as f:
+        ...     f.write('{"key": "value"}\n')
+    """
+    if mode not in {"r", "w", "rt", "wt", "rb", "wb"}:
+        raise ValueError(f"Invalid mode: {mode}")
+
+    binary = "b" in mode
+    mode = mode[0] + ("b" if binary else "t")
+    text_kwargs = {} if binary else {"encoding": encoding}
+
+    codec = compression_codec(file_path)
+    if codec is None:
+        return open(file_path, mode, **text_kwargs)
+
+    if codec == "gzip":
+        return gzip.open(
+            file_path, mode, compresslevel=6 if level is None else level, **text_kwargs
+        )
+
+    zstd = _import_zstd()
+    if mode[0] == "r":
+        # files written by pzstd or by concatenating .zst files hold several frames
+        stream = zstd.ZstdDecompressor().stream_reader(
+            open(file_path, "rb"), closefd=True, read_across_frames=True
+        )
+    else:
+        cctx = zstd.ZstdCompressor(level=3 if level is None else level, threads=threads)
+        stream = cctx.stream_writer(open(file_path, "wb"), closefd=True)
+
+    return stream if binary else io.TextIOWrapper(stream, **text_kwargs)
+
+
+def compress_bytes(
+    payload: bytes, codec: Optional[str], level: Optional[int] = None, threads: int = -1
+) -> bytes:
+    """Compress an in-memory payload with the given codec (None is a no-op)."""
+    if codec is None:
+        return payload
+    if codec == "gzip":
+        return gzip.compress(payload, compresslevel=6 if level is None else level)
+    if codec == "zstd":
+        zstd = _import_zstd()
+        cctx = zstd.ZstdCompressor(level=3 if level is None else level, threads=threads)
+        return cctx.compress(payload)
+
+    raise ValueError(f"Unsupported compression codec: {codec}")
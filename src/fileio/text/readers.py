@@ -2,9 +2,14 @@
 """readers.py in src/base_repo/fileio/text."""
 
 import os
+from json import JSONDecodeError
+from json import JSONDecoder
 from pathlib import Path
 from typing import Any
 from typing import Dict
+from typing import IO
+from typing import Iterator
+from typing import Optional
 from typing import Union
 
 
@@ -12,17 +17,27 @@ import ujson as json
 import yaml
 from loguru import logger
 
+from fileio.text import data_suffix
 from fileio.text import is_empty_file
+from fileio.text import open_file
 from fileio.text import valid_file_ext
+from profiling.hooks import traced
 
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
 
+
+@traced(bytes_in="filepath")
 def json_loader(
     filepath: Union[str, Path, os.PathLike], strict: bool = False
 ) -> list[Any]:
     """Load JSON file and return its contents as a dictionary.
 
     Args:
-        filepath (Union[str, Path]): The path to the JSON file.
+        filepath (Union[str, Path]): The path to the JSON file, optionally
+        compressed with gzip (.gz) or zstd (.zst).
 
     Returns:
         Dict: The contents of the JSON file as a dictionary.
@@ -32,7 +47,8 @@ def json_loader(
         {'key': 'value'}
     """
     filepath = Path(filepath)
-    if not valid_file_ext(filepath, [".json", ".jsonl"]):
+    suffix = data_suffix(filepath)
+    if not valid_file_ext(filepath, [".json", ".jsonl"], allow_compressed=True):
         raise ValueError(f"Invalid file type: {filepath.suffix}")
 
     if is_empty_file(filepath, strict=strict):
@@ -40,15 +56,15 @@ def json_loader(
         raise ValueError(f"File is empty: {filepath}")
 
     # load json and return as dict
-    if filepath.suffix == ".json":
+    if suffix == ".json":
         try:
-            with open(filepath) as f:
+            with open_file(filepath) as f:
                 data_dict = json.load(f)
         except Exception as e:
             logger.error(f"Error loading JSON file: {filepath}")
             raise e
-    elif filepath.suffix == ".jsonl":
-        with open(filepath) as f:
+    elif suffix == ".jsonl":
+        with open_file(filepath) as f:
             data_dict = [json.loads(line) for line in f if line.strip()]
     else:
         raise ValueError(f"Invalid file type: {filepath.suffix}")
@@ -59,11 +75,13 @@ def json_loader(
         return data_dict
 
 
+@traced(bytes_in="filepath")
 def yaml_loader(filepath: Union[str, Path, os.PathLike]) -> Dict:
     """Load YAML file and return its contents as a dictionary.
 
     Args:
-        filepath (Union[str, Path]): The path to the YAML file.
+        filepath (Union[str, Path]): The path to the YAML file, optionally
+        compressed with gzip (.gz) or zstd (.zst).
 
     Returns:
         Dict: The contents of the YAML file as a dictionary.
@@ -78,7 +96,7 @@ def yaml_loader(filepath: Union[str, Path, os.PathLike]) -> Dict:
         {'key': 'value'}
     """
     filepath = Path(filepath)
-    if not valid_file_ext(filepath, {".yaml", ".yml"}):
+    if not valid_file_ext(filepath, {".yaml", ".yml"}, allow_compressed=True):
         logger.error(f"Invalid file type: {filepath.suffix}")
         raise ValueError(f"Invalid file type: {filepath.suffix}")
 
@@ -87,7 +105,7 @@ def yaml_loader(filepath: Union[str, Path, os.PathLike]) -> Dict:
         raise ValueError(f"File is empty: {filepath}")
 
     # load yaml and return as dict
-    with open(filepath) as file:
+    with open_file(filepath) as file:
         data_dict = yaml.safe_load(file)
 
     if data_dict:
@@ -95,3 +113,177 @@ def yaml_loader(filepath: Union[str, Path, os.PathLike]) -> Dict:
 
     logger.error(f"File is empty: {filepath}")
     raise ValueError(f"File is empty: {filepath}")
+
+
+class _JsonArrayScanner:
+    """Incremental scanner over a JSON text stream, used when ijson is missing.
+
+    Only the current element is kept in memory: the buffer grows while an
+    element does not fit and is compacted once it has been decoded.
+    """
+
+    _WHITESPACE = " \t\n\r"
+
+    def __init__(self, f: IO[str], chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = JSONDecoder()
+
+    def _fill(self, size: Optional[int] = None) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> Optional[str]:
+        """Skip whitespace and return the next character, or None at the end."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self._WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if char is None or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON stream, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next value, reading more input until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # a number ending at the buffer end may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except JSONDecodeError:
+                if self.eof:
+                    raise
+            # grow geometrically so a large element is not re-parsed quadratically
+            self._fill(max(self.chunk_size, len(self.buffer) - self.pos))
+
+    def seek_path(self, keys: list) -> None:
+        """Advance to the value found under the given object keys."""
+        for key in keys:
+            self.expect("{")
+            while True:
+                if self.peek() == "}":
+                    raise KeyError(f"Key not found in JSON stream: {key}")
+                name = self.value()
+                self.expect(":")
+                if name == key:
+                    break
+                # sibling values are decoded and dropped
+                self.value()
+                if self.expect(",}") == "}":
+                    raise KeyError(f"Key not found in JSON stream: {key}")
+
+    def items(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def json_stream_loader(
+    filepath: Union[str, Path, os.PathLike],
+    path: str = "",
+    chunk_size: int = 1 << 20,
+    use_ijson: Optional[bool] = None,
+) -> Iterator[Any]:
+    """Iterate over the elements of a JSON array without loading the file.
+
+    Memory stays proportional to the largest element instead of the file size,
+    so multi-GB exports can be processed element by element.
+
+    Args:
+        filepath (Union[str, Path]): The path to the JSON file, optionally
+        compressed with gzip (.gz) or zstd (.zst).
+        path (str): Dot-separated object keys leading to the array, e.g.
+        "data.records". Defaults to "" (the top-level array).
+        chunk_size (int): Number of characters read at a time. Defaults to 1 MiB.
+        use_ijson (bool): Whether to parse with ijson. Defaults to using it when
+        it is installed.
+
+    Yields:
+        Any: The array elements, in file order.
+
+    Raises:
+        ValueError: If the file is empty or the value at path is not an array.
+        KeyError: If a key of path is missing (pure Python parser only).
+
+    Examples:
+        >>> for record in json_stream_loader("export.json.gz", path="results"):
+        ...     process(record)
+    """
+    filepath = Path(filepath)
+    if not valid_file_ext(filepath, [".json"], allow_compressed=True):
+        raise ValueError(f"Invalid file type: {filepath.suffix}")
+    if is_empty_file(filepath):
+        logger.error(f"File is empty: {filepath}")
+        raise ValueError(f"File is empty: {filepath}")
+
+    keys = [key for key in path.split(".") if key]
+    if use_ijson is None:
+        use_ijson = ijson is not None
+
+    if use_ijson:
+        prefix = ".".join(keys + ["item"])
+        with open_file(filepath, "rb") as f:
+            yield from ijson.items(f, prefix, use_float=True)
+        return
+
+    with open_file(filepath) as f:
+        scanner = _JsonArrayScanner(f, chunk_size)
+        scanner.seek_path(keys)
+        yield from scanner.items()
+
+
+def json_batch_loader(
+    filepath: Union[str, Path, os.PathLike],
+    path: str = "",
+    batch_size: int = 100_000,
+    **kwargs,
+) -> Iterator["pd.DataFrame"]:  # noqa: F821
+    """Stream the elements of a JSON array as DataFrames of batch_size rows.
+
+    Args:
+        filepath (Union[str, Path]): The path to the JSON file.
+        path (str): Dot-separated object keys leading to the array. Defaults to "".
+        batch_size (int): Number of rows per DataFrame. Defaults to 100_000.
+        **kwargs: Passed to ``json_stream_loader``.
+
+    Yields:
+        pd.DataFrame: One DataFrame per batch of records, the last one possibly shorter.
+
+    Examples:
+        >>> for df in json_batch_loader("export.json", batch_size=50_000):
+        ...     df.to_parquet(...)
+    """
+    import pandas as pd
+
+    batch = []
+    for record in json_stream_loader(filepath, path, **kwargs):
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield pd.DataFrame.from_records(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame.from_records(batch)
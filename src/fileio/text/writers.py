@@ -1,24 +1,40 @@
 #!/usr/bin/env python3
 """writers.py in src/biovlmdata/fileio/text."""
+from __future__ import annotations
 
+import math
 import os
-import pprint
 from pathlib import Path
-from pprint import pprint
+from typing import Any
 from typing import Dict
+from typing import Optional
+from typing import TYPE_CHECKING
 from typing import Union
 
-import pandas as pd
 import ujson as json
 import yaml
 from loguru import logger
-from pyarrow import feather
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from fileio.text import atomic_write
+from fileio.text import compress_bytes
+from fileio.text import compression_codec
+from fileio.text import data_suffix
 from fileio.text import is_none_or_empty
 from fileio.text import make_dir
+from fileio.text import open_file
 from fileio.text import valid_file_ext
+from profiling.hooks import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
+@traced(bytes_out="file_path")
 def yaml_writer(data: dict, file_path: Union[str, Path]) -> None:
     """Write data to a YAML file.
 
@@ -47,10 +63,80 @@ def yaml_writer(data: dict, file_path: Union[str, Path]) -> None:
     file_path = make_dir(file_path)
 
     # write data to yaml file
-    with open(file_path, "w") as f:
+    with open_file(file_path, "wt") as f:
         yaml.dump(data, f, sort_keys=False)
 
 
+def find_unserializable(data: Any, path: str = "$") -> Optional[str]:
+    """Return the path of the first value that cannot be serialized to JSON.
+
+    Args:
+        data: The data to be checked for JSON serialization.
+        path: The path of ``data`` within the top-level object. Defaults to "$".
+
+    Returns:
+        Optional[str]: A path such as ``$['results'][3]['embedding'] (ndarray)``, or
+        None if every value is serializable.
+    """
+    if isinstance(data, dict):
+        # ujson writes any key through str(), only values can fail
+        for key, value in data.items():
+            found = find_unserializable(value, f"{path}[{key!r}]")
+            if found:
+                return found
+    elif isinstance(data, (list, tuple)):
+        for i, value in enumerate(data):
+            found = find_unserializable(value, f"{path}[{i}]")
+            if found:
+                return found
+    elif not isinstance(data, (str, int, float, bool)) and data is not None:
+        try:
+            _dumps(data)
+        except Exception:
+            return f"{path} ({type(data).__name__})"
+
+    return None
+
+
+def _has_non_finite(data: Any) -> bool:
+    """Check if data holds a NaN or infinite float anywhere."""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(_has_non_finite(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_has_non_finite(value) for value in data)
+    return False
+
+
+def _dumps(data: Any, indent: Optional[int] = None, use_orjson: bool = True) -> bytes:
+    """Serialize data to JSON bytes, with orjson when it is installed.
+
+    The file must read back the same whether or not orjson is installed, so
+    ujson is used for anything orjson would write differently or reject:
+    non-finite floats (ujson writes ``NaN``, orjson writes ``null``), ints
+    beyond 64 bits and types orjson does not know, such as float subclasses.
+    ujson is set to write strings as orjson does, with raw UTF-8 and unescaped
+    slashes. The bytes are still not identical: floats in exponent notation
+    are written ``1e+20`` by ujson and ``1e20`` by orjson.
+    """
+    if use_orjson and orjson is not None and indent in (None, 0, 2):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            payload = orjson.dumps(data, option=option)
+        except TypeError:
+            payload = None
+        # NaN and inf come out as null, only then is the data worth scanning
+        if payload is not None and not (b"null" in payload and _has_non_finite(data)):
+            return payload
+
+    return json.dumps(
+        data, indent=indent or 0, ensure_ascii=False, escape_forward_slashes=False
+    ).encode("utf-8")
+
+
 def is_json_serializable(data: dict) -> bool:
     """Check if the provided dictionary is serializable to JSON.
 
@@ -60,25 +146,36 @@ def is_json_serializable(data: dict) -> bool:
     Returns:
         bool: True if the data is JSON serializable, False otherwise.
     """
-    serializable = True
     try:
-        json.dumps(data)
+        _dumps(data)
     except Exception as e:
-        # print error type without <class '...'>
-        error_type = str(type(e)).split("'")[1]
-        logger.error(f"{error_type}: Error serializing json data: {str(e)}")
-        pprint(data)
-        serializable = False
+        error_type = type(e).__name__
+        logger.error(
+            f"{error_type}: Error serializing json data at "
+            f"{find_unserializable(data)}: {str(e)}"
+        )
+        return False
 
-    return serializable
+    return True
 
 
+@traced(bytes_out="filepath")
 def json_writer(data: dict, filepath: Union[str, Path], **kwargs) -> None:
     """Write data to a JSON file.
 
+    The data is serialized once to memory and written atomically through a
+    temporary file, so a failed write never leaves a truncated file behind.
+    orjson is used when it is installed and the indent is 2 or unset, and
+    ujson for everything orjson cannot write. Both write UTF-8 without
+    escaping and read back to the same data, but floats in exponent notation
+    are spelled differently (``1e20`` by orjson, ``1e+20`` by ujson).
+
     Args:
         data (Dict): The data to be written to the JSON file.
-        filepath (Union[str, Path]): The path to the JSON file.
+        filepath (Union[str, Path]): The path to the JSON file. A ``.gz`` or
+            ``.zst`` suffix compresses the output.
+        **kwargs: ``indent`` (int) to pretty-print and ``use_orjson`` (bool,
+            default True) to opt out of orjson.
 
     Returns:
         None
@@ -86,6 +183,7 @@ def json_writer(data: dict, filepath: Union[str, Path], **kwargs) -> None:
     Raises:
         ValueError: If data is None or empty.
         ValueError: If file_path is None or empty.
+        ValueError: If data is not JSON serializable.
 
     Examples:
         >>> data = {'key': 'value'}
@@ -97,24 +195,30 @@ def json_writer(data: dict, filepath: Union[str, Path], **kwargs) -> None:
     if is_none_or_empty(filepath):
         raise ValueError("file_path cannot be None or empty")
 
-    if not is_json_serializable(data):
-        raise ValueError(f"Data for file {filepath.name} is not JSON serializable")
-
-    # create directory if it does not exist
-    filepath = make_dir(filepath)
+    filepath = Path(filepath)
 
-    # write data to json file
-    with open(filepath, "w") as f:
-        if kwargs.get("indent", False):
-            json.dump(data, f, indent=kwargs["indent"])
-        else:
-            json.dump(data, f)
+    # serialize once, the failure path reports where the offending value is
+    try:
+        payload = _dumps(
+            data,
+            indent=kwargs.get("indent") or None,
+            use_orjson=kwargs.get("use_orjson", True),
+        )
+    except Exception as e:
+        bad_path = find_unserializable(data)
+        logger.error(f"{type(e).__name__}: Error serializing json data at {bad_path}: {e}")
+        raise ValueError(
+            f"Data for file {filepath.name} is not JSON serializable: {bad_path}"
+        ) from e
 
-    if filepath.stat().st_size == 0:
+    if not payload:
         raise ValueError(f"Error writing JSON file: {filepath} (size: 0)")
 
+    # write data to json file, compressed if the suffix asks for it
+    atomic_write(filepath, compress_bytes(payload, compression_codec(filepath)))
 
 
+@traced(bytes_out="path")
 def jsonl_writer(data: list, path: str) -> None:
     """Save a list of dictionaries into a JSONL (JSON Lines) file.
 
@@ -123,7 +227,8 @@ def jsonl_writer(data: list, path: str) -> None:
     data : list
         List of dictionaries to be saved into the JSONL file.
     path : Union[os.PathLike, Path]
-        Path to save the JSONL file.
+        Path to save the JSONL file. A ``.gz`` or ``.zst`` suffix compresses
+        the output while it is streamed.
 
     Returns
     -------
@@ -137,27 +242,36 @@ def jsonl_writer(data: list, path: str) -> None:
     if not isinstance(data, list):
         raise TypeError("`data` must be a list of dictionaries.")
 
-    with open(path, "w") as file:
+    with open_file(path, "wt") as file:
         for item in data:
             file.write(json.dumps(item) + "\n")
 
 
+@traced(bytes_out="filepath")
 def df_writer(df: pd.DataFrame, filepath: Union[str, Path, os.PathLike]) -> bool:
     """Write a pandas DataFrame to a file."""
+    # pandas and pyarrow are only imported by the scripts that write DataFrames
+    import pandas as pd
+
     if not isinstance(df, pd.DataFrame) or df.empty:
         logger.error("DataFrame is empty")
         return False
 
     filepath = Path(filepath)
-    if not valid_file_ext(filepath, {".csv", ".parquet", ".feather"}):
+    if not valid_file_ext(filepath, {".csv", ".parquet", ".feather"}) and not (
+        valid_file_ext(filepath, ".csv", allow_compressed=True)
+    ):
         logger.error(f"Invalid file type: {filepath.suffix}")
         raise ValueError(f"Invalid file type: {filepath.suffix}")
 
-    if filepath.suffix == ".csv":
-        df.to_csv(filepath, index=False)
+    if data_suffix(filepath) == ".csv":
+        with open_file(filepath, "wt") as f:
+            df.to_csv(f, index=False)
     elif filepath.suffix == ".parquet":
         df.to_parquet(filepath, index=False)
     elif filepath.suffix == ".feather":
+        from pyarrow import feather
+
         feather.write_feather(df, filepath.as_posix())
     else:
         logger.error(f"Unsupported file format: {filepath.suffix}")
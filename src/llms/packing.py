@@ -0,0 +1,189 @@
+"""
+Prompt packing: answer many small questions per request.
+
+Workloads made of thousands of tiny prompts that share one system prompt spend most of their
+cost and latency on per-request overhead and on repeating the system prompt. PromptPacker
+combines items into one request under a token budget, asks for an indexed JSON answer, maps the
+answers back to the items and re-sends only the items whose answer is missing or unparsable.
+"""
+import json
+import re
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from llms.queryllm import QueryLLM
+
+
+PACKING_INSTRUCTIONS = (
+    "You will receive {n} numbered items. Answer each item independently, following the "
+    "instructions above. Reply with only a JSON array of objects of the form "
+    '{{"id": <item number>, "answer": <answer>}}, one object per item, in any order.'
+)
+
+RETRY_INSTRUCTIONS = (
+    "This is retry {attempt}: a previous reply to these items could not be parsed. Reply with "
+    "the JSON array only, without any other text."
+)
+
+JSON_ARRAY_RE = re.compile(r"```(?:json)?\s*(\[.*?\])\s*```|(\[.*\])", flags=re.DOTALL)
+
+
+def approx_token_count(text: str) -> int:
+    """
+    Cheap token estimate (about 4 characters per token) used when no tokenizer is given.
+    """
+    return len(text) // 4 + 1
+
+
+class PromptPacker:
+    """
+    Packs many small prompts into few requests on top of QueryLLM.simple_query.
+
+    Args:
+        llm (QueryLLM): The client used to send packed requests.
+        system_prompt (str): The task instructions shared by every item.
+        max_prompt_tokens (int): Token budget of the packed user message.
+        max_items (int): Maximum number of items per request.
+        max_retries (int): Number of times failed items are re-packed and re-sent. Every retry
+            halves the item limit and says it is a retry, so the request differs from the failed
+            one and cannot be answered from the LLM cache with the same bad response.
+        fallback_single (bool): Whether items still failing after the retries are sent one by one.
+        token_counter (callable): Maps text to a token count. Defaults to approx_token_count.
+
+    Example:
+        packer  = PromptPacker(llm, system_prompt="Classify the sentiment as positive or negative.")
+        answers = packer.run(["great movie", "terrible plot", ...])
+        print(packer.report())
+    """
+
+    def __init__(self,
+                 llm: "QueryLLM",
+                 system_prompt: str,
+                 max_prompt_tokens: int = 2000,
+                 max_items: int = 50,
+                 max_retries: int = 2,
+                 fallback_single: bool = True,
+                 token_counter: Optional[Callable[[str], int]] = None):
+        self.llm               = llm
+        self.system_prompt     = system_prompt
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_items         = max_items
+        self.max_retries       = max_retries
+        self.fallback_single   = fallback_single
+        self.token_counter     = token_counter or approx_token_count
+        self.stats             = {"items": 0, "requests": 0, "prompt_tokens": 0,
+                                  "unpacked_requests": 0, "unpacked_prompt_tokens": 0,
+                                  "retried_items": 0, "single_fallbacks": 0}
+
+    ### Packing
+    @staticmethod
+    def format_item(index: int, item: str) -> str:
+        return f"[{index}] {item}"
+
+    def pack(self, indices: List[int], items: List[str], max_items: Optional[int] = None) -> List[List[int]]:
+        """
+        Greedily groups item indices into packs that fit the token budget and item limit.
+        """
+        max_items = max_items or self.max_items
+        packs, current, used = [], [], 0
+        for index in indices:
+            cost = self.token_counter(self.format_item(index, items[index])) + 1
+            if current and (used + cost > self.max_prompt_tokens or len(current) >= max_items):
+                packs.append(current)
+                current, used = [], 0
+            current.append(index)
+            used += cost
+        if current:
+            packs.append(current)
+        return packs
+
+    def _packed_system_prompt(self, n: int, attempt: int = 0) -> str:
+        prompt = f"{self.system_prompt}\n\n{PACKING_INSTRUCTIONS.format(n=n)}"
+        if attempt:
+            prompt += f"\n{RETRY_INSTRUCTIONS.format(attempt=attempt)}"
+        return prompt
+
+    ### Parsing
+    @staticmethod
+    def parse_answers(response: str, indices: List[int]) -> Dict[int, str]:
+        """
+        Parses an indexed JSON answer, keeping only well-formed answers for the expected items.
+        """
+        match = JSON_ARRAY_RE.search(response or "")
+        if not match:
+            return {}
+        try:
+            entries = json.loads(match.group(1) or match.group(2))
+        except ValueError:
+            return {}
+
+        expected = set(indices)
+        answers  = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict) or "answer" not in entry:
+                continue
+            try:
+                index = int(entry.get("id"))
+            except (TypeError, ValueError):
+                continue
+            if index in expected and index not in answers:
+                answer = entry["answer"]
+                answers[index] = answer if isinstance(answer, str) else json.dumps(answer)
+        return answers
+
+    ### Querying
+    def _send(self, human_message: str, system_prompt: str) -> str:
+        self.stats["requests"]      += 1
+        self.stats["prompt_tokens"] += self.token_counter(system_prompt) + self.token_counter(human_message)
+        return self.llm.simple_query(human_message, system_prompt=system_prompt)
+
+    def run(self, items: List[str]) -> List[Optional[str]]:
+        """
+        Answers every item, packing as many as the budget allows per request.
+
+        Args:
+            items (list): The per-item prompts.
+
+        Returns:
+            list: One answer per item, in input order; None if an item could not be answered.
+        """
+        answers: Dict[int, str] = {}
+        pending = list(range(len(items)))
+
+        system_tokens = self.token_counter(self.system_prompt)
+        self.stats["items"]                  += len(items)
+        self.stats["unpacked_requests"]      += len(items)
+        self.stats["unpacked_prompt_tokens"] += sum(system_tokens + self.token_counter(item) for item in items)
+
+        for attempt in range(self.max_retries + 1):
+            if not pending:
+                break
+            if attempt:
+                self.stats["retried_items"] += len(pending)
+
+            # smaller packs on every retry, and a prompt that differs from the cached failure
+            max_items = max(1, self.max_items >> attempt)
+            for pack in self.pack(pending, items, max_items):
+                human_message = "\n".join(self.format_item(i, items[i]) for i in pack)
+                response      = self._send(human_message, self._packed_system_prompt(len(pack), attempt))
+                answers.update(self.parse_answers(response, pack))
+
+            pending = [i for i in pending if i not in answers]
+
+        if pending and self.fallback_single:
+            for index in pending:
+                self.stats["single_fallbacks"] += 1
+                answers[index] = self._send(items[index], self.system_prompt)
+
+        return [answers.get(i) for i in range(len(items))]
+
+    def report(self) -> dict:
+        """
+        Returns request and token counts with the reduction against one request per item.
+        """
+        stats = dict(self.stats)
+        if stats["unpacked_requests"]:
+            stats["request_reduction"] = 1 - stats["requests"] / stats["unpacked_requests"]
+        if stats["unpacked_prompt_tokens"]:
+            stats["prompt_token_reduction"] = 1 - stats["prompt_tokens"] / stats["unpacked_prompt_tokens"]
+        return stats
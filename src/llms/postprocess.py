@@ -0,0 +1,221 @@
+"""
+Bulk post-processing of LLM responses.
+
+Functions in this module work on whole columns of responses (a list, a pandas
+Series or a pyarrow array) with pyarrow compute kernels instead of per-string
+Python loops: think-tag stripping, JSON block extraction and mapping free
+text to a label vocabulary. Only JSON parsing itself runs per response, with
+orjson when it is installed.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover
+    import json
+
+    _json_loads = json.loads
+
+
+# RE2 patterns, as used by pyarrow compute
+THINK_PATTERN   = r"(?s)<think>.*?</think>"
+FENCED_JSON     = r"(?s)```(?:json)?\s*(?P<json>.*?)\s*```"
+BARE_OBJECT     = r"(?s)(?P<json>\{.*\})"
+BARE_ARRAY      = r"(?s)(?P<json>\[.*\])"
+LABEL_PUNCT     = r"[^\pL\pN_\s\-+]"
+
+Responses = Union[Iterable[Optional[str]], pd.Series, pa.Array, pa.ChunkedArray]
+
+
+def _to_arrow(responses: Responses) -> pa.ChunkedArray:
+    """
+    Converts a column of responses to a pyarrow string array without copying when possible.
+    """
+    if isinstance(responses, pa.ChunkedArray):
+        array = responses
+    elif isinstance(responses, pa.Array):
+        array = pa.chunked_array([responses])
+    elif isinstance(responses, pd.Series):
+        array = pa.chunked_array([pa.Array.from_pandas(responses)])
+    else:
+        array = pa.chunked_array([pa.array(list(responses), type=pa.string())])
+
+    if pa.types.is_large_string(array.type):
+        return array
+    return array.cast(pa.string())
+
+
+def strip_thinking_tokens(responses: Responses) -> pa.ChunkedArray:
+    """
+    Removes <think>...</think> blocks from every response and trims whitespace.
+
+    Args:
+        responses: Column of response strings.
+
+    Returns:
+        pa.ChunkedArray: The stripped responses; nulls stay null.
+    """
+    array = pc.replace_substring_regex(_to_arrow(responses), pattern=THINK_PATTERN, replacement="")
+    return pc.utf8_trim_whitespace(array)
+
+
+_NOT_FOUND = object()
+
+
+def _first_valid_json(responses: Responses) -> List[tuple]:
+    """
+    Finds the JSON block of every response as a (text, parsed) pair.
+
+    The candidates are extracted column-wise, in order of preference: the first fenced block,
+    the outermost {...} span and the outermost [...] span. The first candidate that parses wins,
+    so a ```python fence or a citation like "[1]" before the object does not hide the JSON.
+    """
+    array      = _to_arrow(responses)
+    candidates = [
+        pc.struct_field(pc.extract_regex(array, pattern=pattern), [0]).to_pylist()
+        for pattern in (FENCED_JSON, BARE_OBJECT, BARE_ARRAY)
+    ]
+
+    blocks = []
+    for texts in zip(*candidates):
+        block = (None, _NOT_FOUND)
+        for text in texts:
+            if text is None:
+                continue
+            try:
+                block = (text, _json_loads(text))
+                break
+            except ValueError:
+                continue
+        blocks.append(block)
+    return blocks
+
+
+def extract_json_blocks(responses: Responses) -> pa.ChunkedArray:
+    """
+    Extracts the JSON text of every response: the first fenced block, or else the outermost
+    {...} span, or else the outermost [...] span, whichever parses first.
+
+    Args:
+        responses: Column of response strings.
+
+    Returns:
+        pa.ChunkedArray: The JSON text, null where no candidate parses.
+    """
+    return pa.chunked_array([pa.array([text for text, _ in _first_valid_json(responses)],
+                                      type=pa.string())])
+
+
+def parse_json_blocks(responses: Responses) -> List[Any]:
+    """
+    Extracts and parses the JSON block of every response, see extract_json_blocks.
+
+    Args:
+        responses: Column of response strings.
+
+    Returns:
+        list: The parsed objects, None where extraction or parsing failed.
+    """
+    return [None if parsed is _NOT_FOUND else parsed for _, parsed in _first_valid_json(responses)]
+
+
+def _normalize_label_text(array: pa.ChunkedArray) -> pa.ChunkedArray:
+    """
+    Lower-cases, strips punctuation other than "-" and "+" and trims whitespace.
+    """
+    array = pc.utf8_lower(array)
+    array = pc.replace_substring_regex(array, pattern=LABEL_PUNCT, replacement="")
+    return pc.utf8_trim_whitespace(array)
+
+
+def normalize_labels(responses: Responses,
+                     vocabulary: List[str],
+                     aliases: Optional[Dict[str, str]] = None,
+                     default: Optional[str] = None) -> pa.ChunkedArray:
+    """
+    Maps free-text answers to a label vocabulary.
+
+    Answers, labels and aliases are lower-cased and stripped of punctuation (except "-" and "+")
+    and surrounding whitespace, so "HER2+" or "N/A" match however they are written. Answers are
+    then looked up in the vocabulary and the aliases with a single hash-join kernel.
+
+    Args:
+        responses: Column of answers.
+        vocabulary (list): The canonical labels.
+        aliases (dict): Extra spellings mapped to canonical labels, e.g. {"yes": "positive"}.
+        default (str): Label for answers that match nothing. Defaults to None (null).
+
+    Returns:
+        pa.ChunkedArray: The canonical label of every answer.
+
+    Raises:
+        ValueError: If two spellings that map to different labels normalize to the same text.
+    """
+    spellings = list(vocabulary) + list((aliases or {}).keys())
+    targets   = list(vocabulary) + list((aliases or {}).values())
+    normalized = _normalize_label_text(pa.chunked_array([pa.array(spellings, type=pa.string())]))
+
+    lookup = {}
+    for key, label, spelling in zip(normalized.to_pylist(), targets, spellings):
+        if lookup.setdefault(key, label) != label:
+            raise ValueError(f"Label spelling {spelling!r} is ambiguous, it normalizes to {key!r}")
+    keys   = pa.array(list(lookup.keys()), type=pa.string())
+    values = pa.array(list(lookup.values()), type=pa.string())
+
+    array = _normalize_label_text(_to_arrow(responses))
+
+    labels = pc.take(values, pc.index_in(array, value_set=keys))
+    if default is not None:
+        labels = pc.fill_null(labels, default)
+    return labels
+
+
+def postprocess_responses(df: pd.DataFrame,
+                          column: str = "response",
+                          vocabulary: Optional[List[str]] = None,
+                          aliases: Optional[Dict[str, str]] = None,
+                          parse_json: bool = False,
+                          label_field: Optional[str] = None) -> pd.DataFrame:
+    """
+    Adds post-processed columns to a DataFrame of LLM outputs.
+
+    Adds "answer" (think tags stripped), optionally "parsed_json" and, with a vocabulary, "label".
+    When label_field is given the label is read from that key of the parsed JSON instead of the
+    answer text.
+
+    Args:
+        df (pd.DataFrame): Output table holding one response per row.
+        column (str): Name of the response column. Defaults to "response".
+        vocabulary (list): Canonical labels to map answers to.
+        aliases (dict): Extra spellings mapped to canonical labels.
+        parse_json (bool): Whether to extract and parse a JSON block from each answer.
+        label_field (str): Key of the parsed JSON holding the label.
+
+    Returns:
+        pd.DataFrame: A copy of df with the new columns.
+    """
+    df      = df.copy()
+    answers = strip_thinking_tokens(df[column])
+    df["answer"] = answers.to_numpy(zero_copy_only=False)
+
+    parsed = None
+    if parse_json or label_field:
+        parsed = parse_json_blocks(answers)
+        df["parsed_json"] = parsed
+
+    if vocabulary:
+        if label_field:
+            source = [str(p.get(label_field)) if isinstance(p, dict) and p.get(label_field) is not None else None
+                      for p in parsed]
+        else:
+            source = answers
+        df["label"] = normalize_labels(source, vocabulary, aliases).to_numpy(zero_copy_only=False)
+
+    return df
+
@@ -12,12 +12,20 @@ from langchain_openai         import ChatOpenAI
 from openai import OpenAI
 from langchain_google_genai   import ChatGoogleGenerativeAI
 from langchain_together       import ChatTogether
-from langchain_community.llms import VLLM
 
 from langchain_core.messages import HumanMessage,SystemMessage
 from langchain.globals       import set_llm_cache
 from langchain.cache          import SQLiteCache
 
+from profiling.hooks import traced
+
+
+THINK_TOKENS_RE = re.compile(r"<think>.*?</think>", flags=re.DOTALL)
+
+# QueryLLM parameters that map onto vllm.SamplingParams in offline mode
+VLLM_SAMPLING_KEYS = {"temperature", "max_tokens", "top_p", "top_k", "seed", "stop",
+                      "presence_penalty", "frequency_penalty", "repetition_penalty", "n"}
+
 
 
 
@@ -44,6 +52,10 @@ class QueryLLM:
     """
     Class to interface with various LLM providers (OpenAI, Google, TogetherAI, Anthropic, vLLM).
 
+    The "vllm" provider talks to a vLLM OpenAI-compatible server, while "vllm_offline" loads the
+    model in-process with vllm.LLM and hands whole batches to the engine (see batch_query), which
+    removes the HTTP/JSON round trips and lets the engine schedule the full workload.
+
     Args:
         provider (str): The provider to use (e.g., "google", "openai", "togetherai").
         api_key (str): The API key for accessing the provider's service.
@@ -67,7 +79,9 @@ class QueryLLM:
                  delay:int= None,
                  cache:str=None,
                  enable_logger:bool=False,
-                 host_vllm_manually:bool=False):
+                 host_vllm_manually:bool=False,
+                 inference_server_url:str="http://localhost:8000/v1",
+                 engine_kwargs:dict=None):
         """
         Initializes the QueryLLM instance, validating provider and setting up the necessary configurations.
 
@@ -80,13 +94,22 @@ class QueryLLM:
             cache (str): Name of Cache to store info.
             use_cache (bool): Whether to use cache during requests.
             enable_logger (bool): Enable logging for tracking operations.
+            host_vllm_manually (bool): Whether the vLLM server is already running.
+            inference_server_url (str): OpenAI-compatible endpoint of the vLLM server.
+            engine_kwargs (dict): Keyword arguments for vllm.LLM in "vllm_offline" mode
+                (e.g. tensor_parallel_size, max_model_len, gpu_memory_utilization).
+
+        Raises:
+            ValueError: If the provider is not valid, or if cache is set with "vllm_offline",
+                whose in-process engine does not go through the langchain cache.
         """
-        valid_providers = {"google", "openai", "togetherai", "anthropic", "vllm"}
+        valid_providers = {"google", "openai", "togetherai", "anthropic", "vllm", "vllm_offline"}
         if provider not in valid_providers:
             raise ValueError(f"Invalid provider '{provider}'. Must be one of {valid_providers}")
+        if cache and provider == "vllm_offline":
+            raise ValueError("cache is not supported with provider 'vllm_offline', "
+                             "its engine is called directly and not through langchain")
 
-        inference_server_url = "http://localhost:8000/v1"
-        
         self.provider   = provider
         self.api_key    = api_key
         self.model      = model
@@ -96,8 +119,9 @@ class QueryLLM:
         self.enable_logger         = enable_logger
         self.inference_server_url  = inference_server_url
         self.host_vllm_manually    = host_vllm_manually
+        self.engine_kwargs         = engine_kwargs or {}
 
-        if ".db" not in self.cache:
+        if self.cache and ".db" not in self.cache:
             self.cache =  self.cache + ".db"
       
         if self.enable_logger:
@@ -146,6 +170,17 @@ class QueryLLM:
             self.system_tag = "system"
             self.user_tag   = "human"
 
+        elif self.provider == "vllm_offline":
+            # imported lazily: vllm is heavy and only needed for this mode
+            from vllm import LLM, SamplingParams
+
+            sampling_kwargs      = {k: v for k, v in self.parameters.items() if k in VLLM_SAMPLING_KEYS}
+            self.engine          = LLM(model=self.model, **self.engine_kwargs)
+            self.sampling_params = SamplingParams(**sampling_kwargs)
+            self.client     = None
+            self.system_tag = "system"
+            self.user_tag   = "user"
+
         if self.cache:
             set_llm_cache(SQLiteCache(database_path=self.cache))
 
@@ -211,6 +246,7 @@ class QueryLLM:
 
         return wraped_messages
 
+    @traced("llms.QueryLLM.query")
     def query(self, messages: list) -> str:
         """
         Queries the LLM provider with the given messages and caches the response if applicable.
@@ -234,8 +270,75 @@ class QueryLLM:
         if self.provider == "vllm":
             response = dict(self.client.invoke(messages,model=self.model))
 
+        if self.provider == "vllm_offline":
+            response = self.offline_generate([messages])[0]
+
         return response
 
+    @traced("llms.QueryLLM.batch_query")
+    def batch_query(self, human_messages:list, system_prompt:str=None, return_dict:bool=False, max_concurrency:int=None) -> list:
+        """
+        Queries the LLM with many user messages that share one system prompt.
+
+        In "vllm_offline" mode the whole batch goes to the engine in a single generate call, so
+        vLLM's continuous batching schedules it. Other providers use langchain's client.batch,
+        which sends up to max_concurrency requests in parallel.
+
+        Args:
+            human_messages (list): The user messages, one per query.
+            system_prompt (str): Optional system prompt prepended to every query.
+            return_dict (bool): Whether to return the raw response dicts instead of the content.
+            max_concurrency (int): Maximum parallel requests for remote providers.
+
+        Returns:
+            list: One response per message, in input order.
+        """
+        batch_messages = []
+        for human_message in human_messages:
+            messages_list = []
+            if system_prompt:
+                messages_list.append({"role":"system","message":system_prompt})
+            messages_list.append({"role":"user","message":human_message})
+            batch_messages.append(self.defualt_chat_wrap(messages_list))
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        if self.provider == "vllm_offline":
+            responses = self.offline_generate(batch_messages)
+        else:
+            kwargs    = {"model": self.model} if self.provider == "vllm" else {}
+            config    = {"max_concurrency": max_concurrency} if max_concurrency else None
+            responses = [dict(r) for r in self.client.batch(batch_messages, config=config, **kwargs)]
+
+        if return_dict:
+            return responses
+        return [self.strip_thinking_tokens(r.get("content")) for r in responses]
+
+    def offline_generate(self, batch_messages:list) -> list:
+        """
+        Runs a batch of conversations through the in-process vLLM engine.
+
+        Args:
+            batch_messages (list): Conversations, each a list of langchain messages.
+
+        Returns:
+            list: Response dicts with "content" and "response_metadata", in input order.
+        """
+        roles         = {"system": "system", "human": "user", "ai": "assistant"}
+        conversations = [[{"role": roles.get(m.type, "user"), "content": m.content} for m in messages]
+                         for messages in batch_messages]
+
+        outputs   = self.engine.chat(conversations, self.sampling_params, use_tqdm=False)
+        responses = []
+        for output in outputs:
+            completion = output.outputs[0]
+            responses.append({"content": completion.text,
+                              "response_metadata": {"finish_reason": completion.finish_reason,
+                                                    "prompt_tokens": len(output.prompt_token_ids or []),
+                                                    "completion_tokens": len(completion.token_ids)}})
+        return responses
+
     def simple_query(self,human_message:str,system_prompt:str=None,return_dict:bool=False):
 
         messages_list = []
@@ -264,7 +367,7 @@ class QueryLLM:
         Returns:
             str: The text with <think>...</think> tokens removed.
         """
-        return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+        return THINK_TOKENS_RE.sub("", text).strip()
 
     @staticmethod
     def generate_unique_hash(input_string: str) -> str:
@@ -0,0 +1,335 @@
+"""
+Sharded inference with work claiming over a shared filesystem.
+
+Several workers, on one machine or many sharing an NFS mount, process the same prompt set
+without a coordinator:
+
+    work_dir/
+        manifest.json             number of shards and items
+        shards/shard-00000.jsonl  input items, written once by prepare()
+        leases/shard-00000.lease  present while a worker owns the shard
+        results/shard-00000.jsonl present once the shard is done
+
+A worker claims a shard by creating its lease file with O_CREAT | O_EXCL, which is atomic on
+local filesystems and NFSv3+. The lease holds the owner and a generation number. While it works,
+a heartbeat thread touches the lease; a lease whose mtime is older than lease_seconds is
+considered abandoned. To steal it, a worker must first create the marker file of that lease's
+generation with O_EXCL, so only one worker can steal a given generation, and then replaces the
+lease with its own at the next generation. A thief that dies between the two steps leaves its
+marker behind; once that marker is older than lease_seconds, the next thief uses a marker with
+a higher attempt number instead. Lease and marker ages are measured against the clock of the
+file server, whose offset from the local clock is measured with a probe file, so hosts with
+skewed clocks agree on when a lease expires. Results are written to a
+temporary file and renamed into place, so a shard is either done or not. Workers can join or
+leave at any time; merge() concatenates the per-shard results in input order.
+"""
+import itertools
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Union
+
+import ujson as json
+
+from fileio.text import atomic_write
+from fileio.text.readers import json_loader
+from fileio.text.writers import jsonl_writer
+
+
+class ShardedRunner:
+    """
+    Claims and processes fixed-size shards of a shared input list.
+
+    Args:
+        work_dir (str): Shared directory holding shards, leases and results.
+        shard_size (int): Number of items per shard.
+        lease_seconds (float): Age of a lease heartbeat after which the shard is re-claimed.
+        heartbeat_seconds (float): Interval between heartbeats; must be well below lease_seconds.
+        worker_id (str): Unique name of this worker. Defaults to hostname-pid-random.
+
+    Example:
+        runner = ShardedRunner("/nfs/run-42", shard_size=500)
+        runner.prepare(prompts)                     # safe to call from every worker
+        runner.run(lambda item: {"id": item["id"],
+                                 "response": llm.simple_query(item["prompt"])})
+        runner.merge("/nfs/run-42/responses.jsonl")  # once every shard is done
+    """
+
+    def __init__(self,
+                 work_dir: Union[str, Path],
+                 shard_size: int = 1000,
+                 lease_seconds: float = 300,
+                 heartbeat_seconds: float = 30,
+                 worker_id: Optional[str] = None):
+        if heartbeat_seconds >= lease_seconds:
+            raise ValueError("heartbeat_seconds must be smaller than lease_seconds")
+
+        self.work_dir          = Path(work_dir)
+        self.shard_size        = shard_size
+        self.lease_seconds     = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.worker_id         = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self.manifest_path = self.work_dir / "manifest.json"
+        self.shard_dir     = self.work_dir / "shards"
+        self.lease_dir     = self.work_dir / "leases"
+        self.result_dir    = self.work_dir / "results"
+        for directory in (self.shard_dir, self.lease_dir, self.result_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        self._clock_offset  = 0.0
+        self._clock_checked = None
+
+    ### Layout
+    def _name(self, shard: int) -> str:
+        return f"shard-{shard:05d}"
+
+    def shard_path(self, shard: int) -> Path:
+        return self.shard_dir / f"{self._name(shard)}.jsonl"
+
+    def lease_path(self, shard: int) -> Path:
+        return self.lease_dir / f"{self._name(shard)}.lease"
+
+    def result_path(self, shard: int) -> Path:
+        return self.result_dir / f"{self._name(shard)}.jsonl"
+
+    @property
+    def num_shards(self) -> int:
+        with open(self.manifest_path) as f:
+            return json.load(f)["num_shards"]
+
+    ### Input
+    def prepare(self, items: Iterable[Any]) -> int:
+        """
+        Splits the input into shards. Only the first caller writes them; later callers (other
+        workers) reuse the existing manifest.
+
+        Args:
+            items (Iterable): JSON-serializable input items.
+
+        Returns:
+            int: The number of shards.
+        """
+        if self.manifest_path.exists():
+            return self.num_shards
+
+        items = list(items)
+        num_shards = (len(items) + self.shard_size - 1) // self.shard_size
+        for shard in range(num_shards):
+            path = self.shard_path(shard)
+            tmp  = path.with_name(f".{self.worker_id}.{path.name}")
+            jsonl_writer(items[shard * self.shard_size:(shard + 1) * self.shard_size], tmp)
+            os.replace(tmp, path)
+
+        # the manifest is published last: its presence means every shard exists
+        manifest = {"num_shards": num_shards, "num_items": len(items), "shard_size": self.shard_size}
+        atomic_write(self.manifest_path, json.dumps(manifest).encode("utf-8"))
+        return num_shards
+
+    ### Leases
+    def _steal_marker(self, shard: int, generation: int, attempt: int = 0) -> Path:
+        return self.lease_dir / f".{self._name(shard)}.steal-{generation}.{attempt}"
+
+    def _fs_time(self) -> float:
+        """
+        Returns the current time on the clock that sets the mtimes of the lease directory, which
+        on NFS is the server's. The offset to the local clock is measured by creating a probe file
+        and is refreshed every lease_seconds.
+        """
+        now = time.time()
+        if self._clock_checked is None or now - self._clock_checked > self.lease_seconds:
+            probe = self.lease_dir / f".clock-{self.worker_id}"
+            probe.unlink(missing_ok=True)
+            os.close(os.open(probe, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+            try:
+                self._clock_offset = probe.stat().st_mtime_ns / 1e9 - time.time()
+            finally:
+                probe.unlink(missing_ok=True)
+            self._clock_checked = now
+        return time.time() + self._clock_offset
+
+    def _try_create_lease(self, shard: int) -> bool:
+        try:
+            fd = os.open(self.lease_path(shard), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(f"{self.worker_id}\n0")
+        return True
+
+    def _read_lease(self, shard: int) -> Optional[Tuple[str, int, int]]:
+        """Returns (owner, generation, mtime_ns) of a shard's lease, or None if there is none."""
+        path = self.lease_path(shard)
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+            owner, _, generation = path.read_text().partition("\n")
+        except FileNotFoundError:
+            return None
+        return owner, int(generation or 0), mtime_ns
+
+    def _lease_owner(self, shard: int) -> Optional[str]:
+        lease = self._read_lease(shard)
+        return lease[0] if lease else None
+
+    def claim(self, shard: int) -> bool:
+        """
+        Tries to claim a shard, stealing its lease if the previous owner stopped heartbeating.
+
+        Returns:
+            bool: Whether this worker now owns the shard.
+        """
+        if self.result_path(shard).exists():
+            return False
+        if self._try_create_lease(shard):
+            return True
+
+        lease = self._read_lease(shard)
+        if lease is None:
+            return self._try_create_lease(shard)
+        owner, generation, mtime_ns = lease
+        now = self._fs_time()
+        if now - mtime_ns / 1e9 <= self.lease_seconds:
+            return False
+
+        # only one worker can create a marker of this generation, the others back off; a marker
+        # older than lease_seconds was left by a thief that died before replacing the lease, so
+        # the marker of the next attempt is tried instead
+        for attempt in itertools.count():
+            marker = self._steal_marker(shard, generation, attempt)
+            try:
+                os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+                break
+            except FileExistsError:
+                try:
+                    marker_ns = marker.stat().st_mtime_ns
+                except FileNotFoundError:
+                    return False
+                if now - marker_ns / 1e9 <= self.lease_seconds:
+                    return False
+        # markers are removed on release, so the lease may have been released and re-created
+        # (possibly with the same generation) since it was read
+        if self._read_lease(shard) != lease:
+            marker.unlink(missing_ok=True)
+            return False
+
+        atomic_write(self.lease_path(shard), f"{self.worker_id}\n{generation + 1}".encode("utf-8"))
+        return True
+
+    def release(self, shard: int) -> None:
+        """Drops this worker's lease on a shard."""
+        if self._lease_owner(shard) == self.worker_id:
+            self.lease_path(shard).unlink(missing_ok=True)
+            for marker in self.lease_dir.glob(f".{self._name(shard)}.steal-*"):
+                marker.unlink(missing_ok=True)
+
+    def _heartbeat(self, shard: int, stop: threading.Event, lost: threading.Event) -> None:
+        while not stop.wait(self.heartbeat_seconds):
+            if self._lease_owner(shard) != self.worker_id:
+                lost.set()
+                return
+            try:
+                os.utime(self.lease_path(shard))
+            except FileNotFoundError:
+                lost.set()
+                return
+
+    ### Processing
+    def process_shard(self, shard: int, process_fn: Callable[[Any], Any]) -> bool:
+        """
+        Processes a claimed shard and commits its results.
+
+        Returns:
+            bool: Whether the results were committed (False if the lease was lost meanwhile).
+        """
+        stop, lost = threading.Event(), threading.Event()
+        heartbeat  = threading.Thread(target=self._heartbeat, args=(shard, stop, lost), daemon=True)
+        heartbeat.start()
+        try:
+            results = [process_fn(item) for item in json_loader(self.shard_path(shard))]
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if lost.is_set() or self._lease_owner(shard) != self.worker_id:
+            return False
+
+        # a shard is deterministic, so a racing duplicate commit writes the same content
+        path = self.result_path(shard)
+        tmp  = path.with_name(f".{self.worker_id}.{path.name}")
+        jsonl_writer(results, tmp)
+        os.replace(tmp, path)
+        self.release(shard)
+        return True
+
+    def pending(self) -> List[int]:
+        """Returns the shards without committed results."""
+        return [s for s in range(self.num_shards) if not self.result_path(s).exists()]
+
+    def run(self,
+            process_fn: Callable[[Any], Any],
+            wait: bool = True,
+            poll_seconds: float = 5) -> int:
+        """
+        Claims and processes shards until none are left.
+
+        Args:
+            process_fn (callable): Maps one input item to one JSON-serializable result.
+            wait (bool): Whether to keep polling while other workers hold the remaining shards,
+                so their shards are taken over if they die. Defaults to True.
+            poll_seconds (float): Sleep between polls while waiting.
+
+        Returns:
+            int: The number of shards committed by this worker.
+        """
+        while not self.manifest_path.exists():
+            time.sleep(poll_seconds)
+
+        done = 0
+        while True:
+            pending = self.pending()
+            if not pending:
+                return done
+
+            claimed = False
+            for shard in pending:
+                if self.claim(shard):
+                    claimed = True
+                    try:
+                        done += self.process_shard(shard, process_fn)
+                    except BaseException:
+                        self.release(shard)
+                        raise
+
+            if not claimed:
+                if not wait:
+                    return done
+                time.sleep(poll_seconds)
+
+    ### Output
+    def merge(self, output_path: Optional[Union[str, Path]] = None) -> List[Any]:
+        """
+        Concatenates the per-shard results in input order.
+
+        Args:
+            output_path (str): Optional JSONL file to write the merged results to.
+
+        Returns:
+            list: All results, ordered as the input items.
+
+        Raises:
+            RuntimeError: If some shards are not done yet.
+        """
+        pending = self.pending()
+        if pending:
+            raise RuntimeError(f"{len(pending)} shards are not done yet, e.g. {self._name(pending[0])}")
+
+        results = []
+        for shard in range(self.num_shards):
+            results.extend(json_loader(self.result_path(shard)))
+
+        if output_path is not None:
+            jsonl_writer(results, output_path)
+        return results
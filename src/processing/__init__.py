@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""__init__.py in src/base_repo/processing."""
+from datetime import datetime
+
+
+def timestamp() -> str:
+    """Return the current local time as "YYYY-MM-DD HH:MM:SS"."""
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
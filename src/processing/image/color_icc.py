@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Cached ICC colour management for decoded images.
+
+Building a littleCMS transform from an embedded profile costs far more than
+applying it, and the images of a dataset usually share one or a handful of
+profiles. Transforms are therefore built once per unique profile, kept in a
+small LRU keyed by a digest of the profile bytes, and applied to the already
+decoded pixel buffer in place. Profiles of another colour space than RGB,
+such as the CMYK or grayscale profiles of some scans, cannot describe the RGB
+buffer a decoder returns and are skipped with a warning.
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from typing import Union
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+from PIL import ImageCms
+
+from profiling.hooks import count
+from profiling.hooks import span
+
+
+SRGB_PROFILE = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB"))
+
+
+def icc_profile_hash(icc_bytes: bytes) -> str:
+    """Return a short, stable digest of an ICC profile.
+
+    Args:
+        icc_bytes (bytes): The raw ICC profile.
+
+    Returns:
+        str: The hexadecimal digest of the profile bytes.
+    """
+    return hashlib.blake2b(icc_bytes, digest_size=16).hexdigest()
+
+
+def read_icc_profile(filepath: Union[str, Path]) -> Optional[bytes]:
+    """Read the embedded ICC profile of an image without decoding its pixels.
+
+    ``PIL.Image.open`` only parses the file header, so this is cheap compared
+    to a full decode and can be paired with any decoder.
+
+    Args:
+        filepath (Union[str, Path]): The path to the image file.
+
+    Returns:
+        Optional[bytes]: The ICC profile, or None if the image has none.
+    """
+    with Image.open(filepath) as img:
+        return img.info.get("icc_profile") or None
+
+
+def _build_transform(
+    icc_bytes: bytes, mode: str, digest: str
+) -> Optional[ImageCms.ImageCmsTransform]:
+    """Build the transform of an RGB profile to sRGB, or None if it cannot be applied."""
+    try:
+        src_profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_bytes))
+    except (OSError, ImageCms.PyCMSError) as e:
+        logger.warning(f"Skipping unreadable ICC profile {digest}: {e}")
+        return None
+
+    color_space = src_profile.profile.xcolor_space.strip()
+    if color_space != "RGB":
+        logger.warning(f"Skipping {color_space} ICC profile {digest} for {mode} images")
+        count("icc.skipped_profiles")
+        return None
+
+    try:
+        return ImageCms.buildTransform(src_profile, SRGB_PROFILE, mode, mode)
+    except ImageCms.PyCMSError as e:
+        logger.warning(f"Skipping ICC profile {digest}: {e}")
+        return None
+
+
+class ICCTransformCache:
+    """Thread-safe LRU cache of ICC -> sRGB transforms.
+
+    Args:
+        maxsize (int): The maximum number of transforms to keep. Defaults to 32.
+
+    Examples:
+        >>> cache = ICCTransformCache(maxsize=8)
+        >>> transform = cache.get(icc_bytes)
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._transforms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, icc_bytes: bytes, mode: str = "RGB"
+    ) -> Optional[ImageCms.ImageCmsTransform]:
+        """Return the transform for the given profile, building it on a miss.
+
+        Profiles that cannot be applied to RGB images, because they describe
+        another colour space or cannot be parsed, are logged once and cached
+        as None.
+
+        Args:
+            icc_bytes (bytes): The raw ICC profile embedded in the image.
+            mode (str): The PIL mode of the images to transform. Defaults to "RGB".
+
+        Returns:
+            Optional[ImageCms.ImageCmsTransform]: The transform from the profile
+            to sRGB, or None if the profile has to be skipped.
+        """
+        key = (icc_profile_hash(icc_bytes), mode)
+        with self._lock:
+            if key in self._transforms:
+                self._transforms.move_to_end(key)
+                self.hits += 1
+                count("icc.transform_cache.hit")
+                return self._transforms[key]
+            self.misses += 1
+
+        # build outside the lock, a duplicate build on a race is harmless
+        with span("icc.build_transform"):
+            transform = _build_transform(icc_bytes, mode, key[0])
+
+        with self._lock:
+            self._transforms[key] = transform
+            self._transforms.move_to_end(key)
+            while len(self._transforms) > self.maxsize:
+                self._transforms.popitem(last=False)
+
+        return transform
+
+    def clear(self) -> None:
+        """Drop all cached transforms and reset the counters."""
+        with self._lock:
+            self._transforms.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self) -> dict:
+        """Return hit/miss statistics in the spirit of ``functools.lru_cache``."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "maxsize": self.maxsize,
+                "currsize": len(self._transforms),
+            }
+
+
+_TRANSFORM_CACHE = ICCTransformCache()
+
+
+def get_icc_transform(
+    icc_bytes: bytes, mode: str = "RGB"
+) -> Optional[ImageCms.ImageCmsTransform]:
+    """Return the shared cached transform for an ICC profile."""
+    return _TRANSFORM_CACHE.get(icc_bytes, mode)
+
+
+def apply_icc_inplace(
+    img: np.ndarray, icc_bytes: bytes, channel_order: str = "RGB"
+) -> np.ndarray:
+    """Convert a decoded image from its embedded profile to sRGB in place.
+
+    Only the colour channels are transformed; an alpha channel is left as is.
+    An image whose profile is not an RGB profile (e.g. CMYK or grayscale) is
+    returned unchanged.
+
+    Args:
+        img (np.ndarray): An 8-bit HxWx3 or HxWx4 image, modified in place.
+        icc_bytes (bytes): The raw ICC profile embedded in the image.
+        channel_order (str): Order of the colour channels in ``img``, "RGB" or
+            "BGR". Defaults to "RGB".
+
+    Returns:
+        np.ndarray: The same array, converted to sRGB.
+
+    Raises:
+        ValueError: If the image is not an 8-bit 3 or 4 channel array.
+    """
+    if img.ndim != 3 or img.shape[2] not in (3, 4):
+        raise ValueError(f"Expected an HxWx3 or HxWx4 image. Actual: {img.shape}")
+    if img.dtype != np.uint8:
+        raise ValueError(f"ICC transforms require uint8 images. Actual: {img.dtype}")
+    if channel_order not in ("RGB", "BGR"):
+        raise ValueError(f"Invalid channel order: {channel_order}")
+
+    transform = get_icc_transform(icc_bytes)
+    if transform is None:
+        return img
+
+    color = img[..., :3] if channel_order == "RGB" else img[..., 2::-1]
+    pil_img = Image.fromarray(np.ascontiguousarray(color), mode="RGB")
+    ImageCms.applyTransform(pil_img, transform, inPlace=True)
+    np.copyto(color, np.asarray(pil_img))
+
+    return img
+
+
+def build_apply_icc(icc_bytes: bytes, img: np.ndarray) -> np.ndarray:
+    """Apply an ICC profile to an RGB(A) image using the shared transform cache.
+
+    Args:
+        icc_bytes (bytes): The raw ICC profile embedded in the image.
+        img (np.ndarray): The decoded image in RGB(A) order.
+
+    Returns:
+        np.ndarray: The image converted to sRGB.
+    """
+    img = np.asarray(img)
+    if not img.flags.writeable:
+        img = img.copy()
+    if img.ndim != 3 or img.dtype != np.uint8:
+        logger.warning(f"Skipping ICC transform for image {img.shape} {img.dtype}")
+        return img
+
+    return apply_icc_inplace(img, icc_bytes)
@@ -0,0 +1,2 @@
+#!/usr/bin/env python3
+"""__init__.py in src/base_repo/profiling."""
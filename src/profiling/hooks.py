@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""Opt-in instrumentation hooks for the fileio and llms hot paths.
+
+Readers, writers and ``QueryLLM`` are wrapped with ``traced``, which records a
+span (wall time), a call count and optionally the bytes read or written. When
+profiling is disabled, the default, a wrapped call costs one flag check.
+
+Enable with ``enable()`` or by setting ``BASE_REPO_PROFILE=1``, then print
+``report()`` or export the recorded spans with ``export_chrome_trace`` (for
+chrome://tracing or Perfetto) or ``export_otlp_json`` (OpenTelemetry OTLP/JSON).
+Any pipeline stage can also be wrapped with ``profile()`` to run it under
+cProfile or pyinstrument.
+
+Examples:
+    >>> from profiling import hooks
+    >>> hooks.enable()
+    >>> df = df_loader("data.csv")
+    >>> print(hooks.report())
+"""
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+from typing import Iterator
+from typing import Optional
+from typing import Union
+
+
+class _State:
+    enabled = os.environ.get("BASE_REPO_PROFILE", "") not in ("", "0", "false")
+    record_events = True
+    max_events = 1_000_000
+
+
+_STATE = _State()
+_LOCK = threading.Lock()
+_STATS = defaultdict(lambda: {"calls": 0, "total_s": 0.0, "max_s": 0.0, "bytes": 0})
+_COUNTERS = defaultdict(int)
+_EVENTS = []
+_T0_NS = time.time_ns() - time.perf_counter_ns()
+
+
+def enable(record_events: bool = True, max_events: int = 1_000_000) -> None:
+    """Start recording spans and counters.
+
+    Args:
+        record_events (bool): Whether to keep individual spans for trace export,
+            in addition to the aggregated statistics. Defaults to True.
+        max_events (int): Maximum number of spans kept for export. Defaults to 1e6.
+    """
+    _STATE.record_events = record_events
+    _STATE.max_events = max_events
+    _STATE.enabled = True
+
+
+def disable() -> None:
+    """Stop recording; collected data is kept until ``reset``."""
+    _STATE.enabled = False
+
+
+def is_enabled() -> bool:
+    """Return whether profiling is enabled."""
+    return _STATE.enabled
+
+
+def reset() -> None:
+    """Drop all recorded spans, statistics and counters."""
+    with _LOCK:
+        _STATS.clear()
+        _COUNTERS.clear()
+        _EVENTS.clear()
+
+
+def _record(name: str, start_ns: int, end_ns: int, nbytes: int, attrs: Optional[dict]) -> None:
+    duration = (end_ns - start_ns) / 1e9
+    with _LOCK:
+        stats = _STATS[name]
+        stats["calls"] += 1
+        stats["total_s"] += duration
+        stats["max_s"] = max(stats["max_s"], duration)
+        stats["bytes"] += nbytes
+        if _STATE.record_events and len(_EVENTS) < _STATE.max_events:
+            _EVENTS.append(
+                (name, start_ns, end_ns, os.getpid(), threading.get_ident(), nbytes, attrs)
+            )
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "nbytes", "start_ns")
+
+    def __init__(self, name: str, attrs: Optional[dict]):
+        self.name = name
+        self.attrs = attrs
+        self.nbytes = 0
+
+    def add_bytes(self, nbytes: int) -> None:
+        self.nbytes += nbytes
+
+    def __enter__(self) -> "_Span":
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _record(self.name, self.start_ns, time.perf_counter_ns(), self.nbytes, self.attrs)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def add_bytes(self, nbytes: int) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **attrs) -> Union[_Span, _NullSpan]:
+    """Time a block of code as a named span.
+
+    Examples:
+        >>> with span("decode", batch=3) as s:
+        ...     s.add_bytes(len(payload))
+    """
+    if not _STATE.enabled:
+        return _NULL_SPAN
+    return _Span(name, attrs or None)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Increment a named counter, e.g. cache hits or retries."""
+    if _STATE.enabled:
+        with _LOCK:
+            _COUNTERS[name] += n
+
+
+def _file_size(path) -> int:
+    try:
+        return os.stat(path).st_size
+    except (OSError, TypeError, ValueError):
+        return 0
+
+
+def traced(
+    name: Optional[str] = None,
+    bytes_in: Optional[str] = None,
+    bytes_out: Optional[str] = None,
+) -> Callable:
+    """Decorate a function so each call is recorded as a span.
+
+    Args:
+        name (Optional[str]): The span name. Defaults to module.qualname.
+        bytes_in (Optional[str]): Argument holding a path whose size is counted
+            as bytes read, before the call.
+        bytes_out (Optional[str]): Argument holding a path whose size is counted
+            as bytes written, after the call.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+        signature = inspect.signature(func) if bytes_in or bytes_out else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _STATE.enabled:
+                return func(*args, **kwargs)
+
+            path_args = {}
+            if signature is not None:
+                path_args = signature.bind_partial(*args, **kwargs).arguments
+
+            nbytes = _file_size(path_args.get(bytes_in)) if bytes_in else 0
+            start_ns = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end_ns = time.perf_counter_ns()
+                if bytes_out:
+                    nbytes += _file_size(path_args.get(bytes_out))
+                _record(span_name, start_ns, end_ns, nbytes, None)
+
+        return wrapper
+
+    return decorator
+
+
+def stats() -> dict:
+    """Return a copy of the aggregated span statistics and counters."""
+    with _LOCK:
+        return {
+            "spans": {name: dict(values) for name, values in _STATS.items()},
+            "counters": dict(_COUNTERS),
+        }
+
+
+def report(sort_by: str = "total_s") -> str:
+    """Format the aggregated statistics as a text table."""
+    data = stats()
+    rows = sorted(data["spans"].items(), key=lambda kv: kv[1][sort_by], reverse=True)
+
+    lines = [
+        f"{'span':<48} {'calls':>8} {'total_s':>10} {'mean_ms':>10} {'max_ms':>10} {'MiB':>10}"
+    ]
+    for name, s in rows:
+        mean_ms = 1000 * s["total_s"] / s["calls"] if s["calls"] else 0.0
+        lines.append(
+            f"{name:<48} {s['calls']:>8} {s['total_s']:>10.3f} {mean_ms:>10.3f} "
+            f"{1000 * s['max_s']:>10.3f} {s['bytes'] / 2**20:>10.2f}"
+        )
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"{name:<48} {value:>8}")
+
+    return "\n".join(lines)
+
+
+def export_chrome_trace(filepath: Union[str, Path]) -> Path:
+    """Write recorded spans in Chrome trace event format.
+
+    The file opens in chrome://tracing and https://ui.perfetto.dev.
+    """
+    with _LOCK:
+        events = list(_EVENTS)
+
+    trace = [
+        {
+            "name": name,
+            "ph": "X",
+            "ts": (_T0_NS + start_ns) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": pid,
+            "tid": tid,
+            "args": {"bytes": nbytes, **(attrs or {})},
+        }
+        for name, start_ns, end_ns, pid, tid, nbytes, attrs in events
+    ]
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+    return filepath
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def export_otlp_json(filepath: Union[str, Path], service_name: str = "base_repo") -> Path:
+    """Write recorded spans as OpenTelemetry OTLP/JSON ``resourceSpans``.
+
+    All spans share one trace id; the file can be sent to an OTLP/HTTP
+    collector endpoint as is.
+    """
+    with _LOCK:
+        events = list(_EVENTS)
+
+    trace_id = uuid.uuid4().hex
+    spans = [
+        {
+            "traceId": trace_id,
+            "spanId": uuid.uuid4().hex[:16],
+            "name": name,
+            "kind": 1,
+            "startTimeUnixNano": str(_T0_NS + start_ns),
+            "endTimeUnixNano": str(_T0_NS + end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in {
+                    "bytes": nbytes, "process.pid": pid, "thread.id": tid, **(attrs or {})
+                }.items()
+            ],
+        }
+        for name, start_ns, end_ns, pid, tid, nbytes, attrs in events
+    ]
+    payload = {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": service_name}}
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, "w") as f:
+        json.dump(payload, f)
+    return filepath
+
+
+@contextmanager
+def profile(
+    output: Optional[Union[str, Path]] = None,
+    engine: str = "cprofile",
+    sort_by: str = "cumulative",
+    limit: int = 30,
+) -> Iterator[None]:
+    """Run a pipeline stage under cProfile or pyinstrument.
+
+    Args:
+        output (Optional[Union[str, Path]]): Where to save the profile: a
+            ``.prof`` pstats file for cProfile, an ``.html`` report for
+            pyinstrument. If None, a summary is printed.
+        engine (str): "cprofile" or "pyinstrument". Defaults to "cprofile".
+        sort_by (str): pstats sort key for the printed summary.
+        limit (int): Number of functions in the printed summary.
+
+    Examples:
+        >>> with profile("decode.prof"):
+        ...     images = [cv2_loader(p) for p in paths]
+    """
+    if engine == "pyinstrument":
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            if output:
+                Path(output).write_text(profiler.output_html())
+            else:
+                print(profiler.output_text(unicode=True, color=False))
+        return
+
+    if engine != "cprofile":
+        raise ValueError(f"Invalid profiler engine: {engine}")
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        if output:
+            profiler.dump_stats(str(output))
+        else:
+            pstats.Stats(profiler).sort_stats(sort_by).print_stats(limit)
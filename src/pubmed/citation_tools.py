@@ -1,5 +1,10 @@
+from pathlib import Path
+from types import SimpleNamespace
+
 from pymed import PubMed
 
+from pubmed.medline_store import MedlineStore
+
 class PubMedCitation:
     """
     A class to handle PubMed article citation formatting.
@@ -8,16 +13,22 @@ class PubMedCitation:
     ----------
     pubmed : PubMed
         The PubMed tool instance for querying articles.
+    store : MedlineStore or None
+        The local MEDLINE store used instead of NCBI, if any.
     """
 
-    def __init__(self, email:str="your_email@example.com"):
+    def __init__(self, email:str="your_email@example.com", store=None):
         """
         Parameters
         ----------
         email : str, optional
             The email address to use with the PubMed tool (default is "your_email@example.com").
+        store : MedlineStore or str, optional
+            A local MEDLINE store (or the path to its database) built with MedlineStore.ingest.
+            When given, lookups never reach the network (default is None).
         """
         self.pubmed = PubMed(tool="MyTool", email=email)
+        self.store  = MedlineStore(store) if isinstance(store, (str, Path)) else store
 
     @staticmethod
     def _remove_trailing_period(text):
@@ -44,6 +55,7 @@ class PubMedCitation:
         ----------
         authors : list of dict
             A list of authors, each represented by a dictionary with 'initials' and 'lastname' keys.
+            Authors without a last name, such as collective authors, are left out.
 
         Returns
         -------
@@ -51,11 +63,13 @@ class PubMedCitation:
             A string of authors in the format "Initials. Lastname".
         """
         parsed_authors = []
-        for author in authors:
-            initials = author.get('initials') or author.get('firstname', "No authors")[0]
-            last_name = author['lastname']
-            parsed_authors.append(f"{initials}. {last_name}")
-        return ", ".join(parsed_authors)
+        for author in authors or []:
+            last_name = author.get('lastname')
+            if not last_name:
+                continue
+            initials = author.get('initials') or (author.get('firstname') or "")[:1]
+            parsed_authors.append(f"{initials}. {last_name}" if initials else last_name)
+        return ", ".join(parsed_authors) or "No authors"
 
     def _parse_citation(self, article):
         """
@@ -75,7 +89,7 @@ class PubMedCitation:
         authors:str  = self._parse_authors(article.authors)
         journal:str  = self._remove_trailing_period(article.journal)
         pubdate:str  = article.publication_date.strftime("%Y") if article.publication_date else "Unknown Date"
-        doi:str      = article.doi.split("\n")[0] if hasattr(article, "doi") else ""
+        doi:str      = article.doi.split("\n")[0] if getattr(article, "doi", None) else ""
         
         citation = f"{authors}. {title}. {journal}. {pubdate}."
         if len(doi) > 2:
@@ -99,6 +113,12 @@ class PubMedCitation:
         dict or None
             A dictionary containing the article details and optional citation, or None if no article is found.
         """
+        if self.store is not None:
+            article_dict = self.store.get(pmid)
+            if article_dict and parse_citation:
+                article_dict["citation"] = self._parse_citation(SimpleNamespace(**article_dict))
+            return article_dict
+
         article = next(self.pubmed.query(pmid, max_results=1), None)
         
         if not article:
@@ -110,6 +130,32 @@ class PubMedCitation:
         
         return article_dict
 
+    def get_pubmed_references(self, pmids, parse_citation=True):
+        """
+        Fetches many articles at once from the local store.
+
+        Parameters
+        ----------
+        pmids : list of str
+            The PubMed IDs (PMIDs) of the articles to fetch.
+        parse_citation : bool, optional
+            Whether to parse and include the citation in the output (default is True).
+
+        Returns
+        -------
+        dict
+            The article details keyed by PMID; PMIDs missing from the store are left out.
+        """
+        if self.store is None:
+            return {pmid: article for pmid in pmids
+                    if (article := self.get_pubmed_reference(pmid, parse_citation)) is not None}
+
+        articles = self.store.get_many(pmids)
+        if parse_citation:
+            for article_dict in articles.values():
+                article_dict["citation"] = self._parse_citation(SimpleNamespace(**article_dict))
+        return articles
+
 if __name__ == "__main__":
     # Example usage
     pmid = '33792783'  # Replace with an actual PMID
@@ -0,0 +1,302 @@
+"""
+Offline PubMed store built from the MEDLINE/PubMed baseline and update files.
+
+The annual baseline (pubmed*n0001.xml.gz ...) and the daily update files are streamed with
+iterparse, clearing every parsed article so memory stays constant regardless of file size, and
+parsed in parallel across files. Workers stream their records back in fixed-size chunks through
+bounded queues, and only num_workers files are in flight, so ingesting the whole baseline does
+not hold more than a few chunks per worker in memory. Records are stored in an indexed SQLite database with the same
+shape as pymed's ``PubMedArticle.toDict()``, so PubMedCitation can answer lookups without
+network access.
+
+Example:
+    store = MedlineStore("pubmed.sqlite")
+    store.ingest(sorted(Path("baseline").glob("*.xml.gz")) + sorted(Path("updates").glob("*.xml.gz")))
+    citation_tool = PubMedCitation(store=store)
+    citation_tool.get_pubmed_reference("33792783")
+"""
+import datetime
+import gzip
+import json
+import os
+import queue
+import sqlite3
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import Manager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+MONTHS = {m: i for i, m in enumerate(["jan", "feb", "mar", "apr", "may", "jun",
+                                       "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+
+# SQLite limits the number of bound parameters per statement
+SQL_CHUNK = 900
+
+# records per chunk sent back by a parsing worker, and chunks buffered per file
+RECORD_CHUNK = 1000
+QUEUED_CHUNKS = 4
+
+
+def _text(element: Optional[ET.Element]) -> Optional[str]:
+    """
+    Returns the full text of an element, including text inside inline markup such as <i>.
+    """
+    if element is None:
+        return None
+    text = "".join(element.itertext()).strip()
+    return text or None
+
+
+def _date(element: Optional[ET.Element]) -> Optional[datetime.date]:
+    """
+    Parses a PubMed date element (Year, Month as number or name, Day).
+    """
+    if element is None or element.findtext("Year") is None:
+        return None
+    try:
+        year  = int(element.findtext("Year"))
+        month = element.findtext("Month") or "1"
+        month = int(month) if month.isdigit() else MONTHS.get(month[:3].lower(), 1)
+        day   = int(element.findtext("Day") or 1)
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_article(article: ET.Element) -> Dict:
+    """
+    Converts a <PubmedArticle> element to a dict shaped like pymed's PubMedArticle.toDict().
+
+    The "xml" field is None: the element is discarded to keep memory constant.
+    """
+    citation = article.find("MedlineCitation")
+    info     = citation.find("Article")
+
+    authors = []
+    for author in info.findall("AuthorList/Author"):
+        authors.append({"lastname":    author.findtext("LastName"),
+                        "firstname":   author.findtext("ForeName"),
+                        "initials":    author.findtext("Initials"),
+                        "affiliation": _text(author.find("AffiliationInfo/Affiliation"))})
+
+    abstract_parts = [_text(part) for part in info.findall("Abstract/AbstractText")]
+
+    def labeled(label: str) -> Optional[str]:
+        return _text(info.find(f"Abstract/AbstractText[@Label='{label}']"))
+
+    publication_date = (_date(article.find("PubmedData/History/PubMedPubDate[@PubStatus='pubmed']"))
+                        or _date(info.find("Journal/JournalIssue/PubDate")))
+
+    return {"pubmed_id":        citation.findtext("PMID"),
+            "title":            _text(info.find("ArticleTitle")),
+            "abstract":         "\n".join(p for p in abstract_parts if p) or None,
+            "keywords":         [_text(k) for k in citation.findall("KeywordList/Keyword") if _text(k)],
+            "journal":          _text(info.find("Journal/Title")),
+            "publication_date": publication_date,
+            "authors":          authors,
+            "methods":          labeled("METHODS"),
+            "conclusions":      labeled("CONCLUSIONS"),
+            "results":          labeled("RESULTS"),
+            "copyrights":       _text(info.find("Abstract/CopyrightInformation")),
+            "doi":              _text(article.find("PubmedData/ArticleIdList/ArticleId[@IdType='doi']")),
+            "xml":              None}
+
+
+def iter_medline(path: Union[str, Path]) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """
+    Streams a MEDLINE XML file (optionally gzipped) at constant memory.
+
+    Parameters
+    ----------
+    path : str or Path
+        The MEDLINE XML file.
+
+    Yields
+    ------
+    tuple of (str, dict or None)
+        (pmid, record) for every article, and (pmid, None) for every deleted citation.
+    """
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rb") as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        for event, element in context:
+            if event != "end":
+                continue
+            if element.tag == "PubmedArticle":
+                record = parse_article(element)
+                yield record["pubmed_id"], record
+                root.clear()
+            elif element.tag == "DeleteCitation":
+                for pmid in element.findall("PMID"):
+                    yield pmid.text, None
+                root.clear()
+
+
+def _encode(record: Dict) -> str:
+    record = dict(record)
+    if record["publication_date"] is not None:
+        record["publication_date"] = record["publication_date"].isoformat()
+    return json.dumps(record, ensure_ascii=False)
+
+
+def _decode(payload: str) -> Dict:
+    record = json.loads(payload)
+    if record.get("publication_date"):
+        record["publication_date"] = datetime.date.fromisoformat(record["publication_date"])
+    return record
+
+
+def _parse_file(path: str, chunks: "queue.Queue", chunk_size: int) -> None:
+    """
+    Worker: streams one file to chunks as lists of (pmid, encoded record or None for deletions)
+    pairs, followed by None. Blocks while the queue is full.
+    """
+    try:
+        chunk = []
+        for pmid, record in iter_medline(path):
+            chunk.append((pmid, _encode(record) if record else None))
+            if len(chunk) >= chunk_size:
+                chunks.put(chunk)
+                chunk = []
+        if chunk:
+            chunks.put(chunk)
+    finally:
+        chunks.put(None)
+
+
+def _drain(chunks: "queue.Queue", future: Future) -> Iterator[List[Tuple[str, Optional[str]]]]:
+    """
+    Yields the chunks of one worker until its end marker, raising the worker's error if it died.
+    """
+    while True:
+        try:
+            chunk = chunks.get(timeout=1)
+        except queue.Empty:
+            if not future.done():
+                continue
+            # the worker may have queued its last chunks between the timeout and the check
+            try:
+                chunk = chunks.get_nowait()
+            except queue.Empty:
+                # the end marker is queued before a worker returns, so this is a crash
+                future.result()
+                raise RuntimeError("MEDLINE parsing worker exited without finishing its file")
+        if chunk is None:
+            future.result()
+            return
+        yield chunk
+
+
+class MedlineStore:
+    """
+    Indexed local store of PubMed records.
+
+    Attributes
+    ----------
+    db_path : Path
+        The SQLite database file.
+    conn : sqlite3.Connection
+        The connection to the database.
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        """
+        Parameters
+        ----------
+        db_path : str or Path
+            The SQLite database file; it is created if it does not exist.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS articles (pmid TEXT PRIMARY KEY, record TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS ingested_files (name TEXT PRIMARY KEY)")
+        self.conn.commit()
+
+    def ingest(self, paths: Iterable[Union[str, Path]], num_workers: int = None,
+               chunk_size: int = RECORD_CHUNK) -> int:
+        """
+        Loads baseline and update files, parsing them in parallel.
+
+        Files are applied in the given order, so pass the baseline first and updates in
+        publication order: later versions of a PMID replace earlier ones, and DeleteCitation
+        entries remove them. Files already ingested (by name) are skipped. Each file is applied
+        in one transaction, so a file that fails to parse leaves the store unchanged.
+
+        Parameters
+        ----------
+        paths : list of str or Path
+            MEDLINE XML files, gzipped or not.
+        num_workers : int, optional
+            Number of parsing processes (default is the CPU count).
+        chunk_size : int, optional
+            Number of records a worker sends back at a time (default is RECORD_CHUNK).
+
+        Returns
+        -------
+        int
+            The number of articles written.
+        """
+        done        = {row[0] for row in self.conn.execute("SELECT name FROM ingested_files")}
+        paths       = iter([str(p) for p in paths if Path(p).name not in done])
+        num_workers = num_workers or os.cpu_count() or 1
+
+        written = 0
+        with Manager() as manager, ProcessPoolExecutor(max_workers=num_workers) as executor:
+            def submit(path: str) -> Tuple[str, "queue.Queue", Future]:
+                chunks = manager.Queue(maxsize=QUEUED_CHUNKS)
+                return path, chunks, executor.submit(_parse_file, path, chunks, chunk_size)
+
+            # files are applied in input order, which update semantics depend on; the workers
+            # of later files block on their full queues until their turn comes
+            in_flight = deque(submit(path) for path in islice(paths, num_workers))
+            while in_flight:
+                path, chunks, future = in_flight.popleft()
+                next_path = next(paths, None)
+                if next_path is not None:
+                    in_flight.append(submit(next_path))
+
+                with self.conn:
+                    for entries in _drain(chunks, future):
+                        self.conn.executemany("INSERT OR REPLACE INTO articles VALUES (?, ?)",
+                                              [(pmid, payload) for pmid, payload in entries if payload])
+                        self.conn.executemany("DELETE FROM articles WHERE pmid = ?",
+                                              [(pmid,) for pmid, payload in entries if payload is None])
+                        written += sum(payload is not None for _, payload in entries)
+                    self.conn.execute("INSERT INTO ingested_files VALUES (?)", (Path(path).name,))
+        return written
+
+    def get(self, pmid: str) -> Optional[Dict]:
+        """
+        Returns the record of one PMID, or None if it is not in the store.
+        """
+        row = self.conn.execute("SELECT record FROM articles WHERE pmid = ?", (str(pmid),)).fetchone()
+        return _decode(row[0]) if row else None
+
+    def get_many(self, pmids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Returns the records of many PMIDs, keyed by PMID; missing PMIDs are left out.
+        """
+        pmids   = [str(p) for p in pmids]
+        records = {}
+        for start in range(0, len(pmids), SQL_CHUNK):
+            chunk = pmids[start:start + SQL_CHUNK]
+            query = f"SELECT pmid, record FROM articles WHERE pmid IN ({','.join('?' * len(chunk))})"
+            for pmid, payload in self.conn.execute(query, chunk):
+                records[pmid] = _decode(payload)
+        return records
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def __contains__(self, pmid: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM articles WHERE pmid = ?", (str(pmid),)).fetchone() is not None
+
+    def close(self) -> None:
+        self.conn.close()
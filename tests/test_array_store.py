@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from fileio.image.array_store import ImageArrayStore  # noqa: E402
+
+
+def _write_image(path, value, shape=(16, 24, 3)):
+    cv2.imwrite(str(path), np.full(shape, value, dtype=np.uint8))
+    return path
+
+
+@pytest.fixture
+def images(tmp_path):
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    return [_write_image(image_dir / f"{i}.png", i * 10) for i in range(5)]
+
+
+def test_add_and_get(tmp_path, images):
+    store = ImageArrayStore(tmp_path / "store")
+    assert store.add(images, num_workers=2) == 5
+    assert store.add(images) == 0
+    assert len(store) == 5 and images[0] in store
+
+    img = store[images[3]]
+    assert img.shape == (16, 24, 3) and (img == 30).all()
+    assert not img.flags.writeable
+
+    # a second handle, as another process would open it, sees the same entries
+    assert (ImageArrayStore(tmp_path / "store")[images[4]] == 40).all()
+
+
+def test_stale_entry_is_redecoded(tmp_path, images):
+    store = ImageArrayStore(tmp_path / "store")
+    store.add(images)
+
+    _write_image(images[0], 255, shape=(8, 8, 3))
+    st = os.stat(images[0])
+    os.utime(images[0], ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    img = store[images[0]]
+    assert img.shape == (8, 8, 3) and (img == 255).all()
+
+
+def test_compact_by_another_handle(tmp_path, images):
+    reader = ImageArrayStore(tmp_path / "store")
+    reader.add(images)
+    assert (reader[images[1]] == 10).all()
+
+    writer = ImageArrayStore(tmp_path / "store")
+    _write_image(images[0], 200)
+    st = os.stat(images[0])
+    os.utime(images[0], ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    writer.add(images)
+    size = writer.data_path.stat().st_size
+    writer.compact()
+
+    assert writer.data_path.stat().st_size < size
+    assert len(list((tmp_path / "store").glob("images.*.bin"))) == 1
+    # the reader's index and mapping predate the compaction
+    for i, path in enumerate(images):
+        assert (reader[path] == (200 if i == 0 else i * 10)).all()
+
+
+def test_add_bounds_decodes_in_flight(tmp_path, monkeypatch):
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    images = [_write_image(image_dir / f"{i}.png", i) for i in range(20)]
+    store = ImageArrayStore(tmp_path / "store")
+
+    decode = store._decode
+    ahead = []
+
+    def counting_decode(key):
+        # images decoded or being decoded that the writer has not stored yet
+        ahead.append(len(ahead) + 1 - len(store._index))
+        return decode(key)
+
+    monkeypatch.setattr(store, "_decode", counting_decode)
+    assert store.add(images, num_workers=1) == 20
+    assert max(ahead) <= 3
+
+
+def test_failed_add_leaves_store_unchanged(tmp_path, images):
+    store = ImageArrayStore(tmp_path / "store")
+    store.add(images[:2])
+    size = store.data_path.stat().st_size
+    index = store.index_path.read_bytes()
+
+    broken = images[0].parent / "broken.png"
+    broken.write_bytes(b"not an image")
+    with pytest.raises(Exception):
+        store.add(images[2:4] + [broken] + images[4:], num_workers=1)
+
+    assert store.data_path.stat().st_size == size
+    assert store.index_path.read_bytes() == index
+    assert len(store) == 2 and images[2] not in store
+    assert store.add(images[2:]) == 3
+    assert (store[images[4]] == 40).all()
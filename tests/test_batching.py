@@ -0,0 +1,67 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from fileio.image.batching import BatchPreprocessor  # noqa: E402
+from fileio.image.batching import IMAGENET_MEAN  # noqa: E402
+from fileio.image.batching import IMAGENET_STD  # noqa: E402
+
+
+@pytest.fixture
+def image_files(tmp_path):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"{i}.png"
+        cv2.imwrite(str(path), rng.integers(0, 256, (40 + i, 30, 3), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def _naive(path, size, channels_first):
+    image = cv2.resize(cv2.imread(str(path)), size[::-1], interpolation=cv2.INTER_AREA)
+    image = (image[..., ::-1].astype(np.float32) / 255 - IMAGENET_MEAN) / IMAGENET_STD
+    return image.transpose(2, 0, 1) if channels_first else image
+
+
+@pytest.mark.parametrize("channels_first", [False, True])
+def test_batches_match_naive_preprocessing(image_files, channels_first):
+    preprocessor = BatchPreprocessor((16, 12), batch_size=2, channels_first=channels_first,
+                                     mean=IMAGENET_MEAN, std=IMAGENET_STD, num_workers=2)
+    batches = [(batch.copy(), paths) for batch, paths in preprocessor.iter_batches(image_files)]
+
+    assert [len(paths) for _, paths in batches] == [2, 2, 1]
+    batch = np.concatenate([batch for batch, _ in batches])
+    expected = np.stack([_naive(path, (16, 12), channels_first) for path in image_files])
+    assert batch.dtype == np.float32
+    np.testing.assert_allclose(batch, expected, atol=1e-5)
+
+
+def test_grayscale_and_drop_last(image_files):
+    preprocessor = BatchPreprocessor((8, 8), batch_size=2, grayscale=True, drop_last=True)
+    shapes = [batch.shape for batch, _ in preprocessor.iter_batches(image_files)]
+    assert shapes == [(2, 8, 8, 1), (2, 8, 8, 1)]
+    assert list(BatchPreprocessor((8, 8), batch_size=8, drop_last=True).iter_batches(image_files)) == []
+
+
+def test_next_batch_reuses_the_buffer_of_the_one_before(image_files):
+    batches = BatchPreprocessor((8, 8), batch_size=1).iter_batches(image_files)
+    first, _ = next(batches)
+    kept = first.copy()
+    second, _ = next(batches)
+    # the third batch is being written into the first one's buffer by now
+    assert not np.shares_memory(first, second)
+    third, _ = next(batches)
+    assert np.shares_memory(first, third)
+    assert not np.array_equal(first, kept)
+
+
+def test_skip_errors(image_files, tmp_path):
+    files = [image_files[0], tmp_path / "missing.png"]
+    with pytest.raises(FileNotFoundError):
+        list(BatchPreprocessor((8, 8)).iter_batches(files))
+
+    (batch, paths), = BatchPreprocessor((8, 8), skip_errors=True).iter_batches(files)
+    assert paths == [image_files[0], None]
+    assert not batch[1].any()
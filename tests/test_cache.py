@@ -0,0 +1,74 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from fileio.cache import file_cache  # noqa: E402
+from fileio.cache import ResultCache  # noqa: E402
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_text("data")
+    return path
+
+
+def test_large_arrays_differing_in_the_middle_get_distinct_keys(tmp_path, input_file):
+    calls = []
+
+    @file_cache(cache_dir=tmp_path / "cache")
+    def weighted_sum(path, weights):
+        calls.append(1)
+        return float(weights.sum())
+
+    weights = np.arange(2000, dtype=np.float64)
+    changed = weights.copy()
+    changed[1000] = -1
+
+    assert weighted_sum(input_file, weights) == 1999000.0
+    assert weighted_sum(input_file, changed) == 1999000.0 - 1001
+    assert weighted_sum(input_file, weights) == 1999000.0
+    assert len(calls) == 2
+
+
+def test_unhashable_arguments_are_not_cached(tmp_path, input_file):
+    calls = []
+
+    @file_cache(cache_dir=tmp_path / "cache")
+    def apply(path, fn):
+        calls.append(1)
+        return fn(2)
+
+    assert apply(input_file, lambda x: x * 2) == 4
+    assert apply(input_file, lambda x: x * 2) == 4
+    assert len(calls) == 2
+
+
+def test_unstorable_results_are_returned_uncached(tmp_path, input_file):
+    calls = []
+
+    @file_cache(cache_dir=tmp_path / "cache")
+    def lines(path):
+        calls.append(1)
+        return (line for line in path.read_text().splitlines())
+
+    assert list(lines(input_file)) == ["data"]
+    assert list(lines(input_file)) == ["data"]
+    assert len(calls) == 2
+    assert not [p for p in (tmp_path / "cache").rglob("*") if p.is_file()]
+
+
+def test_put_keeps_running_total_and_evicts_lru(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / "cache", max_bytes=3 * 1100)
+    scans = []
+    original_scan = cache._scan_size
+    monkeypatch.setattr(cache, "_scan_size", lambda: scans.append(1) or original_scan())
+
+    for i in range(3):
+        cache.put(f"{i:02d}" * 8, np.zeros(1000, np.uint8))
+    assert len(scans) == 1
+
+    cache.put("ff" * 8, np.zeros(1000, np.uint8))
+    assert cache.get("00" * 8) is None
+    assert cache.get("ff" * 8) is not None
+    assert cache._total_bytes <= cache.max_bytes
@@ -0,0 +1,30 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pymed")
+
+from pubmed.citation_tools import PubMedCitation  # noqa: E402
+
+
+def test_citation_with_collective_and_partial_authors():
+    article = SimpleNamespace(
+        title="A title.",
+        authors=[
+            {"lastname": "Doe", "firstname": "Jane", "initials": "J"},
+            {"lastname": "Roe", "firstname": "Richard", "initials": None},
+            {"lastname": "Poe", "firstname": None, "initials": None},
+            {"lastname": None, "firstname": None, "initials": None},
+        ],
+        journal="Nature.",
+        publication_date=datetime.date(2020, 3, 1),
+        doi="10.1/abc",
+    )
+    citation = PubMedCitation()._parse_citation(article)
+    assert citation == "J. Doe, R. Roe, Poe. A title. Nature. 2020. doi: 10.1/abc"
+
+
+def test_citation_without_authors():
+    article = SimpleNamespace(title="T", authors=[], journal="J", publication_date=None)
+    assert PubMedCitation()._parse_citation(article) == "No authors. T. J. Unknown Date."
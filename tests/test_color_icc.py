@@ -0,0 +1,97 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from PIL import ImageCms  # noqa: E402
+
+from processing.image import color_icc  # noqa: E402
+from processing.image.color_icc import apply_icc_inplace  # noqa: E402
+from processing.image.color_icc import icc_profile_hash  # noqa: E402
+from processing.image.color_icc import ICCTransformCache  # noqa: E402
+
+
+SRGB_ICC = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+LAB_ICC = ImageCms.ImageCmsProfile(ImageCms.createProfile("LAB")).tobytes()
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_cache():
+    color_icc._TRANSFORM_CACHE.clear()
+    yield
+    color_icc._TRANSFORM_CACHE.clear()
+
+
+def _image(channels=3):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(8, 12, channels), dtype=np.uint8)
+
+
+def test_cache_key_is_profile_digest_and_mode():
+    cache = ICCTransformCache(maxsize=2)
+    first = cache.get(SRGB_ICC)
+    assert cache.get(bytes(SRGB_ICC)) is first
+    assert cache.get(SRGB_ICC, mode="RGBA") is not first
+    assert cache.cache_info() == {"hits": 1, "misses": 2, "maxsize": 2, "currsize": 2}
+    assert icc_profile_hash(SRGB_ICC) == icc_profile_hash(bytes(SRGB_ICC))
+    assert icc_profile_hash(SRGB_ICC) != icc_profile_hash(LAB_ICC)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ICCTransformCache(maxsize=1)
+    cache.get(SRGB_ICC)
+    cache.get(SRGB_ICC, mode="RGBA")
+    cache.get(SRGB_ICC)
+    assert cache.cache_info()["misses"] == 3 and cache.cache_info()["currsize"] == 1
+
+    cache.clear()
+    assert cache.cache_info() == {"hits": 0, "misses": 0, "maxsize": 1, "currsize": 0}
+
+
+def test_non_rgb_profiles_are_skipped():
+    cache = ICCTransformCache()
+    assert cache.get(LAB_ICC) is None
+    assert cache.get(b"not an icc profile") is None
+    # the skip is cached, the profile is not parsed again
+    assert cache.get(LAB_ICC) is None
+    assert cache.cache_info()["hits"] == 1
+
+    img = _image()
+    assert (apply_icc_inplace(img.copy(), LAB_ICC) == img).all()
+
+
+def test_srgb_profile_keeps_pixels():
+    img = _image()
+    out = apply_icc_inplace(img.copy(), SRGB_ICC)
+    assert np.abs(out.astype(int) - img).max() <= 1
+
+
+def test_bgr_view_is_written_in_place(monkeypatch):
+    # a fake transform that saturates red, so the channel it lands in is visible
+    def apply_transform(pil_img, transform, inPlace=False):
+        pixels = np.array(pil_img)
+        pixels[..., 0] = 255
+        pil_img.frombytes(pixels.tobytes())
+
+    monkeypatch.setattr(color_icc.ImageCms, "applyTransform", apply_transform)
+
+    img = _image(channels=4)
+    expected = img.copy()
+    expected[..., 2] = 255
+
+    out = apply_icc_inplace(img, SRGB_ICC, channel_order="BGR")
+    assert out is img
+    assert (img == expected).all()
+
+    rgb = _image()
+    apply_icc_inplace(rgb, SRGB_ICC, channel_order="RGB")
+    assert (rgb[..., 0] == 255).all() and (rgb[..., 1:] == _image()[..., 1:]).all()
+
+
+def test_rejects_invalid_images():
+    with pytest.raises(ValueError, match="HxWx3"):
+        apply_icc_inplace(np.zeros((4, 4), np.uint8), SRGB_ICC)
+    with pytest.raises(ValueError, match="uint8"):
+        apply_icc_inplace(np.zeros((4, 4, 3), np.uint16), SRGB_ICC)
+    with pytest.raises(ValueError, match="channel order"):
+        apply_icc_inplace(_image(), SRGB_ICC, channel_order="GBR")
@@ -0,0 +1,67 @@
+import shutil
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("pandas")
+
+from fileio.image.dedup import BKTree  # noqa: E402
+from fileio.image.dedup import DuplicateIndex  # noqa: E402
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    rng = np.random.default_rng(0)
+    base = cv2.GaussianBlur(rng.integers(0, 256, (128, 128), dtype=np.uint8), (15, 15), 0)
+    cv2.imwrite(str(tmp_path / "a.png"), base)
+    shutil.copy(tmp_path / "a.png", tmp_path / "a_copy.png")
+    cv2.imwrite(str(tmp_path / "a_brighter.png"), cv2.add(base, 3))
+    cv2.imwrite(str(tmp_path / "b.png"), rng.integers(0, 256, (128, 128), dtype=np.uint8))
+    return tmp_path
+
+
+def test_bktree_search():
+    tree = BKTree()
+    for value, item in [(0b0000, "a"), (0b0001, "b"), (0b0111, "c"), (0b1111, "d"), (0b0001, "e")]:
+        tree.add(value, item)
+    assert len(tree) == 5
+    assert sorted(tree.search(0b0000, 1)) == [(0, "a"), (1, "b"), (1, "e")]
+    assert sorted(tree.search(0b1111, 0)) == [(0, "d")]
+
+
+def test_dedup_keeps_one_image_per_cluster(image_dir):
+    index = DuplicateIndex()
+    paths = [str(image_dir / name) for name in ("a.png", "b.png", "a_copy.png", "a_brighter.png")]
+    # the same file through another path is one image
+    paths.append(str(image_dir / ".." / image_dir.name / "b.png"))
+
+    assert index.add(paths) == 4
+    assert index.clusters() == [sorted(str(image_dir / n) for n in ("a.png", "a_copy.png", "a_brighter.png"))]
+    assert index.dedup(paths) == paths[:2]
+
+    report = index.report()
+    assert report["is_representative"].sum() == 2
+    assert set(report.loc[report["cluster_id"] == -1, "path"]) == {str(image_dir / "b.png")}
+
+
+def test_add_drops_deleted_and_rehashes_changed_files(image_dir):
+    index = DuplicateIndex()
+    paths = sorted(str(p) for p in image_dir.glob("*.png"))
+    assert index.add(paths) == 4
+    assert index.add(paths) == 0
+
+    (image_dir / "a_copy.png").unlink()
+    cv2.imwrite(str(image_dir / "b.png"), np.zeros((64, 64), np.uint8))
+    assert index.add(paths) == 1
+    assert str(image_dir / "a_copy.png") not in index.records
+    assert index.records[str(image_dir / "b.png")]["size"] == (image_dir / "b.png").stat().st_size
+
+
+def test_near_duplicate_clusters_are_not_chained():
+    index = DuplicateIndex()
+    # b is 3 bits from a, c is 3 bits from b but 6 from a
+    for path, value in [("a", 0), ("b", 0b111), ("c", 0b111111)]:
+        index.records[path] = {"path": path, "sha": path, "phash": value}
+    assert index.clusters(max_distance=4) == [["a", "b"]]
+    assert index.clusters(max_distance=6) == [["a", "b", "c"]]
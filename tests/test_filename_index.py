@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from fileio.image.filename_index import FilenameIndex  # noqa: E402
+from fileio.image.filename_regex import get_filename_pattern  # noqa: E402
+from fileio.image.filename_regex import parse_filename  # noqa: E402
+
+
+NAMES = [
+    "7_0a1b2c3d_P-01_split-train_tumor.png",
+    "8_0a1b2c3e_P-02_split-test_normal.png",
+    "9_0a1b2c3f_P-03_split-train_normal.jpg",
+]
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    root = tmp_path / "images"
+    (root / "sub").mkdir(parents=True)
+    for name in NAMES[:2]:
+        (root / name).write_bytes(b"x")
+    (root / "sub" / NAMES[2]).write_bytes(b"x")
+    (root / "notes.txt").write_text("not an image")
+    (root / "unmatched.png").write_bytes(b"x")
+    return root
+
+
+def test_parse_filename():
+    fields = parse_filename(NAMES[0], "base_repo")
+    assert fields["index"] == "7" and fields["split"] == "train"
+    assert fields["label_name"] == "tumor" and fields["ext"] == "png"
+    assert parse_filename("unmatched.png", "base_repo") is None
+    # unnamed groups are returned by position
+    assert parse_filename("a-12.png", r"(\w)-(\d+)") == {"0": "a", "1": "12"}
+
+
+def test_get_filename_pattern_ignore_case():
+    name = NAMES[0].replace("train", "TRAIN")
+    assert not get_filename_pattern("base_repo").search(name)
+    assert get_filename_pattern("base_repo", ignore_case=True).search(name)
+
+
+def test_refresh_and_query(tmp_path, image_dir):
+    index = FilenameIndex(tmp_path / "index.parquet")
+    table = index.refresh(image_dir)
+    assert table.num_rows == 4
+    assert table.schema.field("index").type == "int64"
+
+    df = index.query(split="train")
+    assert sorted(df["filename"]) == sorted([NAMES[0], NAMES[2]])
+    assert index.query(split=["test", "train"], label_name="normal")["index"].tolist() in ([8, 9], [9, 8])
+    assert "notes.txt" not in index.query(columns=["filename"])["filename"].tolist()
+
+    with pytest.raises(ValueError, match="Unknown index fields"):
+        index.query(stain="HE")
+
+
+def test_query_coerces_integer_fields(tmp_path, image_dir):
+    index = FilenameIndex(tmp_path / "index.parquet")
+    index.refresh(image_dir)
+
+    assert index.query(index=7)["filename"].tolist() == [NAMES[0]]
+    assert index.query(index="7")["filename"].tolist() == [NAMES[0]]
+    assert sorted(index.query(index=["8", 9])["filename"]) == sorted(NAMES[1:])
+    assert len(index.query(size="1")) == 4
+
+    with pytest.raises(ValueError, match="index is an integer"):
+        index.query(index="seven")
+
+
+def test_incremental_refresh(tmp_path, image_dir, monkeypatch):
+    index = FilenameIndex(tmp_path / "index.parquet")
+    index.refresh(image_dir)
+
+    parsed = []
+    parse = index.parse
+    monkeypatch.setattr(index, "parse", lambda name: parsed.append(name) or parse(name))
+
+    # unchanged files are not parsed again
+    assert index.refresh(image_dir).num_rows == 4
+    assert parsed == []
+
+    # modified, added and deleted files
+    path = image_dir / NAMES[0]
+    path.write_bytes(b"xyz")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    (image_dir / "10_0a1b2c40_P-04_split-val_tumor.png").write_bytes(b"x")
+    (image_dir / NAMES[1]).unlink()
+
+    table = index.refresh(image_dir)
+    assert sorted(parsed) == sorted([NAMES[0], "10_0a1b2c40_P-04_split-val_tumor.png"])
+    assert table.num_rows == 4
+    assert index.query(index=7)["size"].tolist() == [3]
+    assert index.query(index=8).empty
+    assert index.query(split="val")["index"].tolist() == [10]
+
+
+def test_changed_conventions_rebuild_index(tmp_path, image_dir):
+    FilenameIndex(tmp_path / "index.parquet").refresh(image_dir)
+
+    index = FilenameIndex(tmp_path / "index.parquet", ["filename_2", "base_repo"])
+    table = index.refresh(image_dir)
+    assert "magnification" in table.schema.names
+    assert index.query(convention="base_repo", split="train")["index"].tolist() in ([7, 9], [9, 7])
+
+
+def test_whole_slide_images_are_indexed(tmp_path, image_dir):
+    (image_dir / "AB-21-12345_part-A1_HE_20x_001.svs").write_bytes(b"x")
+    (image_dir / "AB-21-12345_part-A1_HE_40x_001.ndpi").write_bytes(b"x")
+    index = FilenameIndex(tmp_path / "index.parquet", ["filename_2", "base_repo"])
+    index.refresh(image_dir)
+
+    slides = index.query(convention="filename_2")
+    assert slides["filename"].tolist() == ["AB-21-12345_part-A1_HE_20x_001.svs"]
+    assert slides[["id", "part", "magnification", "ext"]].values.tolist() == [
+        ["AB-21-12345", "A1", "20x", "svs"]
+    ]
+    # the .ndpi file does not match the conventions, but it is indexed
+    assert index.query(columns=["filename"], filename="AB-21-12345_part-A1_HE_40x_001.ndpi").shape == (1, 1)
@@ -0,0 +1,80 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+Image = pytest.importorskip("PIL.Image")
+
+from fileio.image.writers import cv_writer  # noqa: E402
+from fileio.image.writers import encode_png  # noqa: E402
+from fileio.image.writers import ParallelImageWriter  # noqa: E402
+
+
+@pytest.fixture
+def image():
+    rgb = np.zeros((32, 48, 3), np.uint8)
+    rgb[..., 0] = 255
+    rgb[8:16, 8:16] = (0, 128, 255)
+    return rgb
+
+
+def test_cv_writer_round_trip(tmp_path, image):
+    path = tmp_path / "out.png"
+    cv_writer(path, image, {"label": "tumor", "score": 0.5, "empty": "", "tags": ["a", "b"]})
+    with Image.open(path) as png:
+        assert png.text["label"] == "tumor" and png.text["score"] == "0.5"
+        assert png.text["tags"] == "a, b" and "empty" not in png.text
+        assert "Last_updated" in png.text
+        np.testing.assert_array_equal(np.asarray(png), image)
+
+
+def test_cv_writer_follows_the_suffix(tmp_path, image):
+    cv_writer(tmp_path / "out.jpg", image, {"label": "tumor"})
+    assert (tmp_path / "out.jpg").read_bytes()[:3] == b"\xff\xd8\xff"
+    decoded = cv2.cvtColor(cv2.imread(str(tmp_path / "out.jpg")), cv2.COLOR_BGR2RGB)
+    assert np.abs(decoded.astype(int) - image).mean() < 5
+
+    cv_writer(tmp_path / "out.tif", image[..., ::-1], {}, is_bgr=True)
+    np.testing.assert_array_equal(cv2.imread(str(tmp_path / "out.tif"))[..., ::-1], image)
+
+    with pytest.raises(ValueError, match="Cannot encode"):
+        cv_writer(tmp_path / "out.unknown", image, {})
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.jpg", "out.tif"]
+
+
+def test_encode_png_keeps_maximum_compression_by_default(image):
+    assert encode_png(image) == encode_png(image, compression=9)
+    with pytest.raises(ValueError):
+        encode_png(image, compression=10)
+    with pytest.raises(ValueError):
+        encode_png(image.astype(np.float32))
+
+
+def test_parallel_writer(tmp_path, image):
+    with ParallelImageWriter(num_workers=2, queue_size=2) as writer:
+        for i in range(10):
+            writer.submit(tmp_path / f"{i}.png", image, {"index": i})
+        writer.join()
+        assert writer.written == 10
+
+    for i in range(10):
+        with Image.open(tmp_path / f"{i}.png") as png:
+            assert png.text["index"] == str(i)
+
+    with pytest.raises(RuntimeError, match="closed"):
+        writer.submit(tmp_path / "late.png", image, {})
+    writer.close()
+
+
+def test_parallel_writer_reports_failures(tmp_path, image):
+    with pytest.raises(RuntimeError, match="Failed to write 1 images"):
+        with ParallelImageWriter(num_workers=1) as writer:
+            writer.submit(tmp_path / "bad.png", image.astype(np.float32), {})
+            writer.submit(tmp_path / "good.png", image, {})
+    assert writer.written == 1
+
+
+def test_parallel_writer_does_not_mask_the_original_error(tmp_path, image):
+    with pytest.raises(KeyError):
+        with ParallelImageWriter(num_workers=1) as writer:
+            writer.submit(tmp_path / "bad.png", image.astype(np.float32), {})
+            raise KeyError("producer failed")
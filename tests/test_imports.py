@@ -0,0 +1,75 @@
+"""Import-time regression tests for fileio.
+
+Every check runs in a fresh interpreter so modules imported by other tests do
+not hide an eager import.
+"""
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+HEAVY_MODULES = ("pandas", "pyarrow", "cv2", "PIL")
+REPO_PACKAGES = {"base_repo", "fileio", "llms", "processing", "profiling", "pubmed"}
+
+# modules that must not pull in any heavy dependency just by being imported
+LIGHT_MODULES = [
+    "fileio.text",
+    "fileio.text.readers",
+    "fileio.text.writers",
+    "fileio.dataframe.readers",
+    "fileio.dataframe.writers",
+    "fileio.image.readers",
+    "fileio.image.writers",
+    "fileio.image.filename_regex",
+    "fileio.cache",
+]
+
+# every fileio submodule must be importable on its own
+ALL_MODULES = sorted(
+    ".".join(path.relative_to(SRC_DIR).with_suffix("").parts).removesuffix(".__init__")
+    for path in (SRC_DIR / "fileio").rglob("*.py")
+)
+
+# generous budgets: the point is catching a heavy import, not timing noise
+MAX_IMPORT_SECONDS = 1.0
+MAX_IMPORT_MIB = 40
+
+
+def _import_in_subprocess(module: str) -> dict:
+    code = (
+        "import json, resource, sys, time\n"
+        f"sys.path.insert(0, {str(SRC_DIR)!r})\n"
+        "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - start\n"
+        "mib = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) / 1024\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'seconds': seconds, 'mib': mib, 'heavy': heavy}))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        # a missing third-party dependency is an environment problem, a missing
+        # module of this repository is a broken import
+        missing = re.search(r"No module named '([\w.]+)'", result.stderr)
+        if missing and missing.group(1).split(".")[0] not in REPO_PACKAGES:
+            pytest.skip(f"{missing.group(1)} is not installed")
+        raise AssertionError(f"import {module} failed:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", ALL_MODULES)
+def test_module_imports_on_its_own(module):
+    _import_in_subprocess(module)
+
+
+@pytest.mark.parametrize("module", LIGHT_MODULES)
+def test_no_heavy_imports(module):
+    result = _import_in_subprocess(module)
+    assert result["heavy"] == [], f"{module} eagerly imports {result['heavy']}"
+    assert result["seconds"] < MAX_IMPORT_SECONDS, result
+    assert result["mib"] < MAX_IMPORT_MIB, result
@@ -0,0 +1,44 @@
+import gzip
+import json
+
+import pytest
+
+from fileio.text.readers import json_batch_loader
+from fileio.text.readers import json_stream_loader
+
+
+RECORDS = [{"id": i, "text": "é\"]}" * (i % 4), "score": i / 7} for i in range(1000)]
+
+
+@pytest.fixture
+def nested_json(tmp_path):
+    filepath = tmp_path / "export.json.gz"
+    with gzip.open(filepath, "wt") as f:
+        json.dump({"meta": {"items": [1, 2]}, "data": {"skip": "x", "records": RECORDS}}, f)
+    return filepath
+
+
+@pytest.mark.parametrize("use_ijson", [False, True])
+def test_stream_nested_array(nested_json, use_ijson):
+    if use_ijson:
+        pytest.importorskip("ijson")
+    records = json_stream_loader(nested_json, path="data.records", chunk_size=64, use_ijson=use_ijson)
+    assert list(records) == RECORDS
+
+
+def test_stream_top_level_array(tmp_path):
+    filepath = tmp_path / "array.json"
+    filepath.write_text(json.dumps(RECORDS))
+    assert list(json_stream_loader(filepath, chunk_size=7, use_ijson=False)) == RECORDS
+
+
+def test_stream_missing_key(nested_json):
+    with pytest.raises(KeyError):
+        list(json_stream_loader(nested_json, path="data.missing", use_ijson=False))
+
+
+def test_batch_loader(nested_json):
+    pytest.importorskip("pandas")
+    batches = list(json_batch_loader(nested_json, path="data.records", batch_size=300))
+    assert [len(df) for df in batches] == [300, 300, 300, 100]
+    assert batches[-1]["id"].iloc[-1] == 999
@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from fileio.dataframe.key_index import build_key_index  # noqa: E402
+from fileio.dataframe.key_index import KeyIndex  # noqa: E402
+
+
+@pytest.fixture
+def table(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "image_id": [f"img-{i:05d}" for i in rng.permutation(10_000)],
+        "score": rng.random(10_000),
+    })
+    build_key_index(df, "image_id", tmp_path / "meta.parquet", row_group_size=500)
+    return df, KeyIndex(tmp_path / "meta.parquet")
+
+
+def test_lookup_reads_only_needed_row_groups(table):
+    df, index = table
+    assert index.num_row_groups == 20
+    assert index.row_groups(["img-00000", "img-09999"]) == [0, 19]
+
+    keys = ["img-00042", "img-05000", "img-99999"]
+    rows = index.lookup(keys)
+    expected = df[df["image_id"].isin(keys)].sort_values("image_id")
+    assert rows["image_id"].tolist() == expected["image_id"].tolist()
+    assert rows["score"].tolist() == expected["score"].tolist()
+
+
+def test_lookup_columns_and_missing_keys(table):
+    _, index = table
+    assert list(index.lookup(["img-00001"], columns=["score"]).columns) == ["image_id", "score"]
+    assert index.lookup(["missing"]).empty
+    assert index.get("missing") is None
+
+
+def test_repeated_key_spanning_row_groups(tmp_path):
+    df = pd.DataFrame({"key": np.repeat(np.arange(10), 7), "value": np.arange(70)})
+    index = build_key_index(df, "key", tmp_path / "dup.parquet", row_group_size=5)
+    assert index.lookup([3])["value"].tolist() == list(range(21, 28))
+
+
+def test_rejects_files_without_index(tmp_path):
+    path = tmp_path / "plain.parquet"
+    pd.DataFrame({"key": [1, 2]}).to_parquet(path)
+    with pytest.raises(ValueError):
+        KeyIndex(path)
+
+
+def test_categorical_key(tmp_path):
+    df = pd.DataFrame({
+        "label": pd.Categorical(["b", "a", "c", "a", "b"]),
+        "value": np.arange(5),
+    })
+    index = build_key_index(df, "label", tmp_path / "cat.parquet", row_group_size=2)
+    rows = index.lookup(["a", "c"])
+    assert rows["label"].tolist() == ["a", "a", "c"]
+    assert rows["value"].tolist() == [1, 3, 2]
@@ -0,0 +1,132 @@
+import datetime
+import gzip
+import queue
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future
+
+import pytest
+
+from pubmed.medline_store import _drain
+from pubmed.medline_store import MedlineStore
+
+
+BASELINE = """<?xml version="1.0"?>
+<PubmedArticleSet>
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID Version="1">111</PMID>
+      <Article>
+        <Journal><JournalIssue><PubDate><Year>2020</Year><Month>Mar</Month></PubDate></JournalIssue>
+          <Title>Nature.</Title></Journal>
+        <ArticleTitle>A <i>first</i> title.</ArticleTitle>
+        <Abstract><AbstractText Label="METHODS">We did.</AbstractText>
+          <AbstractText Label="RESULTS">It worked.</AbstractText></Abstract>
+        <AuthorList><Author><LastName>Doe</LastName><ForeName>Jane</ForeName><Initials>J</Initials></Author></AuthorList>
+      </Article>
+      <KeywordList><Keyword>imaging</Keyword></KeywordList>
+    </MedlineCitation>
+    <PubmedData><ArticleIdList><ArticleId IdType="doi">10.1/abc</ArticleId></ArticleIdList></PubmedData>
+  </PubmedArticle>
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID Version="1">222</PMID>
+      <Article><Journal><Title>Other</Title></Journal><ArticleTitle>Old title</ArticleTitle></Article>
+    </MedlineCitation>
+  </PubmedArticle>
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID Version="1">333</PMID>
+      <Article><Journal><Title>Other</Title></Journal><ArticleTitle>Deleted</ArticleTitle></Article>
+    </MedlineCitation>
+  </PubmedArticle>
+</PubmedArticleSet>
+"""
+
+UPDATE = """<?xml version="1.0"?>
+<PubmedArticleSet>
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID Version="1">222</PMID>
+      <Article><Journal><Title>Other</Title></Journal><ArticleTitle>New title</ArticleTitle></Article>
+    </MedlineCitation>
+  </PubmedArticle>
+  <DeleteCitation><PMID Version="1">333</PMID></DeleteCitation>
+</PubmedArticleSet>
+"""
+
+
+def test_ingest_applies_updates_in_order(tmp_path):
+    baseline = tmp_path / "pubmed00n0001.xml.gz"
+    update   = tmp_path / "pubmed00n0002.xml.gz"
+    with gzip.open(baseline, "wt") as f:
+        f.write(BASELINE)
+    with gzip.open(update, "wt") as f:
+        f.write(UPDATE)
+
+    store = MedlineStore(tmp_path / "pubmed.sqlite")
+    assert store.ingest([baseline, update], num_workers=2) == 4
+    assert len(store) == 2
+    assert "333" not in store
+
+    record = store.get("111")
+    assert record["title"] == "A first title."
+    assert record["abstract"] == "We did.\nIt worked."
+    assert record["methods"] == "We did."
+    assert record["publication_date"] == datetime.date(2020, 3, 1)
+    assert record["authors"][0]["lastname"] == "Doe"
+    assert record["doi"] == "10.1/abc"
+    assert store.get_many(["222", "404"])["222"]["title"] == "New title"
+
+    # already ingested files are skipped
+    assert store.ingest([baseline, update]) == 0
+
+
+def test_ingest_streams_small_chunks_and_rolls_back_broken_files(tmp_path):
+    paths = []
+    for i, text in enumerate([BASELINE, UPDATE, BASELINE.replace("</PubmedArticleSet>", "<oops>")]):
+        paths.append(tmp_path / f"pubmed00n000{i}.xml")
+        paths[-1].write_text(text)
+
+    store = MedlineStore(tmp_path / "pubmed.sqlite")
+    with pytest.raises(ET.ParseError):
+        store.ingest(paths, num_workers=1, chunk_size=1)
+
+    # the first two files are committed, the broken one left nothing behind
+    assert sorted(row[0] for row in store.conn.execute("SELECT name FROM ingested_files")) == \
+        ["pubmed00n0000.xml", "pubmed00n0001.xml"]
+    assert len(store) == 2 and store.get("222")["title"] == "New title"
+
+
+class _LateQueue(queue.Queue):
+    """A queue whose items arrive right after the first get times out."""
+
+    def __init__(self, items):
+        super().__init__()
+        self._late = items
+
+    def get(self, block=True, timeout=None):
+        if self._late is not None:
+            for item in self._late:
+                self.put(item)
+            self._late = None
+            raise queue.Empty
+        return super().get(block, timeout)
+
+
+def test_drain_reads_chunks_queued_before_worker_finished():
+    future = Future()
+    future.set_result(None)
+    chunks = _LateQueue([[("1", "{}")], [("2", None)], None])
+    assert list(_drain(chunks, future)) == [[("1", "{}")], [("2", None)]]
+
+
+def test_drain_reports_crashed_worker():
+    future = Future()
+    future.set_exception(ValueError("worker died"))
+    with pytest.raises(ValueError, match="worker died"):
+        list(_drain(_LateQueue([[("1", "{}")]]), future))
+
+    future = Future()
+    future.set_result(None)
+    with pytest.raises(RuntimeError, match="without finishing"):
+        list(_drain(_LateQueue([]), future))
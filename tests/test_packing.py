@@ -0,0 +1,93 @@
+import json
+import re
+
+import pytest
+
+from llms.packing import PromptPacker
+
+SYSTEM_PROMPT = "Classify the sentiment."
+
+
+class CachedFakeLLM:
+    """Answers like a temperature-0 model behind the LLM cache: same request, same reply."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.cache = {}
+        self.requests = []
+
+    def simple_query(self, human_message, system_prompt=None):
+        self.requests.append((system_prompt, human_message))
+        key = (system_prompt, human_message)
+        if key not in self.cache:
+            self.cache[key] = self.reply(human_message, system_prompt)
+        return self.cache[key]
+
+
+def _ids(human_message):
+    return [int(i) for i in re.findall(r"^\[(\d+)\]", human_message, flags=re.MULTILINE)]
+
+
+def _answer_all(human_message, system_prompt):
+    return json.dumps([{"id": i, "answer": f"label-{i}"} for i in _ids(human_message)])
+
+
+def test_pack_respects_token_budget_and_item_limit():
+    packer = PromptPacker(None, SYSTEM_PROMPT, max_prompt_tokens=12, max_items=3,
+                          token_counter=lambda text: len(text.split()))
+    items = ["a", "b", "c", "d", "e f g h i j k", "l"]
+    # an item costs its word count, plus one for the index and one for the separator
+    assert packer.pack(list(range(6)), items) == [[0, 1, 2], [3, 4], [5]]
+    assert packer.pack(list(range(6)), items, max_items=1) == [[i] for i in range(6)]
+
+
+@pytest.mark.parametrize("response, expected", [
+    ('```json\n[{"id": 0, "answer": "pos"}, {"id": 1, "answer": "neg"}]\n```', {0: "pos", 1: "neg"}),
+    ('Here: [{"id": "1", "answer": {"score": 2}}]', {1: '{"score": 2}'}),
+    ('[{"id": 0, "answer": "a"}, {"id": 0, "answer": "b"}, {"id": 7, "answer": "c"}]', {0: "a"}),
+    ('[{"id": "x", "answer": "a"}, {"id": 1}, "junk"]', {}),
+    ("not json [", {}),
+    (None, {}),
+])
+def test_parse_answers(response, expected):
+    assert PromptPacker.parse_answers(response, [0, 1]) == expected
+
+
+def test_run_packs_items_and_keeps_order():
+    llm = CachedFakeLLM(_answer_all)
+    packer = PromptPacker(llm, SYSTEM_PROMPT, max_items=4)
+    assert packer.run([f"item {i}" for i in range(10)]) == [f"label-{i}" for i in range(10)]
+    assert len(llm.requests) == 3
+    report = packer.report()
+    assert report["requests"] == 3 and report["request_reduction"] == pytest.approx(0.7)
+
+
+def test_retries_send_different_requests():
+    def flaky(human_message, system_prompt):
+        # a bad first reply for any pack holding item 3, which the cache would replay forever
+        if 3 in _ids(human_message) and "retry" not in system_prompt:
+            return "Sorry, I cannot answer."
+        return _answer_all(human_message, system_prompt)
+
+    llm = CachedFakeLLM(flaky)
+    packer = PromptPacker(llm, SYSTEM_PROMPT, max_items=4, max_retries=1, fallback_single=False)
+    assert packer.run([f"item {i}" for i in range(6)]) == [f"label-{i}" for i in range(6)]
+    assert len(set(llm.requests)) == len(llm.requests)
+    # the retry re-sends items 0-3 in packs of at most 2
+    assert [_ids(message) for _, message in llm.requests[2:]] == [[0, 1], [2, 3]]
+    assert packer.stats["retried_items"] == 4
+
+
+def test_single_item_fallback():
+    def packed_never_parses(human_message, system_prompt):
+        return "no json" if system_prompt != SYSTEM_PROMPT else f"single: {human_message}"
+
+    llm = CachedFakeLLM(packed_never_parses)
+    packer = PromptPacker(llm, SYSTEM_PROMPT, max_retries=2)
+    assert packer.run(["a", "b"]) == ["single: a", "single: b"]
+    assert packer.stats["single_fallbacks"] == 2
+    assert len(set(llm.requests)) == len(llm.requests) == 5
+
+    packer = PromptPacker(CachedFakeLLM(packed_never_parses), SYSTEM_PROMPT,
+                          max_retries=0, fallback_single=False)
+    assert packer.run(["a", "b"]) == [None, None]
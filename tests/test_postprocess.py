@@ -0,0 +1,54 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from llms.postprocess import extract_json_blocks  # noqa: E402
+from llms.postprocess import normalize_labels  # noqa: E402
+from llms.postprocess import parse_json_blocks  # noqa: E402
+from llms.postprocess import postprocess_responses  # noqa: E402
+from llms.postprocess import strip_thinking_tokens  # noqa: E402
+
+
+@pytest.mark.parametrize("response, expected", [
+    ('```json\n{"label": "pos"}\n```', {"label": "pos"}),
+    ('See [1]. {"label": "neg"}', {"label": "neg"}),
+    ('```python\nprint(1)\n```\nAnswer: {"label": "pos"}', {"label": "pos"}),
+    ('```\n[1, 2]\n```', [1, 2]),
+    ("Scores: [0.1, 0.9]", [0.1, 0.9]),
+    ("{not json} and [neither", None),
+    ("no json here", None),
+    (None, None),
+])
+def test_parse_json_blocks(response, expected):
+    assert parse_json_blocks([response]) == [expected]
+
+
+def test_extract_json_blocks_returns_text_that_parses():
+    blocks = extract_json_blocks(['See [1]. {"a": 1}', "```python\nx = 1\n```", None])
+    assert blocks.to_pylist() == ['{"a": 1}', None, None]
+
+
+def test_strip_thinking_and_normalize_labels():
+    answers = strip_thinking_tokens(["<think>hmm\n</think> Positive. ", "<think></think>yes", None])
+    assert answers.to_pylist() == ["Positive.", "yes", None]
+    labels = normalize_labels(answers, ["positive", "negative"], aliases={"yes": "positive"})
+    assert labels.to_pylist() == ["positive", "positive", None]
+
+
+def test_normalize_labels_with_punctuated_and_non_ascii_labels():
+    answers = ["HER2+", "her2-.", "Grade 1/2", "n/a", "Négatif.", "NÉGATIF", "her2"]
+    vocabulary = ["HER2+", "HER2-", "grade 1/2", "N/A", "négatif"]
+    labels = normalize_labels(answers, vocabulary, aliases={"negative": "négatif"}, default="other")
+    assert labels.to_pylist() == ["HER2+", "HER2-", "grade 1/2", "N/A", "négatif", "négatif", "other"]
+
+    with pytest.raises(ValueError, match="ambiguous"):
+        normalize_labels(answers, ["N/A", "NA"])
+
+
+def test_postprocess_responses_label_field():
+    df = pd.DataFrame({"response": ['<think>x</think>See [2]. {"label": "Negative"}', "oops"]})
+    out = postprocess_responses(df, vocabulary=["positive", "negative"], label_field="label")
+    assert out["parsed_json"].tolist() == [{"label": "Negative"}, None]
+    assert out["label"].iloc[0] == "negative"
+    assert pd.isna(out["label"].iloc[1])
@@ -0,0 +1,169 @@
+import json
+import pstats
+import threading
+
+import pytest
+
+from profiling import hooks
+
+
+@pytest.fixture(autouse=True)
+def profiling():
+    was_enabled = hooks.is_enabled()
+    hooks.reset()
+    hooks.enable()
+    yield
+    hooks.reset()
+    hooks.enable()
+    if not was_enabled:
+        hooks.disable()
+
+
+def test_disabled_records_nothing():
+    hooks.disable()
+
+    @hooks.traced()
+    def work():
+        return 1
+
+    with hooks.span("outer") as s:
+        s.add_bytes(10)
+        hooks.count("hits")
+        assert work() == 1
+
+    assert hooks.stats() == {"spans": {}, "counters": {}}
+
+
+def test_nested_spans_in_chrome_trace(tmp_path):
+    with hooks.span("outer", batch=3):
+        with hooks.span("inner") as s:
+            s.add_bytes(100)
+        with hooks.span("inner") as s:
+            s.add_bytes(50)
+
+    spans = hooks.stats()["spans"]
+    assert spans["outer"]["calls"] == 1 and spans["outer"]["bytes"] == 0
+    assert spans["inner"]["calls"] == 2 and spans["inner"]["bytes"] == 150
+    assert spans["outer"]["total_s"] >= spans["inner"]["total_s"]
+
+    trace = json.loads(hooks.export_chrome_trace(tmp_path / "trace" / "trace.json").read_text())
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    # spans are recorded as they close, the outer one last
+    assert [e["name"] for e in events] == ["inner", "inner", "outer"]
+    assert {e["ph"] for e in events} == {"X"}
+    assert len({(e["pid"], e["tid"]) for e in events}) == 1
+
+    first, second, outer = events
+    assert outer["args"] == {"bytes": 0, "batch": 3}
+    assert first["args"] == {"bytes": 100} and second["args"] == {"bytes": 50}
+    # the viewer nests spans of one thread by their time ranges
+    assert first["ts"] + first["dur"] <= second["ts"]
+    for inner in (first, second):
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+
+def test_counters_and_report():
+    hooks.count("cache.hit")
+    hooks.count("cache.hit", 4)
+    hooks.count("cache.miss")
+
+    threads = [threading.Thread(target=lambda: [hooks.count("threads") for _ in range(1000)])
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert hooks.stats()["counters"] == {"cache.hit": 5, "cache.miss": 1, "threads": 4000}
+
+    with hooks.span("decode"):
+        pass
+    lines = hooks.report().splitlines()
+    assert lines[0].split() == ["span", "calls", "total_s", "mean_ms", "max_ms", "MiB"]
+    assert lines[1].split()[:2] == ["decode", "1"]
+    assert lines[2:] == [
+        f"{'cache.hit':<48} {5:>8}",
+        f"{'cache.miss':<48} {1:>8}",
+        f"{'threads':<48} {4000:>8}",
+    ]
+
+    hooks.reset()
+    assert hooks.stats() == {"spans": {}, "counters": {}}
+
+
+def test_traced_counts_calls_and_bytes(tmp_path):
+    source = tmp_path / "in.bin"
+    source.write_bytes(b"x" * 10)
+
+    @hooks.traced(bytes_in="src", bytes_out="dst")
+    def copy(src, dst):
+        dst.write_bytes(src.read_bytes() * 3)
+        return "done"
+
+    @hooks.traced(name="failing")
+    def fail():
+        raise RuntimeError("boom")
+
+    assert copy(source, tmp_path / "out.bin") == "done"
+    assert copy(src=source, dst=tmp_path / "out.bin") == "done"
+    with pytest.raises(RuntimeError):
+        fail()
+
+    spans = hooks.stats()["spans"]
+    name = f"{__name__}.test_traced_counts_calls_and_bytes.<locals>.copy"
+    assert spans[name]["calls"] == 2 and spans[name]["bytes"] == 2 * (10 + 30)
+    # a failed call is still recorded
+    assert spans["failing"]["calls"] == 1
+
+
+def test_max_events_bounds_exported_spans(tmp_path):
+    hooks.enable(max_events=2)
+    for _ in range(5):
+        with hooks.span("step"):
+            pass
+
+    assert hooks.stats()["spans"]["step"]["calls"] == 5
+    trace = json.loads(hooks.export_chrome_trace(tmp_path / "trace.json").read_text())
+    assert len(trace["traceEvents"]) == 2
+
+
+def test_export_otlp_json(tmp_path):
+    with hooks.span("query", model="gpt", cached=True, retries=2):
+        pass
+
+    payload = json.loads(hooks.export_otlp_json(tmp_path / "otlp.json", "tests").read_text())
+    resource = payload["resourceSpans"][0]
+    assert resource["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "tests"}}
+    ]
+    (span,) = resource["scopeSpans"][0]["spans"]
+    assert span["name"] == "query"
+    assert len(span["traceId"]) == 32 and len(span["spanId"]) == 16
+    assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+
+    attributes = {a["key"]: a["value"] for a in span["attributes"]}
+    assert attributes["model"] == {"stringValue": "gpt"}
+    assert attributes["cached"] == {"boolValue": True}
+    assert attributes["retries"] == {"intValue": "2"}
+    assert attributes["bytes"] == {"intValue": "0"}
+
+
+def _fib(n):
+    return n if n < 2 else _fib(n - 1) + _fib(n - 2)
+
+
+def test_profile_cprofile(tmp_path, capsys):
+    with hooks.profile(tmp_path / "stage.prof"):
+        _fib(15)
+    functions = {func for _, _, func in pstats.Stats(str(tmp_path / "stage.prof")).stats}
+    assert "_fib" in functions
+
+    with hooks.profile(limit=5):
+        _fib(10)
+    assert "_fib" in capsys.readouterr().out
+
+    with pytest.raises(ValueError, match="Invalid profiler engine"):
+        with hooks.profile(engine="perf"):
+            pass
@@ -0,0 +1,71 @@
+import sys
+import types
+
+import pytest
+
+# QueryLLM imports every provider's client at module level
+for module in ("requests", "openai", "langchain", "langchain_core", "langchain_openai",
+               "langchain_google_genai", "langchain_together"):
+    pytest.importorskip(module)
+
+from llms.queryllm import QueryLLM  # noqa: E402
+
+
+class FakeSamplingParams:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+class FakeLLM:
+    """Stand-in for vllm.LLM that echoes the last user message."""
+
+    def __init__(self, model, **kwargs):
+        self.model  = model
+        self.kwargs = kwargs
+        self.calls  = []
+
+    def chat(self, conversations, sampling_params, use_tqdm=True):
+        self.calls.append(conversations)
+        outputs = []
+        for conversation in conversations:
+            text       = f"<think>...</think>echo: {conversation[-1]['content']}"
+            completion = types.SimpleNamespace(text=text, finish_reason="stop", token_ids=[1, 2])
+            outputs.append(types.SimpleNamespace(outputs=[completion], prompt_token_ids=[1, 2, 3]))
+        return outputs
+
+
+@pytest.fixture
+def offline_llm(monkeypatch):
+    fake_vllm = types.ModuleType("vllm")
+    fake_vllm.LLM            = FakeLLM
+    fake_vllm.SamplingParams = FakeSamplingParams
+    monkeypatch.setitem(sys.modules, "vllm", fake_vllm)
+
+    return QueryLLM(provider="vllm_offline",
+                    model="tiny-model",
+                    parameters={"temperature": 0, "max_tokens": 8, "max_retries": 2},
+                    engine_kwargs={"max_model_len": 512})
+
+
+def test_offline_engine_setup(offline_llm):
+    assert offline_llm.engine.model == "tiny-model"
+    assert offline_llm.engine.kwargs == {"max_model_len": 512}
+    assert offline_llm.sampling_params.kwargs == {"temperature": 0, "max_tokens": 8}
+
+
+def test_offline_simple_query(offline_llm):
+    response = offline_llm.simple_query("hello", system_prompt="Answer the question")
+    assert response == "echo: hello"
+    assert offline_llm.engine.calls[0][0][0] == {"role": "system", "content": "Answer the question"}
+
+
+def test_offline_batch_query_is_one_engine_call(offline_llm):
+    responses = offline_llm.batch_query([f"q{i}" for i in range(5)], system_prompt="sys")
+    assert responses == [f"echo: q{i}" for i in range(5)]
+    assert len(offline_llm.engine.calls) == 1
+    assert len(offline_llm.engine.calls[0]) == 5
+
+
+def test_offline_rejects_cache():
+    with pytest.raises(ValueError, match="cache"):
+        QueryLLM(provider="vllm_offline", model="tiny-model", cache="llm_cache")
@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+import time
+from types import SimpleNamespace
+
+from llms import sharded
+from llms.sharded import ShardedRunner
+
+
+def _square(item):
+    return {"id": item["id"], "value": item["id"] ** 2}
+
+
+def _worker(work_dir, worker_id):
+    runner = ShardedRunner(work_dir, shard_size=7, lease_seconds=2,
+                           heartbeat_seconds=0.2, worker_id=worker_id)
+    runner.run(_square, poll_seconds=0.1)
+
+
+def test_workers_share_shards_and_merge_in_order(tmp_path):
+    items  = [{"id": i} for i in range(100)]
+    runner = ShardedRunner(tmp_path, shard_size=7, lease_seconds=2, heartbeat_seconds=0.2)
+    assert runner.prepare(items) == 15
+
+    # a worker that died mid-shard leaves an abandoned lease behind
+    runner.lease_path(3).write_text("dead-worker")
+    old = time.time() - 60
+    os.utime(runner.lease_path(3), (old, old))
+
+    ctx     = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_worker, args=(str(tmp_path), f"w{i}")) for i in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert runner.pending() == []
+    assert not any(runner.lease_dir.iterdir())
+    assert runner.merge(tmp_path / "merged.jsonl") == [_square(item) for item in items]
+
+
+def test_live_lease_is_not_stolen(tmp_path):
+    runner = ShardedRunner(tmp_path, shard_size=10, lease_seconds=60, heartbeat_seconds=1,
+                           worker_id="a")
+    other  = ShardedRunner(tmp_path, shard_size=10, lease_seconds=60, heartbeat_seconds=1,
+                           worker_id="b")
+    runner.prepare([{"id": i} for i in range(10)])
+
+    assert runner.claim(0)
+    assert not other.claim(0)
+    assert other.run(_square, wait=False) == 0
+
+
+def test_an_expired_lease_is_stolen_once(tmp_path, monkeypatch):
+    a = ShardedRunner(tmp_path, shard_size=7, lease_seconds=2, heartbeat_seconds=0.2, worker_id="a")
+    b = ShardedRunner(tmp_path, shard_size=7, lease_seconds=2, heartbeat_seconds=0.2, worker_id="b")
+    a.prepare([{"id": i} for i in range(20)])
+
+    a.lease_path(0).write_text("dead-worker")
+    old = time.time() - 60
+    os.utime(a.lease_path(0), (old, old))
+
+    # b saw the abandoned lease just before a replaced it
+    stale = b._read_lease(0)
+    assert a.claim(0)
+    assert a._lease_owner(0) == "a"
+    reads = iter([stale])
+    read_lease = b._read_lease
+    monkeypatch.setattr(b, "_read_lease", lambda shard: next(reads, None) or read_lease(shard))
+    assert not b.claim(0)
+    assert a._lease_owner(0) == "a"
+
+    # a's own lease can be stolen once it expires in turn, at the next generation
+    os.utime(a.lease_path(0), (old, old))
+    assert b.claim(0) and b._read_lease(0)[:2] == ("b", 2)
+    b.release(0)
+    assert not any(b.lease_dir.iterdir())
+
+
+def test_marker_of_a_crashed_thief_expires(tmp_path):
+    a = ShardedRunner(tmp_path, shard_size=7, lease_seconds=2, heartbeat_seconds=0.2, worker_id="a")
+    a.prepare([{"id": i} for i in range(20)])
+
+    a.lease_path(0).write_text("dead-worker")
+    old = time.time() - 60
+    os.utime(a.lease_path(0), (old, old))
+
+    # a thief is creating the marker right now, the lease is left alone
+    a._steal_marker(0, 0).touch()
+    assert not a.claim(0)
+
+    # the thief died before replacing the lease
+    os.utime(a._steal_marker(0, 0), (old, old))
+    assert a.claim(0) and a._read_lease(0)[:2] == ("a", 1)
+    assert a._steal_marker(0, 0, attempt=1).exists()
+    a.release(0)
+    assert not any(a.lease_dir.iterdir())
+
+
+def test_lease_age_uses_the_filesystem_clock(tmp_path, monkeypatch):
+    a = ShardedRunner(tmp_path, shard_size=7, lease_seconds=60, heartbeat_seconds=1, worker_id="a")
+    b = ShardedRunner(tmp_path, shard_size=7, lease_seconds=60, heartbeat_seconds=1, worker_id="b")
+    a.prepare([{"id": i} for i in range(20)])
+    assert a.claim(0)
+
+    # b's local clock runs ten minutes ahead of the file server
+    real_time = time.time
+    monkeypatch.setattr(sharded, "time", SimpleNamespace(time=lambda: real_time() + 600,
+                                                         sleep=time.sleep))
+    assert not b.claim(0)
+    assert a._lease_owner(0) == "a"
+    assert not any(p.name.startswith(".clock") for p in a.lease_dir.iterdir())
@@ -0,0 +1,86 @@
+import gzip
+
+import pytest
+
+from fileio.text import compress_bytes
+from fileio.text import compression_codec
+from fileio.text import data_suffix
+from fileio.text import open_file
+from fileio.text import valid_file_ext
+
+
+LINES = [f'{{"id": {i}, "text": "é{i}"}}\n' for i in range(1000)]
+
+
+@pytest.fixture(params=["", ".gz", ".zst"])
+def suffix(request):
+    if request.param == ".zst":
+        pytest.importorskip("zstandard")
+    return request.param
+
+
+def test_open_file_round_trip(tmp_path, suffix):
+    path = tmp_path / f"records.jsonl{suffix}"
+    with open_file(path, "wt") as f:
+        f.writelines(LINES)
+    with open_file(path) as f:
+        assert f.readlines() == LINES
+    with open_file(path, "rb") as f:
+        assert f.read() == "".join(LINES).encode("utf-8")
+
+    with pytest.raises(ValueError):
+        open_file(path, "a")
+
+
+def test_compress_bytes_matches_open_file(tmp_path, suffix):
+    path = tmp_path / f"records.jsonl{suffix}"
+    payload = "".join(LINES).encode("utf-8")
+    path.write_bytes(compress_bytes(payload, compression_codec(path), level=1))
+    with open_file(path, "rb") as f:
+        assert f.read() == payload
+
+    with pytest.raises(ValueError):
+        compress_bytes(payload, "lz4")
+
+
+def test_multi_frame_zstd_is_read_to_the_end(tmp_path):
+    pytest.importorskip("zstandard")
+    path = tmp_path / "concatenated.jsonl.zst"
+    half = len(LINES) // 2
+    # what `cat a.zst b.zst` or pzstd produce
+    path.write_bytes(
+        compress_bytes("".join(LINES[:half]).encode(), "zstd")
+        + compress_bytes("".join(LINES[half:]).encode(), "zstd")
+    )
+    with open_file(path) as f:
+        assert f.readlines() == LINES
+    # a reader that stops at the frame boundary returns a short read here
+    with open_file(path, "rb") as f:
+        assert f.read(1 << 20) == "".join(LINES).encode("utf-8")
+
+
+def test_multi_member_gzip_is_read_to_the_end(tmp_path):
+    path = tmp_path / "concatenated.jsonl.gz"
+    path.write_bytes(gzip.compress(b"a\n") + gzip.compress(b"b\n"))
+    with open_file(path) as f:
+        assert f.read() == "a\nb\n"
+
+
+@pytest.mark.parametrize("name, allow_compressed, expected", [
+    ("data.csv", False, True),
+    ("data.csv.gz", False, False),
+    ("data.csv.gz", True, True),
+    ("data.csv.zst", True, True),
+    ("data.json.zst", True, False),
+    ("data.zst", True, False),
+])
+def test_valid_file_ext(name, allow_compressed, expected):
+    assert valid_file_ext(name, {".csv"}, allow_compressed=allow_compressed) is expected
+
+
+def test_suffix_helpers():
+    assert compression_codec("a.jsonl.zst") == "zstd"
+    assert compression_codec("a.jsonl.gz") == "gzip"
+    assert compression_codec("a.jsonl") is None
+    assert data_suffix("a.jsonl.zst") == ".jsonl"
+    assert data_suffix("a.jsonl") == ".jsonl"
@@ -0,0 +1,86 @@
+import json
+import os
+import stat
+
+import pytest
+
+from fileio.text import atomic_write
+from fileio.text import writers
+from fileio.text.writers import _dumps
+from fileio.text.writers import find_unserializable
+from fileio.text.writers import json_writer
+
+
+DATA = {"id": 1, "scores": [0.5, 1e-05], "tags": {"a": None}, 3: "int key"}
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "ujson"])
+def use_orjson(request, monkeypatch):
+    if request.param:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(writers, "orjson", None)
+    return request.param
+
+
+def test_atomic_write_respects_umask(tmp_path):
+    old_umask = os.umask(0o027)
+    try:
+        path = atomic_write(tmp_path / "sub" / "out.bin", b"payload")
+    finally:
+        os.umask(old_umask)
+
+    assert path.read_bytes() == b"payload"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    assert [p.name for p in path.parent.iterdir()] == ["out.bin"]
+
+
+def test_atomic_write_keeps_file_on_failure(tmp_path):
+    path = tmp_path / "out.bin"
+    path.write_bytes(b"old")
+    with pytest.raises(TypeError):
+        atomic_write(path, "not bytes")
+    assert path.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.bin"]
+
+
+def test_json_writer_round_trip(tmp_path, use_orjson):
+    json_writer(DATA, tmp_path / "out.json", indent=2)
+    assert json.loads((tmp_path / "out.json").read_text()) == json.loads(json.dumps(DATA))
+
+
+@pytest.mark.parametrize("value, expected", [
+    (float("nan"), b'{"x":[1.0,NaN]}'),
+    (float("inf"), b'{"x":[1.0,Infinity]}'),
+    (2 ** 70, b'{"x":[1.0,1180591620717411303424]}'),
+])
+def test_dumps_output_does_not_depend_on_orjson(use_orjson, value, expected):
+    assert _dumps({"x": [1.0, value]}) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("a/b", b'{"x":"a/b"}'),
+    ("caf\u00e9 \U0001f600", '{"x":"caf\u00e9 \U0001f600"}'.encode("utf-8")),
+    ('"quoted"\n\x01', b'{"x":"\\"quoted\\"\\n\\u0001"}'),
+])
+def test_dumps_strings_do_not_depend_on_orjson(use_orjson, value, expected):
+    assert _dumps({"x": value}) == expected
+    assert _dumps({"x": [value]}, indent=2) == _dumps({"x": [value]}, indent=2, use_orjson=False)
+
+
+@pytest.mark.parametrize("value", [1e20, 1.5e300, 1e-7, 5e-324, 0.1, 1 / 3, -0.0])
+def test_dumps_floats_read_back_the_same(value):
+    pytest.importorskip("orjson")
+    with_orjson = _dumps({"x": value, "s": "a/\u00e9"})
+    with_ujson = _dumps({"x": value, "s": "a/\u00e9"}, use_orjson=False)
+    assert json.loads(with_orjson) == json.loads(with_ujson) == {"x": value, "s": "a/\u00e9"}
+    # only the exponent spelling may differ, e.g. 1e20 and 1e+20
+    assert with_orjson == with_ujson.replace(b"e+", b"e")
+
+
+def test_unserializable_path_is_reported(tmp_path, use_orjson):
+    data = {"results": [{"ok": 2 ** 70}, {"embedding": {1, 2}}]}
+    assert find_unserializable(data) == "$['results'][1]['embedding'] (set)"
+    with pytest.raises(ValueError, match=r"\$\['results'\]\[1\]\['embedding'\] \(set\)"):
+        json_writer(data, tmp_path / "out.json")
+    assert not (tmp_path / "out.json").exists()
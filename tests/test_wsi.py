@@ -0,0 +1,99 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+tifffile = pytest.importorskip("tifffile")
+
+from fileio.image import wsi  # noqa: E402
+from fileio.image.wsi import SlideReader  # noqa: E402
+from fileio.image.wsi import tile_slide  # noqa: E402
+from fileio.image.wsi import tissue_mask  # noqa: E402
+
+
+@pytest.fixture
+def slide_image():
+    # grey glass with a saturated block of "tissue" in the top-left quarter
+    image = np.full((200, 160, 3), 230, np.uint8)
+    image[:100, :80] = (200, 60, 140)
+    noise = np.random.default_rng(0).integers(0, 8, image.shape, dtype=np.uint8)
+    return image + noise
+
+
+@pytest.fixture
+def tiled_slide(tmp_path, slide_image):
+    path = tmp_path / "tiled.tif"
+    with tifffile.TiffWriter(path) as tif:
+        tif.write(slide_image, tile=(32, 32), subifds=1, photometric="rgb")
+        tif.write(slide_image[::4, ::4], tile=(16, 16), subfiletype=1, photometric="rgb")
+    return path
+
+
+@pytest.fixture
+def stripped_slide(tmp_path, slide_image):
+    path = tmp_path / "stripped.tif"
+    tifffile.imwrite(path, slide_image, rowsperstrip=16, photometric="rgb")
+    return path
+
+
+@pytest.mark.parametrize("slide", ["tiled_slide", "stripped_slide"])
+def test_read_region(request, slide, slide_image):
+    with SlideReader(request.getfixturevalue(slide)) as reader:
+        assert reader.level_dimensions[0] == (160, 200)
+        for x, y, w, h in [(0, 0, 160, 200), (5, 7, 50, 40), (150, 190, 10, 10)]:
+            np.testing.assert_array_equal(reader.read_region(0, x, y, w, h), slide_image[y:y + h, x:x + w])
+
+
+@pytest.mark.parametrize("level, x, y, w, h", [
+    (0, 150, 0, 20, 10), (0, 0, 195, 10, 10), (0, -1, 0, 10, 10), (0, 0, 0, 0, 10),
+    (1, 0, 0, 41, 10), (2, 0, 0, 10, 10),
+])
+def test_read_region_outside_the_level_raises(tiled_slide, level, x, y, w, h):
+    with SlideReader(tiled_slide) as reader, pytest.raises(ValueError):
+        reader.read_region(level, x, y, w, h)
+
+
+def test_tissue_mask_of_grayscale_slides(slide_image):
+    rgb_mask = tissue_mask(slide_image)
+    assert rgb_mask[:90, :70].all() and not rgb_mask[110:, 90:].any()
+
+    # a dark block on bright glass, with and without a channel axis
+    gray = np.full((200, 160), 235, np.uint8)
+    gray[:100, :80] = 90
+    for image in (gray, gray[..., None]):
+        mask = tissue_mask(image)
+        assert mask.shape == (200, 160)
+        assert mask[:90, :70].all() and not mask[110:, 90:].any()
+    assert tissue_mask(gray, min_saturation=200).sum() == 0
+
+
+def test_tiled_pyramid(tiled_slide, slide_image):
+    with SlideReader(tiled_slide) as reader:
+        assert reader.level_count == 2 and reader.level_downsamples == [1.0, 4.0]
+        thumbnail, downsample = reader.thumbnail()
+        assert downsample == 4.0
+        np.testing.assert_array_equal(thumbnail, slide_image[::4, ::4])
+
+
+def test_thumbnail_of_slide_without_pyramid_is_read_in_bands(stripped_slide, slide_image, monkeypatch):
+    monkeypatch.setattr(wsi, "THUMBNAIL_BAND_PIXELS", 160 * 30)
+    with SlideReader(stripped_slide) as reader:
+        thumbnail, downsample = reader.thumbnail(max_size=50)
+
+    assert downsample == 4 and thumbnail.shape == (50, 40, 3)
+    expected = cv2.resize(slide_image, (40, 50), interpolation=cv2.INTER_AREA)
+    np.testing.assert_array_equal(thumbnail, expected)
+
+
+def test_oversized_strips_raise(stripped_slide, monkeypatch):
+    monkeypatch.setattr(wsi, "MAX_STRIP_PIXELS", 1000)
+    with SlideReader(stripped_slide) as reader, pytest.raises(ValueError, match="too large"):
+        reader.read_region(0, 0, 0, 10, 10)
+
+
+def test_tile_slide_keeps_tissue_tiles(tiled_slide, tmp_path):
+    pytest.importorskip("PIL")
+    written = tile_slide(tiled_slide, tmp_path / "tiles", tile_size=40, num_workers=2)
+    names = sorted(p.name for p in (tmp_path / "tiles").glob("*.png"))
+    # the tissue covers x < 80 and y < 100, the y=80 row of tiles is half tissue
+    assert written == len(names) == 6
+    assert names == sorted(f"tiled_x{x}_y{y}.png" for x in (0, 40) for y in (0, 40, 80))